@@ -1,6 +1,7 @@
+import asyncio
 import calendar
 import datetime
-import json
+import functools
 import logging
 import math
 import os
@@ -12,13 +13,11 @@ from typing import List, Tuple
 from uuid import uuid4
 
 import africastalking
-import boto3
-import joblib
 import jwt
-import mlflow
-import numpy as np
+import metrics
 import pandas as pd
-import shap
+import queries
+from artifacts import ARTIFACTS_DIR, ArtifactRegistry, ModelArtifacts, model_registry
 from auth import (
     create_access_token,
     create_refresh_token,
@@ -29,6 +28,10 @@ from auth import (
 from basemodels import (
     ActionTakenEnum,
     AdditionalInfoPostRequest,
+    ADRBatchItemResponse,
+    ADRBatchItemStatusEnum,
+    ADRBatchPostRequest,
+    ADRBatchPostResponse,
     ADRGetResponse,
     ADRPostRequest,
     ADRReviewCreateRequest,
@@ -37,6 +40,10 @@ from basemodels import (
     CausalityAssessmentLevelGetResponse,
     CriteriaForSeriousnessEnum,
     DechallengeEnum,
+    ExplanationDriverGetResponse,
+    ExplanationStatusEnum,
+    ExplanationTierEnum,
+    FeatureSchemaGetResponse,
     GenderEnum,
     IndividualAlertPostRequest,
     IsSeriousEnum,
@@ -51,6 +58,7 @@ from basemodels import (
     RechallengeEnum,
     ReviewGetResponse,
     SeverityEnum,
+    ShadowSummaryGetResponse,
     SMSMessageGetResponse,
     SMSMessageTypeEnum,
     Token,
@@ -59,46 +67,122 @@ from basemodels import (
     UserGetResponse,
     UserSignupBaseModel,
 )
+from batching import MicroBatcher
 from config import settings
-from dependencies import get_db
-from engines import engine
+from dependencies import get_async_db, get_db
+from drivers import backfill_drivers, save_drivers
+from engines import async_engine, engine
+from explainers import ExplainerEngine
+from explanation_cache import ExplanationCache
+from explanations import ExplanationWorker, ModelVersionUnavailable
 from fastapi import Depends, FastAPI, HTTPException, Path, Query, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_pagination import Page, add_pagination
-from fastapi_pagination.ext.sqlalchemy import paginate
-from mlflow.tracking import MlflowClient
+from fastapi_pagination import paginate as paginate_sequence
+from fastapi_pagination.ext.sqlalchemy import apaginate, paginate
+from feature_schemas import feature_schemas
+from inference import InferenceExecutor, InferenceQueueFull
+from migrate_shap_storage import migrate_shap_storage
+from migrations import run_migrations
 from models import (
     ADRModel,
     Base,
     CausalityAssessmentLevelModel,
+    ExplanationDriverModel,
     MedicalInstitutionModel,
     MedicalInstitutionTelephoneModel,
+    RescoringJobModel,
     ReviewModel,
     SMSMessageModel,
     UserModel,
 )
-from shap import Explainer, Explanation, KernelExplainer
-from sklearn.base import BaseEstimator
-from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
-from sqlalchemy import case, desc, func, text
+from pagination import (
+    CURSOR_DESCRIPTION,
+    KeysetPage,
+    after_cursor,
+    cursor_params,
+    decode_cursor,
+    ensure_no_cursor,
+    next_cursor,
+    older_than,
+)
+from predictors import build_predictor
+from rescoring import RescoringRunner
+from scoring import (
+    build_explainer,
+    is_unclassified,
+    score_adrs,
+    unclassified_assessment,
+)
+from search import match_expression, ranked_adr_matches
+from shadow import ShadowScorer, summarize_shadow_predictions
+from shap_storage import explanation_content
+from sqlalchemy import case, desc, func, literal_column, select, text, true
 from sqlalchemy.engine import Row
-from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import (
+    Session,
+    joinedload,
+    load_only,
+    selectinload,
+    undefer_group,
+)
+from typeahead import institution_typeahead
 from typing_extensions import Annotated, Dict
 
 DB_PATH = "db.sqlite"
 ADR_CSV_PATH = "data.csv"  # Path to the CSV file
 USERS_CSV_PATH = "users.csv"
 REVIEWS_CSV_PATH = "reviews.csv"
-ARTIFACTS_DIR = f"./{settings.mlflow_model_artifacts_path}"
 MEDICAL_INSTITUTION_CSV_PATH = "medical_institutions.csv"
 
+SUMMARY_DESCRIPTION = (
+    "Only the top explanation drivers of each class instead of the SHAP values"
+)
+
+# Causality assessment level columns served without the explanation
+CAUSALITY_ASSESSMENT_LEVEL_SUMMARY_COLUMNS = [
+    "id",
+    "adr_id",
+    "ml_model_id",
+    "causality_assessment_level_value",
+    "explanation_status",
+    "explanation_tier",
+    "feature_schema_id",
+    "created_at",
+    "updated_at",
+]
+
 logging.basicConfig(level=logging.INFO)
 logging.getLogger("shap").setLevel(logging.WARNING)
 
-explainer: KernelExplainer = None
+DEFAULT_EXPLANATION_TIER = ExplanationTierEnum(settings.explanation_tier)
+UPDATE_EXPLANATION_TIER = ExplanationTierEnum(
+    settings.explanation_tier_on_update or settings.explanation_tier
+)
+
+predictor = build_predictor()
+
+inference_executor = InferenceExecutor(
+    settings.inference_pool_size,
+    settings.inference_queue_depth,
+    ADR_CSV_PATH,
+    cache=ExplanationCache(
+        settings.explanation_cache_max_bytes,
+        settings.explanation_cache_path,
+        settings.explanation_cache_max_disk_bytes,
+    ),
+    predictor=predictor,
+)
+
+inference_requests_rejected = metrics.counter(
+    "inference_requests_rejected",
+    "Requests answered 503 because the inference queue was full",
+)
 
 
 def safe_date_parse(value):
@@ -112,87 +196,248 @@ def safe_date_parse(value):
         return None
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # ML Model Artifacts
-    if not os.path.exists(ARTIFACTS_DIR):
-        try:
-            logging.info("Downloading ML Model Artifacts")
+async def score_batch(
+    adrs: List[ADRPostRequest], tier: ExplanationTierEnum
+) -> List[dict]:
+    # In deferred mode the explanation worker fills in SHAP values later
+    return await inference_executor.score(
+        adrs, tier, explain=settings.explanation_mode != "deferred"
+    )
 
-            # Tracking URI
-            mlflow.set_tracking_uri(
-                f"http://{settings.mlflow_tracking_server_host}:{settings.mlflow_tracking_server_port}"
-            )
 
-            # Credentials
-            # Set MinIO Credentials
-            os.environ["AWS_ACCESS_KEY_ID"] = settings.minio_access_key
-            os.environ["AWS_SECRET_ACCESS_KEY"] = settings.minio_secret_access_key
-            os.environ["AWS_DEFAULT_REGION"] = settings.aws_region
+# One for pending explanations and one for a re-scoring job
+@functools.lru_cache(maxsize=2)
+def load_model_explainer(ml_model_id: str) -> Tuple[ModelArtifacts, ExplainerEngine]:
+    """
+    The artifacts and explainer of a model version other than the current
+    one, kept for the next batch scored or explained with it.
+    """
+    artifacts = model_registry.load_model(ml_model_id)
 
-            os.environ["MLFLOW_S3_ENDPOINT_URL"] = (
-                f"http://{settings.minio_host}:{settings.minio_api_port}"
-            )
+    if artifacts is None:
+        raise ModelVersionUnavailable(f"the artifacts of {ml_model_id} are gone")
+
+    return artifacts, build_explainer(artifacts, ADR_CSV_PATH)
 
-            # Test if credentials are set correctly
-            boto3.client(
-                "s3",
-                endpoint_url=os.getenv("MLFLOW_S3_ENDPOINT_URL"),
-            )
 
-            mlflow_client = MlflowClient()
+async def explain_batch(
+    adrs: List[ADRModel],
+    tier: ExplanationTierEnum,
+    ml_model_id: str,
+    feature_schema_id: str,
+) -> List[dict]:
+    artifacts, level_explainer = None, None
 
-            ml_model_version = mlflow_client.get_model_version_by_alias(
-                settings.mlflow_model_name, settings.mlflow_model_alias
+    # CALs saved before a swap are explained by the version that predicted them
+    if inference_executor.artifacts.feature_schema["id"] != feature_schema_id:
+        artifacts, level_explainer = await asyncio.to_thread(
+            load_model_explainer, ml_model_id
+        )
+        if artifacts.feature_schema["id"] != feature_schema_id:
+            raise ModelVersionUnavailable(
+                f"{ml_model_id} no longer has feature schema {feature_schema_id}"
             )
 
-            ml_model_run_id = ml_model_version.run_id
+    with inference_executor.queued():
+        return await inference_executor.explain(
+            adrs, tier, artifacts, level_explainer
+        )
 
-            logging.info(
-                f"✅ Retrieved model version {ml_model_version.version} (run_id: {ml_model_run_id})"
-            )
 
-            # 2️⃣ List available artifacts
-            artifacts = mlflow_client.list_artifacts(ml_model_run_id)
-            if not artifacts:
-                logging.warning("No artifacts found for this model.")
-            else:
-                logging.info(
-                    f"Available artifacts: {[artifact.path for artifact in artifacts]}"
-                )
+explanation_worker = ExplanationWorker(explain_batch, settings.explanation_batch_size)
+
+# A batch is explained with one tier, so each tier batches on its own
+inference_batchers = {
+    tier: MicroBatcher(
+        functools.partial(score_batch, tier=tier),
+        settings.inference_batch_max_size,
+        settings.inference_batch_max_wait_ms,
+        inference_executor.queued,
+    )
+    for tier in ExplanationTierEnum
+}
+
+
+def online_requests_waiting() -> bool:
+    return any(batcher.busy for batcher in inference_batchers.values())
+
+
+shadow_scorer: ShadowScorer | None = None
+if settings.mlflow_challenger_model_alias:
+    shadow_scorer = ShadowScorer(
+        ArtifactRegistry(
+            settings.mlflow_challenger_model_alias,
+            os.path.join(ARTIFACTS_DIR, "challenger"),
+        ),
+        inference_executor,
+        online_requests_waiting,
+        settings.shadow_queue_depth,
+        settings.shadow_batch_size,
+    )
+
+
+async def rescore_batch(adrs: List[ADRModel], ml_model_id: str) -> List[dict]:
+    artifacts, job_explainer = None, None
 
-            # 3️⃣ Ensure local artifacts directory exists
-            os.makedirs(ARTIFACTS_DIR, exist_ok=True)
-            mlflow_client.download_artifacts(
-                ml_model_run_id,
-                "",
-                dst_path=ARTIFACTS_DIR,
+    # A job keeps scoring with the version it was started for across swaps
+    if inference_executor.artifacts.ml_model_id != ml_model_id:
+        artifacts, job_explainer = await asyncio.to_thread(
+            load_model_explainer, ml_model_id
+        )
+
+    # Re-scoring already runs in the background, so it explains right away
+    with inference_executor.queued():
+        return await inference_executor.score(
+            adrs, DEFAULT_EXPLANATION_TIER, True, artifacts, job_explainer
+        )
+
+
+rescoring_runner = RescoringRunner(
+    rescore_batch,
+    online_requests_waiting,
+    settings.rescoring_chunk_size,
+    settings.rescoring_concurrency,
+    settings.rescoring_pause_ms,
+)
+
+
+async def run_inference(
+    adrs: List[ADRPostRequest], tier: ExplanationTierEnum
+) -> List[dict]:
+    """
+    Predict and explain classifiable ADRs, batched with concurrent requests.
+    Commit first so the request holds no connection while it waits.
+    """
+    try:
+        return await inference_batchers[tier].submit(adrs)
+    except InferenceQueueFull:
+        inference_requests_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many ADRs are waiting to be classified, try again later",
+        )
+
+
+def shadow_score(adr, adr_id: str, causality_assessment_level_id: str, assessment: dict):
+    """Queue a classified ADR for the challenger model, if there is one."""
+    value = assessment["causality_assessment_level_value"]
+    if shadow_scorer is None or value is CausalityAssessmentLevelEnum.unclassified:
+        return
+
+    shadow_scorer.submit(
+        adr,
+        adr_id,
+        causality_assessment_level_id,
+        # The model that scored it, which is not current() after a swap
+        assessment["ml_model_id"],
+        value,
+    )
+
+
+def causality_assessment_level_options(summary: bool):
+    """What to load with causality assessment levels for their content."""
+    if summary:
+        return selectinload(CausalityAssessmentLevelModel.drivers)
+    return undefer_group("explanation")
+
+
+def causality_assessment_level_content(
+    causality_assessment_level: CausalityAssessmentLevelModel,
+    schema: dict | None,
+    summary: bool = False,
+) -> dict:
+    """
+    JSON content of a causality assessment level, whichever format its SHAP
+    values are stored in, or only its explanation drivers in summary mode.
+    Query with causality_assessment_level_options to load what it needs with
+    the row, and pass its feature schema from feature_schemas.
+    """
+    content = jsonable_encoder(
+        {
+            column: getattr(causality_assessment_level, column)
+            for column in CAUSALITY_ASSESSMENT_LEVEL_SUMMARY_COLUMNS
+        }
+    )
+
+    if summary:
+        drivers = defaultdict(list)
+        for driver in causality_assessment_level.drivers:
+            drivers[driver.class_value.value].append(
+                {
+                    "rank": driver.rank,
+                    "feature_name": driver.feature_name,
+                    "feature_label": schema["display_labels"][driver.feature_index]
+                    if schema is not None
+                    else None,
+                    "shap_value": driver.shap_value,
+                }
             )
-            logging.info("Downloaded ML Model Artifacts")
+        content["drivers"] = drivers
 
-        except Exception as e:
-            logging.error(f"Error during ML model retrieval: {e}")
+        return content
 
-    else:
-        logging.info("Skipping artifact download")
+    # Already plain lists and numbers, too many for jsonable_encoder to walk
+    content.update(explanation_content(causality_assessment_level))
+    content["feature_labels"] = None
+
+    if schema is not None:
+        content["feature_names"] = schema["feature_names"]
+        content["feature_labels"] = schema["display_labels"]
+
+    return content
+
+
+def restart_inference(artifacts: ModelArtifacts):
+    logging.info(f"Rebuilding SHAP Explainer for model version {artifacts.version}")
+
+    # Published together, so a request never mixes versions
+    inference_executor.start(artifacts, build_explainer(artifacts, ADR_CSV_PATH))
+
+
+def rescore_on_swap(artifacts: ModelArtifacts):
+    previous = model_registry.previous
+
+    # The first poll can swap the local artifacts for the same model by version
+    if previous is not None and previous.content_digest == artifacts.content_digest:
+        logging.info(
+            f"Not re-scoring, model version {artifacts.version} is the same model as version {previous.version}"
+        )
+        return
+
+    rescoring_runner.start_threadsafe(artifacts.ml_model_id)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ML Model Artifacts
+    model_registry.ensure_downloaded()
 
     # Explain with SHAP
     logging.info("SHAP Explainer Setup Started...")
 
-    ml_model = get_ml_model()
+    artifacts = model_registry.current()
 
-    # Load and preprocess new data
-    new_data_df = pd.read_csv("data.csv")
+    # Load new data
+    new_data_df = pd.read_csv(ADR_CSV_PATH)
 
-    final_input_df = input_to_prediction_format(new_data_df)
+    explainer = build_explainer(artifacts, ADR_CSV_PATH)
 
-    global explainer
+    logging.info("SHAP Explainer Setup Finished...")
 
-    explainer = shap.KernelExplainer(
-        ml_model.predict_proba, shap.kmeans(final_input_df, 10)
-    )
+    # Keep predict and SHAP off the event loop
+    inference_executor.start(artifacts, explainer)
 
-    logging.info("SHAP Explainer Setup Finished...")
+    # Before anything scores with a new version
+    model_registry.on_swap(feature_schemas.register)
+    model_registry.on_swap(restart_inference)
+
+    background_tasks = []
+    if settings.mlflow_model_refresh_interval_seconds > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                model_registry.watch(settings.mlflow_model_refresh_interval_seconds)
+            )
+        )
 
     # Create tables once before the app starts
     try:
@@ -200,6 +445,59 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logging.error(f"Error creating tables: {e}")
 
+    # Indexes and other schema changes create_all does not make
+    try:
+        run_migrations()
+    except Exception as e:
+        logging.error(f"Error migrating the database: {e}")
+
+    # Levels refer to the features of their model version by schema id
+    feature_schemas.register(artifacts)
+
+    # Convert explanations saved in the other SHAP storage format
+    try:
+        migrate_shap_storage(settings.shap_storage_format)
+    except Exception as e:
+        logging.error(f"Error converting SHAP storage: {e}")
+
+    # Levels explained before explanation drivers were saved
+    try:
+        backfill_drivers()
+    except Exception as e:
+        logging.error(f"Error saving explanation drivers: {e}")
+
+    # Explanations left pending by a previous run are picked up again
+    explanation_worker.enqueue_pending()
+    background_tasks.append(asyncio.create_task(explanation_worker.run()))
+
+    # Finish a re-scoring job cut short, and start one whenever the model changes
+    rescoring_runner.resume_unfinished()
+    if settings.rescoring_on_model_swap:
+        model_registry.on_swap(rescore_on_swap)
+
+    # Score live ADRs with the challenger model too, after the champion
+    global shadow_scorer
+
+    if shadow_scorer is not None:
+        try:
+            shadow_scorer.registry.ensure_downloaded()
+            challenger = shadow_scorer.registry.current()
+            logging.info(f"Shadow scoring with challenger {challenger.ml_model_id}")
+        except Exception as e:
+            logging.error(f"Error loading the challenger model, shadow scoring is off: {e}")
+            shadow_scorer = None
+
+    if shadow_scorer is not None:
+        background_tasks.append(asyncio.create_task(shadow_scorer.run()))
+        if settings.mlflow_model_refresh_interval_seconds > 0:
+            background_tasks.append(
+                asyncio.create_task(
+                    shadow_scorer.registry.watch(
+                        settings.mlflow_model_refresh_interval_seconds
+                    )
+                )
+            )
+
     session = Session(bind=engine)
 
     # Add institutions
@@ -251,6 +549,9 @@ async def lifespan(app: FastAPI):
     else:
         logging.info("Medical Institution Telephones already inserted")
 
+    institution_typeahead.load()
+    logging.info("Medical Institution typeahead index loaded")
+
     # Add users
     user_count = session.query(UserModel).count()
 
@@ -269,6 +570,12 @@ async def lifespan(app: FastAPI):
         logging.error("User with username 'A' not found! ADR insertion aborted.")
         session.close()
         yield
+        for task in background_tasks:
+            task.cancel()
+        inference_executor.shutdown()
+        rescoring_runner.cancel()
+        if predictor is not None:
+            await predictor.close()
         return
 
     user_a_id = user_a.id  # Get user ID
@@ -375,62 +682,34 @@ async def lifespan(app: FastAPI):
             session.refresh(adr_entry)
 
         logging.info("ADR inserted successfully.")
-        # Now that adr_entries have IDs, link them to causality entries
-        for adr_entry, record in zip(
-            adr_entries, new_data_df.to_dict(orient="records")
-        ):
-            ml_model = get_ml_model()
-
-            _, ordinal_encoder = get_encoders()
-
-            minmax_scaler = get_scalers()
-
-            # Load and preprocess new data
-            adr_data_df = pd.DataFrame([record])
-
-            final_input_df = input_to_prediction_format(adr_data_df)
-
-            # Predict using the ML model
-            prediction = ml_model.predict(final_input_df)
-
-            decoded_prediction = ordinal_encoder.inverse_transform(
-                prediction.reshape(-1, 1)
-            )[0][0]
-
-            logging.info("Generation SHAP value...")
-            shap_values = explainer(final_input_df)
-
-            broken_down_shap_values = get_shap_values(shap_values)
-
-            base_values = broken_down_shap_values["base_values"]
-            shap_values_matrix = broken_down_shap_values["shap_values_matrix"]
-            shap_values_sum_per_class = broken_down_shap_values[
-                "shap_values_sum_per_class"
-            ]
-            shap_values_and_base_values_sum_per_class = broken_down_shap_values[
-                "shap_values_and_base_values_sum_per_class"
-            ]
-
-            feature_names = final_input_df.columns.tolist()
-            feature_values = final_input_df.iloc[0].tolist()
+        # Now that adr_entries have IDs, link them to causality entries.
+        # Preprocess, predict and explain every seeded ADR in one batch
+        logging.info("Generation SHAP value...")
+        assessments = score_adrs(
+            artifacts,
+            explainer,
+            new_data_df.to_dict(orient="records"),
+            DEFAULT_EXPLANATION_TIER,
+        )
 
+        for adr_entry, assessment in zip(adr_entries, assessments):
             # Add causality assessment level
             causality_entry = CausalityAssessmentLevelModel(
                 adr_id=adr_entry.id,
-                causality_assessment_level_value=CausalityAssessmentLevelEnum(
-                    decoded_prediction
-                ),
-                base_values=base_values,
-                shap_values_matrix=shap_values_matrix,
-                shap_values_sum_per_class=shap_values_sum_per_class,
-                shap_values_and_base_values_sum_per_class=shap_values_and_base_values_sum_per_class,
-                feature_names=feature_names,
-                feature_values=format_feature_values(feature_values),
+                **assessment,
             )
 
             causality_entries.append(causality_entry)
 
         session.add_all(causality_entries)
+        session.flush()
+        save_drivers(
+            session,
+            [
+                (causality_entry.id, assessment)
+                for causality_entry, assessment in zip(causality_entries, assessments)
+            ],
+        )
         session.commit()
 
         logging.info("Causality Assessment inserted successfully.")
@@ -586,10 +865,23 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    for task in background_tasks:
+        task.cancel()
+    inference_executor.shutdown()
+    rescoring_runner.cancel()
+    if predictor is not None:
+        await predictor.close()
+
+    # Closing the pools checkpoints the write-ahead log into the database
+    await async_engine.dispose()
+    engine.dispose()
+
     # Delete the SQLite database after shutdown
     if os.path.exists(DB_PATH):
         try:
-            os.remove(DB_PATH)
+            for path in [DB_PATH, f"{DB_PATH}-wal", f"{DB_PATH}-shm"]:
+                if os.path.exists(path):
+                    os.remove(path)
             logging.info("Database deleted successfully.")
         except Exception as e:
             logging.error(f"Error deleting database: {e}")
@@ -743,10 +1035,10 @@ async def refresh_access_token(refresh_token: str):
 @app.get("/api/v1/users/me", status_code=status.HTTP_201_CREATED)
 async def read_users_me(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_user = (
-        db.query(UserModel)
+    db_user = await db.scalar(
+        select(UserModel)
         .options(
             load_only(
                 UserModel.id,
@@ -755,85 +1047,69 @@ async def read_users_me(
                 UserModel.last_name,
             )
         )
-        .filter(UserModel.username == current_user.username)
-        .first()
+        .where(UserModel.username == current_user.username)
     )
 
     return db_user
 
 
 @app.get(
-    "/api/v1/adr", response_model=Page[ADRGetResponse], status_code=status.HTTP_200_OK
+    "/api/v1/adr",
+    response_model=KeysetPage[ADRGetResponse],
+    status_code=status.HTTP_200_OK,
 )
 def get_adrs(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     query: str = Query("", description="Search query(optional)"),
     db: Session = Depends(get_db),
 ):
-    if query:
-        content = db.query(ADRModel).filter(
-            ADRModel.patient_name.ilike(f"%{query}%")
-            | ADRModel.patient_address.ilike(f"%{query}%")
-            | ADRModel.inpatient_or_outpatient_number.ilike(f"%{query}%")
-            | ADRModel.ward_or_clinic.ilike(f"%{query}%")
+    match = match_expression(query)
+
+    if match:
+        ensure_no_cursor()
+
+        # Best matches first, through the full-text index
+        matches = ranked_adr_matches(match)
+        content = (
+            db.query(ADRModel)
+            .join(matches, matches.c.rowid == literal_column("adr.rowid"))
+            .order_by(matches.c.rank, desc(ADRModel.created_at))
         )
 
-    else:
-        content = db.query(ADRModel)
+        return paginate(content, additional_data={"next_cursor": None})
 
-    content = content.order_by(desc(ADRModel.created_at))
+    content = after_cursor(db.query(ADRModel), ADRModel.created_at, ADRModel.id)
 
     return paginate(content)
 
 
 @app.get(
     "/api/v1/adrs_with_causality_and_review_count",
-    response_model=Page[dict],
+    response_model=KeysetPage[dict],
     status_code=status.HTTP_200_OK,
 )
 def get_adrs_with_causality_and_review_count(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
     query: str = Query("", description="Search query (optional)"),
     db: Session = Depends(get_db),
 ):
-    offset = (page - 1) * size
-    search_term = f"%{query}%" if query else None
-
-    # Total count query
-    total_sql = text("""
-        SELECT COUNT(*) FROM adr
-        WHERE (:query IS NULL OR LOWER(patient_name) LIKE LOWER(:query));
-    """)
-    total_result = db.execute(total_sql, {"query": search_term})
-    total = total_result.scalar_one()
-    pages = math.ceil(total / size) if total > 0 else 1
-
-    # Main query using ROW_NUMBER and CTE for SQLite compatibility
-    main_sql = text("""
-        WITH ranked_causality AS (
-            SELECT *,
-                   ROW_NUMBER() OVER (PARTITION BY adr_id ORDER BY created_at ASC) AS rn
-            FROM causality_assessment_level
-        )
-        SELECT
-            a.id AS adr_id,
-            a.patient_name,
-            u.first_name || ' ' || u.last_name AS created_by,
-            a.created_at,
-            cal.causality_assessment_level_value,
-            COUNT(CASE WHEN r.approved = 1 THEN 1 END) AS approved_reviews,
-            COUNT(CASE WHEN r.approved = 0 THEN 1 END) AS unapproved_reviews
-        FROM adr a
-        JOIN "user" u ON a.user_id = u.id
-        LEFT JOIN ranked_causality cal ON cal.adr_id = a.id AND cal.rn = 1
-        LEFT JOIN review r ON r.causality_assessment_level_id = cal.id
-        WHERE (:query IS NULL OR LOWER(a.patient_name) LIKE LOWER(:query))
-        GROUP BY a.id, a.patient_name, u.first_name, u.last_name, cal.causality_assessment_level_value
-        ORDER BY a.created_at DESC
-        LIMIT :limit OFFSET :offset;
-    """)
+    offset = 0 if cursor else (page - 1) * size
+    search_term = match_expression(query, ["patient_name"])
+
+    # Total count query, left out of pages after a cursor
+    total = pages = None
+    if cursor is None:
+        total_sql = text(queries.ADRS_WITH_CAUSALITY_AND_REVIEW_COUNT_TOTAL)
+        total_result = db.execute(total_sql, {"query": search_term})
+        total = total_result.scalar_one()
+        pages = math.ceil(total / size) if total > 0 else 1
+
+    main_sql = text(
+        queries.adrs_with_causality_and_review_count(search=search_term is not None)
+    )
 
     result = db.execute(
         main_sql,
@@ -841,6 +1117,7 @@ def get_adrs_with_causality_and_review_count(
             "query": search_term,
             "limit": size,
             "offset": offset,
+            **cursor_params(cursor),
         },
     )
 
@@ -852,6 +1129,7 @@ def get_adrs_with_causality_and_review_count(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(items, size, ["created_at", "adr_id"]),
     }
 
 
@@ -873,114 +1151,186 @@ def get_adr_by_id(
 async def post_adr(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     adr: ADRPostRequest,
-    db: Session = Depends(get_db),
+    explanation_tier: ExplanationTierEnum = Query(
+        DEFAULT_EXPLANATION_TIER, description="How precise the SHAP values are"
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Get user id
-    db_user = (
-        db.query(UserModel).filter(UserModel.username == current_user.username).first()
+    user_id = await db.scalar(
+        select(UserModel.id).where(UserModel.username == current_user.username)
     )
 
+    # Check if ADR has the appropriate fields present.
+    # If not, set the causality level to unclassified and skip the model.
+    # Classify before saving so a full inference queue saves nothing
+    if is_unclassified(adr):
+        assessment = unclassified_assessment()
+    else:
+        # End the read transaction so the connection goes back to the pool
+        # while this request waits for its batch
+        await db.commit()
+        assessment = (await run_inference([adr], explanation_tier))[0]
+
     adr_model = ADRModel(
         **adr.model_dump(),
-        user_id=db_user.id,
+        user_id=user_id,
     )
 
     db.add(adr_model)
-    db.commit()
-    db.refresh(adr_model)
+    await db.commit()
+    await db.refresh(adr_model)
 
-    # Check if ADR has the appropriate fields present.
-    # If not, set the causality level to unclassified and just return immediately
-    if (
-        adr.rifampicin_suspected is None
-        and adr.isoniazid_suspected is None
-        and adr.pyrazinamide_suspected is None
-        and adr.ethambutol_suspected is None
-    ) or (
-        adr.rechallenge is RechallengeEnum.unknown
-        and adr.dechallenge is DechallengeEnum.unknown
-    ):
-        casuality_assessment_level_model = CausalityAssessmentLevelModel(
-            adr_id=adr_model.id,
-            causality_assessment_level_value=CausalityAssessmentLevelEnum.unclassified,
-            base_values=None,
-            shap_values_matrix=None,
-            shap_values_sum_per_class=None,
-            shap_values_and_base_values_sum_per_class=None,
-            feature_names=None,
-            feature_values=None,
-        )
-
-        db.add(casuality_assessment_level_model)
-        db.commit()
-        db.refresh(casuality_assessment_level_model)
-
-        # To load the causality assessment levels
-        content = db.query(ADRModel).filter(ADRModel.id == adr_model.id).first()
+    # Add causality assessment level
+    casuality_assessment_level_model = CausalityAssessmentLevelModel(
+        adr_id=adr_model.id,
+        **assessment,
+    )
 
-        return JSONResponse(
-            content=jsonable_encoder(content),
-            status_code=status.HTTP_201_CREATED,
-        )
+    db.add(casuality_assessment_level_model)
+    await db.flush()
+    await db.run_sync(
+        save_drivers, [(casuality_assessment_level_model.id, assessment)]
+    )
+    await db.commit()
+    await db.refresh(casuality_assessment_level_model)
 
-    # Get ML Model
-    ml_model = get_ml_model()
+    if assessment["explanation_status"] is ExplanationStatusEnum.pending:
+        explanation_worker.enqueue(casuality_assessment_level_model.id)
 
-    # Get encoders
-    _, ordinal_encoder = get_encoders()
+    shadow_score(adr, adr_model.id, casuality_assessment_level_model.id, assessment)
 
-    # Save data as temp df
-    temp_df = pd.DataFrame([adr.model_dump()])
+    return JSONResponse(
+        content=jsonable_encoder(adr_model),
+        status_code=status.HTTP_201_CREATED,
+    )
 
-    # Extract prediction input
-    prediction_input = input_to_prediction_format(temp_df)
 
-    # Predict using the ML model
-    prediction = ml_model.predict(prediction_input)
+def insert_adr_batch(
+    session: Session,
+    adr_mappings: List[dict],
+    causality_assessment_level_mappings: List[dict],
+):
+    session.bulk_insert_mappings(ADRModel, adr_mappings)
+    session.bulk_insert_mappings(
+        CausalityAssessmentLevelModel, causality_assessment_level_mappings
+    )
+    save_drivers(
+        session,
+        [(mapping["id"], mapping) for mapping in causality_assessment_level_mappings],
+    )
 
-    decoded_prediction = ordinal_encoder.inverse_transform(prediction.reshape(-1, 1))[
-        0
-    ][0]
 
-    global explainer
+@app.post("/api/v1/adr/batch", status_code=status.HTTP_201_CREATED)
+async def post_adr_batch(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    batch: ADRBatchPostRequest,
+    explanation_tier: ExplanationTierEnum = Query(
+        DEFAULT_EXPLANATION_TIER, description="How precise the SHAP values are"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Get user id
+    user_id = await db.scalar(
+        select(UserModel.id).where(UserModel.username == current_user.username)
+    )
 
-    shap_values = explainer(prediction_input)
+    # Reject ADRs pointing at institutions that do not exist
+    institution_ids = {adr.medical_institution_id for adr in batch.adrs}
+    existing_institution_ids = set(
+        await db.scalars(
+            select(MedicalInstitutionModel.id).where(
+                MedicalInstitutionModel.id.in_(institution_ids)
+            )
+        )
+    )
 
-    broken_down_shap_values = get_shap_values(shap_values)
+    items = []
+    accepted = []
+    for index, adr in enumerate(batch.adrs):
+        if adr.medical_institution_id not in existing_institution_ids:
+            items.append(
+                ADRBatchItemResponse(
+                    index=index,
+                    status=ADRBatchItemStatusEnum.rejected,
+                    detail="Medical Institution not found",
+                )
+            )
+        else:
+            items.append(
+                ADRBatchItemResponse(
+                    index=index,
+                    status=ADRBatchItemStatusEnum.unclassified
+                    if is_unclassified(adr)
+                    else ADRBatchItemStatusEnum.classified,
+                    adr_id=str(uuid4()),
+                    causality_assessment_level_id=str(uuid4()),
+                )
+            )
+            accepted.append(index)
 
-    base_values = broken_down_shap_values["base_values"]
-    shap_values_matrix = broken_down_shap_values["shap_values_matrix"]
-    shap_values_sum_per_class = broken_down_shap_values["shap_values_sum_per_class"]
-    shap_values_and_base_values_sum_per_class = broken_down_shap_values[
-        "shap_values_and_base_values_sum_per_class"
+    # One predict and explainer pass over all classifiable ADRs
+    classified = [
+        index
+        for index in accepted
+        if items[index].status is ADRBatchItemStatusEnum.classified
     ]
+    assessments = {index: unclassified_assessment() for index in accepted}
+
+    if classified:
+        # End the read transaction so the connection goes back to the pool
+        # while this request waits for its batch
+        await db.commit()
+        scored = await run_inference(
+            [batch.adrs[index] for index in classified], explanation_tier
+        )
+        assessments.update(zip(classified, scored))
 
-    feature_names = prediction_input.columns.tolist()
-    feature_values = prediction_input.iloc[0].tolist()
+    adr_mappings = []
+    causality_assessment_level_mappings = []
+    for index in accepted:
+        item = items[index]
+        item.causality_assessment_level_value = assessments[index][
+            "causality_assessment_level_value"
+        ]
 
-    # Add causality assessment level
-    casuality_assessment_level_model = CausalityAssessmentLevelModel(
-        adr_id=adr_model.id,
-        causality_assessment_level_value=CausalityAssessmentLevelEnum(
-            decoded_prediction
-        ),
-        base_values=base_values,
-        shap_values_matrix=shap_values_matrix,
-        shap_values_sum_per_class=shap_values_sum_per_class,
-        shap_values_and_base_values_sum_per_class=shap_values_and_base_values_sum_per_class,
-        feature_names=feature_names,
-        feature_values=format_feature_values(feature_values),
+        adr_mappings.append(
+            {
+                **batch.adrs[index].model_dump(),
+                "id": item.adr_id,
+                "user_id": user_id,
+            }
+        )
+        causality_assessment_level_mappings.append(
+            {
+                **assessments[index],
+                "id": item.causality_assessment_level_id,
+                "adr_id": item.adr_id,
+            }
+        )
+
+    # Write everything in one transaction
+    await db.run_sync(
+        insert_adr_batch, adr_mappings, causality_assessment_level_mappings
     )
+    await db.commit()
 
-    db.add(casuality_assessment_level_model)
-    db.commit()
-    db.refresh(casuality_assessment_level_model)
+    for index, mapping in zip(accepted, causality_assessment_level_mappings):
+        if mapping["explanation_status"] is ExplanationStatusEnum.pending:
+            explanation_worker.enqueue(mapping["id"])
 
-    # To load the causality assessment levels
-    content = db.query(ADRModel).filter(ADRModel.id == adr_model.id).first()
+        shadow_score(batch.adrs[index], mapping["adr_id"], mapping["id"], mapping)
 
     return JSONResponse(
-        content=jsonable_encoder(content),
+        content=jsonable_encoder(
+            ADRBatchPostResponse(
+                **{
+                    item_status.value: sum(item.status is item_status for item in items)
+                    for item_status in ADRBatchItemStatusEnum
+                },
+                items=items,
+            )
+        ),
         status_code=status.HTTP_201_CREATED,
     )
 
@@ -990,127 +1340,78 @@ async def update_adr(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     updated_adr: ADRPostRequest,
     adr_id: str = Path(..., description="ID of the ADR record to update"),
-    db: Session = Depends(get_db),
+    explanation_tier: ExplanationTierEnum = Query(
+        UPDATE_EXPLANATION_TIER, description="How precise the SHAP values are"
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Get existing ADR record
-    adr_model = db.query(ADRModel).filter(ADRModel.id == adr_id).first()
+    adr_model = await db.get(ADRModel, adr_id)
     if not adr_model:
         raise HTTPException(status_code=404, detail="ADR record not found")
 
+    # Classify before saving so a full inference queue leaves the ADR as it was
+    if not is_unclassified(updated_adr):
+        # End the read transaction while this request waits for its batch
+        await db.commit()
+        assessment = (await run_inference([updated_adr], explanation_tier))[0]
+
     # Update ADR fields
     for key, value in updated_adr.model_dump().items():
         setattr(adr_model, key, value)
 
-    db.commit()
-    db.refresh(adr_model)
-
-    if (
-        adr_model.rifampicin_suspected is None
-        and adr_model.isoniazid_suspected is None
-        and adr_model.pyrazinamide_suspected is None
-        and adr_model.ethambutol_suspected is None
-    ) or (
-        adr_model.rechallenge is RechallengeEnum.unknown
-        and adr_model.dechallenge is DechallengeEnum.unknown
-    ):
+    await db.commit()
+    await db.refresh(adr_model)
+
+    if is_unclassified(adr_model):
         casuality_assessment_level_model = CausalityAssessmentLevelModel(
             adr_id=adr_model.id,
-            causality_assessment_level_value=CausalityAssessmentLevelEnum.unclassified,
-            base_values=None,
-            shap_values_matrix=None,
-            shap_values_sum_per_class=None,
-            shap_values_and_base_values_sum_per_class=None,
-            feature_names=None,
-            feature_values=None,
+            **unclassified_assessment(),
         )
 
         db.add(casuality_assessment_level_model)
-        db.commit()
-        db.refresh(casuality_assessment_level_model)
-
-        # To load the causality assessment levels
-        content = db.query(ADRModel).filter(ADRModel.id == adr_model.id).first()
+        await db.commit()
+        await db.refresh(casuality_assessment_level_model)
 
         return JSONResponse(
-            content=jsonable_encoder(content),
+            content=jsonable_encoder(adr_model),
             status_code=status.HTTP_201_CREATED,
         )
 
-    # Step 3: Load ML model and encoders
-    ml_model = get_ml_model()
-
-    _, ordinal_encoder = get_encoders()
-
-    temp_df = pd.DataFrame([updated_adr.model_dump()])
-
-    prediction_input = input_to_prediction_format(temp_df)
-
-    # Predict and decode
-    prediction = ml_model.predict(prediction_input)
-    decoded_prediction = ordinal_encoder.inverse_transform(prediction.reshape(-1, 1))[
-        0
-    ][0]
-
-    global explainer
-
-    shap_values = explainer(prediction_input)
-
-    broken_down_shap_values = get_shap_values(shap_values)
-
-    base_values = broken_down_shap_values["base_values"]
-    shap_values_matrix = broken_down_shap_values["shap_values_matrix"]
-    shap_values_sum_per_class = broken_down_shap_values["shap_values_sum_per_class"]
-    shap_values_and_base_values_sum_per_class = broken_down_shap_values[
-        "shap_values_and_base_values_sum_per_class"
-    ]
-
-    feature_names = prediction_input.columns.tolist()
-    feature_values = prediction_input.iloc[0].tolist()
-
     # Update causality assessment model
-    causality_record = (
-        db.query(CausalityAssessmentLevelModel)
-        .filter(CausalityAssessmentLevelModel.adr_id == adr_model.id)
-        .first()
+    causality_record = await db.scalar(
+        select(CausalityAssessmentLevelModel)
+        .where(CausalityAssessmentLevelModel.adr_id == adr_model.id)
+        .order_by(
+            desc(CausalityAssessmentLevelModel.created_at),
+            desc(CausalityAssessmentLevelModel.id),
+        )
+        .limit(1)
     )
 
     if causality_record:
-        causality_record.causality_assessment_level_value = (
-            CausalityAssessmentLevelEnum(decoded_prediction)
-        )
-        causality_record.base_values = base_values
-        causality_record.shap_values_matrix = shap_values_matrix
-        causality_record.shap_values_sum_per_class = shap_values_sum_per_class
-        causality_record.shap_values_and_base_values_sum_per_class = (
-            shap_values_and_base_values_sum_per_class
-        )
-        causality_record.feature_names = feature_names
-        causality_record.feature_values = format_feature_values(feature_values)
-
-        db.commit()
-        db.refresh(causality_record)
+        for key, value in assessment.items():
+            setattr(causality_record, key, value)
     else:
-        new_causality = CausalityAssessmentLevelModel(
+        causality_record = CausalityAssessmentLevelModel(
             adr_id=adr_model.id,
-            causality_assessment_level_value=CausalityAssessmentLevelEnum(
-                decoded_prediction
-            ),
-            base_values=base_values,
-            shap_values_matrix=shap_values_matrix,
-            shap_values_sum_per_class=shap_values_sum_per_class,
-            shap_values_and_base_values_sum_per_class=shap_values_and_base_values_sum_per_class,
-            feature_names=feature_names,
-            feature_values=format_feature_values(feature_values),
+            **assessment,
         )
-        db.add(new_causality)
-        db.commit()
-        db.refresh(new_causality)
+        db.add(causality_record)
 
-    # Step 8: Return updated record with causality details
-    content = db.query(ADRModel).filter(ADRModel.id == adr_model.id).first()
+    await db.flush()
+    await db.run_sync(save_drivers, [(causality_record.id, assessment)])
+    await db.commit()
+    await db.refresh(causality_record)
+
+    if assessment["explanation_status"] is ExplanationStatusEnum.pending:
+        explanation_worker.enqueue(causality_record.id)
 
+    shadow_score(updated_adr, adr_model.id, causality_record.id, assessment)
+
+    # Step 8: Return updated record with causality details
     return JSONResponse(
-        content=jsonable_encoder(content),
+        content=jsonable_encoder(adr_model),
         status_code=status.HTTP_200_OK,
     )
 
@@ -1142,12 +1443,16 @@ async def get_causality_assessment_level_by_id(
     causality_assessment_level_id: str = Path(
         ..., description="ID of Causality Assessment to read"
     ),
-    db: Session = Depends(get_db),
+    summary: bool = Query(False, description=SUMMARY_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    causality_assessment_level = (
-        db.query(CausalityAssessmentLevelModel)
-        .filter(CausalityAssessmentLevelModel.id == causality_assessment_level_id)
-        .first()
+    causality_assessment_level = await db.scalar(
+        select(CausalityAssessmentLevelModel)
+        .options(
+            causality_assessment_level_options(summary),
+            selectinload(CausalityAssessmentLevelModel.reviews),
+        )
+        .where(CausalityAssessmentLevelModel.id == causality_assessment_level_id)
     )
 
     if not causality_assessment_level:
@@ -1156,13 +1461,23 @@ async def get_causality_assessment_level_by_id(
             detail="Causality Assessment Level record not found",
         )
 
+    # A reviewer is looking at it, so explain it before the rest of the queue
+    if causality_assessment_level.explanation_status is ExplanationStatusEnum.pending:
+        explanation_worker.prioritize(causality_assessment_level.id)
+
     approved_count = sum(1 for r in causality_assessment_level.reviews if r.approved)
     not_approved_count = sum(
         1 for r in causality_assessment_level.reviews if not r.approved
     )
 
+    schema = await feature_schemas.get_async(
+        db, causality_assessment_level.feature_schema_id
+    )
+
     content = {
-        **jsonable_encoder(causality_assessment_level),
+        **causality_assessment_level_content(
+            causality_assessment_level, schema, summary
+        ),
         "approved_count": approved_count,
         "not_approved_count": not_approved_count,
     }
@@ -1172,6 +1487,39 @@ async def get_causality_assessment_level_by_id(
     )
 
 
+@app.get(
+    "/api/v1/causality_assessment_level/{causality_assessment_level_id}/explanation_status",
+    status_code=status.HTTP_200_OK,
+)
+async def get_explanation_status(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    causality_assessment_level_id: str = Path(
+        ..., description="ID of Causality Assessment to check"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    explanation_status = await db.scalar(
+        select(CausalityAssessmentLevelModel.explanation_status).where(
+            CausalityAssessmentLevelModel.id == causality_assessment_level_id
+        )
+    )
+
+    if explanation_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Causality Assessment Level record not found",
+        )
+
+    # Someone is waiting on it, so explain it before the rest of the queue
+    if explanation_status is ExplanationStatusEnum.pending:
+        explanation_worker.prioritize(causality_assessment_level_id)
+
+    return {
+        "id": causality_assessment_level_id,
+        "explanation_status": explanation_status,
+    }
+
+
 @app.get(
     "/api/v1/specific_adr/{adr_id}/causality_assessment_level",
     status_code=status.HTTP_200_OK,
@@ -1179,12 +1527,22 @@ async def get_causality_assessment_level_by_id(
 async def get_causality_assessment_level_by_adr_id(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     adr_id: str = Path(..., description="ID of Causality Assessment to read"),
-    db: Session = Depends(get_db),
+    summary: bool = Query(False, description=SUMMARY_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    causality_assessment_level = (
-        db.query(CausalityAssessmentLevelModel)
-        .filter(CausalityAssessmentLevelModel.adr_id == adr_id)
-        .first()
+    # Re-scoring keeps older levels, the latest one is current
+    causality_assessment_level = await db.scalar(
+        select(CausalityAssessmentLevelModel)
+        .options(
+            causality_assessment_level_options(summary),
+            selectinload(CausalityAssessmentLevelModel.reviews),
+        )
+        .where(CausalityAssessmentLevelModel.adr_id == adr_id)
+        .order_by(
+            desc(CausalityAssessmentLevelModel.created_at),
+            desc(CausalityAssessmentLevelModel.id),
+        )
+        .limit(1)
     )
 
     if not causality_assessment_level:
@@ -1193,13 +1551,23 @@ async def get_causality_assessment_level_by_adr_id(
             detail="Causality Assessment Level record not found",
         )
 
+    # A reviewer is looking at it, so explain it before the rest of the queue
+    if causality_assessment_level.explanation_status is ExplanationStatusEnum.pending:
+        explanation_worker.prioritize(causality_assessment_level.id)
+
     approved_count = sum(1 for r in causality_assessment_level.reviews if r.approved)
     not_approved_count = sum(
         1 for r in causality_assessment_level.reviews if not r.approved
     )
 
+    schema = await feature_schemas.get_async(
+        db, causality_assessment_level.feature_schema_id
+    )
+
     content = {
-        **jsonable_encoder(causality_assessment_level),
+        **causality_assessment_level_content(
+            causality_assessment_level, schema, summary
+        ),
         "approved_count": approved_count,
         "not_approved_count": not_approved_count,
     }
@@ -1216,6 +1584,7 @@ async def get_causality_assessment_level_by_adr_id(
 )
 def get_causality_assessment_levels_for_adr(
     adr_id: str = Path(..., description="ID of ADR to read"),
+    summary: bool = Query(False, description=SUMMARY_DESCRIPTION),
     db: Session = Depends(get_db),
 ):
     adr = db.query(ADRModel).filter(ADRModel.id == adr_id).first()
@@ -1227,11 +1596,23 @@ def get_causality_assessment_levels_for_adr(
 
     content = (
         db.query(CausalityAssessmentLevelModel)
+        .options(causality_assessment_level_options(summary))
         .filter(CausalityAssessmentLevelModel.adr_id == adr_id)
-        .order_by(desc(CausalityAssessmentLevelModel.created_at))
+        .order_by(
+            desc(CausalityAssessmentLevelModel.created_at),
+            desc(CausalityAssessmentLevelModel.id),
+        )
     )
 
-    return paginate(content)
+    return paginate(
+        content,
+        transformer=lambda items: [
+            causality_assessment_level_content(
+                item, feature_schemas.get(item.feature_schema_id), summary
+            )
+            for item in items
+        ],
+    )
 
 
 @app.put(
@@ -1271,39 +1652,118 @@ def delete_causality_assessment_level_by_id(
     causality_assessment_level_id: str = Path(..., description="ID of CAL to delete"),
     db: Session = Depends(get_db),
 ):
-    cal = (
-        db.query(CausalityAssessmentLevelModel)
-        .filter(CausalityAssessmentLevelModel.id == causality_assessment_level_id)
-        .first()
+    cal = (
+        db.query(CausalityAssessmentLevelModel)
+        .filter(CausalityAssessmentLevelModel.id == causality_assessment_level_id)
+        .first()
+    )
+
+    if not cal:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="CAL record not found"
+        )
+
+    db.delete(cal)
+    db.commit()
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.get(
+    "/api/v1/feature_schema/{feature_schema_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=FeatureSchemaGetResponse,
+)
+def get_feature_schema(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    feature_schema_id: str = Path(..., description="ID of the feature schema"),
+):
+    schema = feature_schemas.get(feature_schema_id)
+
+    if schema is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Feature schema not found"
+        )
+
+    return schema
+
+
+@app.get(
+    "/api/v1/explanation_driver",
+    response_model=Page[ExplanationDriverGetResponse],
+    status_code=status.HTTP_200_OK,
+)
+def get_explanation_drivers(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    feature_name: str = Query(..., description="Feature driving the level"),
+    class_value: CausalityAssessmentLevelEnum = Query(
+        ..., description="Class the feature drives"
+    ),
+    positive: bool | None = Query(
+        None,
+        description="Only drivers pushing towards (true) or away from (false) the class",
+    ),
+    max_rank: int | None = Query(
+        None, ge=1, description="Only drivers ranked this high or higher"
+    ),
+    ml_model_id: str | None = Query(None, description="Only levels of this model"),
+    db: Session = Depends(get_db),
+):
+    """
+    Causality assessment levels where a feature is among the strongest
+    explanation drivers of a class, strongest first.
+    """
+    shap_value = ExplanationDriverModel.shap_value
+
+    content = (
+        db.query(
+            ExplanationDriverModel.causality_assessment_level_id,
+            CausalityAssessmentLevelModel.adr_id,
+            CausalityAssessmentLevelModel.ml_model_id,
+            CausalityAssessmentLevelModel.causality_assessment_level_value,
+            ExplanationDriverModel.class_value,
+            ExplanationDriverModel.rank,
+            ExplanationDriverModel.feature_name,
+            shap_value,
+        )
+        .join(ExplanationDriverModel.causality_assessment_level)
+        .filter(
+            ExplanationDriverModel.feature_name == feature_name,
+            ExplanationDriverModel.class_value == class_value,
+        )
     )
 
-    if not cal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="CAL record not found"
+    if positive is not None:
+        content = content.filter(shap_value > 0 if positive else shap_value < 0)
+    if max_rank is not None:
+        content = content.filter(ExplanationDriverModel.rank <= max_rank)
+    if ml_model_id is not None:
+        content = content.filter(
+            CausalityAssessmentLevelModel.ml_model_id == ml_model_id
         )
 
-    db.delete(cal)
-    db.commit()
+    # Strongest negative drivers first when asking for those
+    content = content.order_by(
+        shap_value if positive is False else desc(shap_value),
+        ExplanationDriverModel.id,
+    )
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return paginate(content, transformer=lambda rows: [row._asdict() for row in rows])
 
 
 @app.get(
     "/api/v1/review",
-    response_model=Page[ReviewGetResponse],
+    response_model=KeysetPage[ReviewGetResponse],
     status_code=status.HTTP_200_OK,
 )
 async def get_reviews(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     query: str = Query("", description="Search query(optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if query:
-        content = db.query(ReviewModel).order_by(desc(ReviewModel.created_at))
-    else:
-        content = db.query(ReviewModel).order_by(desc(ReviewModel.created_at))
+    content = after_cursor(select(ReviewModel), ReviewModel.created_at, ReviewModel.id)
 
-    return paginate(content)
+    return await apaginate(db, content)
 
 
 @app.get(
@@ -1314,9 +1774,9 @@ async def get_reviews(
 async def get_reviews_by_id(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     review_id: str = Path(..., description="Review ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    review = db.query(ReviewModel).filter(ReviewModel.id == review_id).first()
+    review = await db.get(ReviewModel, review_id)
 
     if not review:
         return HTTPException(
@@ -1336,19 +1796,16 @@ async def get_review_for_specific_user_and_causality_assessment_level(
     causality_assessment_level_id: str = Query(
         ..., description="ID of Causality Assessment to read"
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_user = (
-        db.query(UserModel).filter(UserModel.username == current_user.username).first()
-    )
-
-    review = (
-        db.query(ReviewModel)
-        .filter(
+    review = await db.scalar(
+        select(ReviewModel)
+        .join(ReviewModel.user)
+        .where(
             ReviewModel.causality_assessment_level_id == causality_assessment_level_id,
-            ReviewModel.user_id == db_user.id,
+            UserModel.username == current_user.username,
         )
-        .first()
+        .limit(1)
     )
 
     if not review:
@@ -1367,12 +1824,12 @@ async def get_reviews_for_causality_assessment_level(
     causality_assessment_level_id: str = Path(
         ..., description="ID of Causality Assessment to read"
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    causality_assessment_level = (
-        db.query(CausalityAssessmentLevelModel)
-        .filter(CausalityAssessmentLevelModel.id == causality_assessment_level_id)
-        .first()
+    causality_assessment_level = await db.scalar(
+        select(CausalityAssessmentLevelModel.id).where(
+            CausalityAssessmentLevelModel.id == causality_assessment_level_id
+        )
     )
 
     if not causality_assessment_level:
@@ -1382,7 +1839,7 @@ async def get_reviews_for_causality_assessment_level(
         )
 
     content = (
-        db.query(ReviewModel)
+        select(ReviewModel)
         .options(
             joinedload(ReviewModel.user).load_only(
                 UserModel.id,
@@ -1391,13 +1848,13 @@ async def get_reviews_for_causality_assessment_level(
                 UserModel.last_name,
             )
         )
-        .filter(
+        .where(
             ReviewModel.causality_assessment_level_id == causality_assessment_level_id
         )
         .order_by(desc(ReviewModel.created_at))
     )
 
-    return paginate(content)
+    return await apaginate(db, content)
 
 
 @app.post(
@@ -1410,12 +1867,12 @@ async def post_review(
     causality_assessment_level_id: str = Path(
         ..., description="ID of Causality Assessment to read"
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    causality_assessment_level = (
-        db.query(CausalityAssessmentLevelModel)
-        .filter(CausalityAssessmentLevelModel.id == causality_assessment_level_id)
-        .first()
+    causality_assessment_level = await db.scalar(
+        select(CausalityAssessmentLevelModel.id).where(
+            CausalityAssessmentLevelModel.id == causality_assessment_level_id
+        )
     )
 
     if not causality_assessment_level:
@@ -1423,19 +1880,26 @@ async def post_review(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Causality Level not found"
         )
 
-    db_user = (
-        db.query(UserModel).filter(UserModel.username == current_user.username).first()
+    user_id = await db.scalar(
+        select(UserModel.id).where(UserModel.username == current_user.username)
     )
 
     review_model = ReviewModel(
         **review.model_dump(),
-        user_id=db_user.id,
+        user_id=user_id,
         causality_assessment_level_id=causality_assessment_level_id,
     )
 
     db.add(review_model)
-    db.commit()
-    db.refresh(review_model)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A reviewer reviews a level once, see migrations.py
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Review already exists"
+        )
+    await db.refresh(review_model)
     # content = ADRCreateResponse.model_validate(adr_model)
     return JSONResponse(
         content=jsonable_encoder(review_model),
@@ -1448,10 +1912,10 @@ async def update_review_by_id(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     review_update: ADRReviewCreateRequest,
     review_id: str = Path(..., description="ID of review to update"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Step 1: Get the existing review
-    review = db.query(ReviewModel).filter(ReviewModel.id == review_id).first()
+    review = await db.get(ReviewModel, review_id)
 
     if not review:
         raise HTTPException(
@@ -1463,8 +1927,8 @@ async def update_review_by_id(
     for key, value in review_update.model_dump().items():
         setattr(review, key, value)
 
-    db.commit()
-    db.refresh(review)
+    await db.commit()
+    await db.refresh(review)
 
     return JSONResponse(
         content=jsonable_encoder(review),
@@ -1648,24 +2112,7 @@ def causality_distribution(db: Session = Depends(get_db)):
 #  Approval Status
 @app.get("/api/v1/dashboard/approval-status")
 def approval_status(db: Session = Depends(get_db)):
-    sql = text("""
-        SELECT status, COUNT(*) as count FROM (
-            SELECT
-                cal.id AS cal_id,
-                SUM(CASE WHEN r.approved = 1 THEN 1 ELSE 0 END) AS approved_count,
-                SUM(CASE WHEN r.approved = 0 THEN 1 ELSE 0 END) AS unapproved_count,
-                CASE
-                    WHEN SUM(CASE WHEN r.approved = 1 THEN 1 ELSE 0 END) >
-                         SUM(CASE WHEN r.approved = 0 THEN 1 ELSE 0 END)
-                    THEN 'Approved'
-                    ELSE 'Unapproved'
-                END AS status
-            FROM causality_assessment_level cal
-            JOIN review r ON cal.id = r.causality_assessment_level_id
-            GROUP BY cal.id
-        ) AS sub
-        GROUP BY status
-    """)
+    sql = text(queries.APPROVAL_STATUS)
     result = db.execute(sql).fetchall()
     return {"series": [r[1] for r in result], "data": [r[0] for r in result]}
 
@@ -1697,12 +2144,7 @@ def top_reporting_institutions(db: Session = Depends(get_db)):
 #  ADRs Weekly (Raw SQL with structured output)
 @app.get("/api/v1/dashboard/adrs-weekly")
 def adrs_weekly(db: Session = Depends(get_db)):
-    sql = text("""
-        SELECT strftime('%Y-W%W', created_at) AS week_label, COUNT(*) AS count
-        FROM adr
-        GROUP BY week_label
-        ORDER BY week_label
-    """)
+    sql = text(queries.ADRS_WEEKLY)
     result = db.execute(sql).fetchall()
     return {"series": [r[1] for r in result], "data": [r[0] for r in result]}
 
@@ -1710,15 +2152,7 @@ def adrs_weekly(db: Session = Depends(get_db)):
 #  ADRs Monthly (Raw SQL with structured output)
 @app.get("/api/v1/dashboard/adrs-monthly")
 def adrs_monthly(db: Session = Depends(get_db)):
-    sql = text("""
-        SELECT
-            strftime('%Y', created_at) AS year,
-            strftime('%m', created_at) AS month,
-            COUNT(*) AS count
-        FROM adr
-        GROUP BY year, month
-        ORDER BY year, month
-    """)
+    sql = text(queries.ADRS_MONTHLY)
     result = db.execute(sql).fetchall()
 
     data_by_year = defaultdict(lambda: {"series": [], "data": []})
@@ -1777,27 +2211,13 @@ def sms_type_distribution(db: Session = Depends(get_db)):
 #  SMS Count Over Time
 @app.get("/api/v1/dashboard/sms-weekly")
 def sms_weekly(db: Session = Depends(get_db)):
-    sql = text("""
-        SELECT strftime('%Y-W%W', created_at) AS week_label, COUNT(*) AS count
-        FROM sms_message
-        GROUP BY week_label
-        ORDER BY week_label
-    """)
+    sql = text(queries.SMS_WEEKLY)
     result = db.execute(sql).fetchall()
     return {"series": [r[1] for r in result], "data": [r[0] for r in result]}
 
 
 def get_sms_monthly_by_type(db: Session, sms_type: str):
-    sql = text("""
-        SELECT
-            strftime('%Y', created_at) AS year,
-            strftime('%m', created_at) AS month,
-            COUNT(*) AS count
-        FROM sms_message
-        WHERE sms_type = :sms_type
-        GROUP BY year, month
-        ORDER BY year, month
-    """)
+    sql = text(queries.SMS_MONTHLY_BY_TYPE)
     result = db.execute(sql, {"sms_type": sms_type}).fetchall()
 
     data_by_year = defaultdict(lambda: {"series": [], "data": []})
@@ -1831,41 +2251,34 @@ def sms_monthly_additional_info(db: Session = Depends(get_db)):
 #  SMS Monthly (Raw SQL with structured output)
 @app.get("/api/v1/dashboard/sms-monthly")
 def sms_monthly(db: Session = Depends(get_db)):
-    sql = text("""
-        SELECT strftime('%Y-%m', created_at) AS month_label, COUNT(*) AS count
-        FROM sms_message
-        GROUP BY month_label
-        ORDER BY month_label
-    """)
+    sql = text(queries.SMS_MONTHLY)
     result = db.execute(sql).fetchall()
     return {"series": [r[1] for r in result], "data": [r[0] for r in result]}
 
 
 @app.get(
     "/api/v1/medical_institution",
-    response_model=Page[MedicalInstitutionGetResponse],
+    response_model=KeysetPage[MedicalInstitutionGetResponse],
 )
 async def get_medical_institution(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     query: str = Query("", description="Search query(optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    # Searches are answered from the typeahead index, best match first
     if query:
-        content = (
-            db.query(MedicalInstitutionModel)
-            .filter(
-                MedicalInstitutionModel.name.ilike(f"%{query}%")
-                | MedicalInstitutionModel.county.ilike(f"%{query}%")
-                | MedicalInstitutionModel.sub_county.ilike(f"%{query}%")
-            )
-            .order_by(desc(MedicalInstitutionModel.created_at))
-        )
-    else:
-        content = db.query(MedicalInstitutionModel).order_by(
-            desc(MedicalInstitutionModel.created_at)
+        ensure_no_cursor()
+        return paginate_sequence(
+            institution_typeahead.search(query), additional_data={"next_cursor": None}
         )
 
-    return paginate(content)
+    content = after_cursor(
+        select(MedicalInstitutionModel),
+        MedicalInstitutionModel.created_at,
+        MedicalInstitutionModel.id,
+    )
+
+    return await apaginate(db, content)
 
 
 @app.get("/api/v1/medical_institution/{institution_id}", status_code=status.HTTP_200_OK)
@@ -1873,13 +2286,9 @@ async def get_medical_institution_by_id(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     institution_id: str = Path(..., description="ID of Medical Institution to delete"),
     query: str = Query("", description="Search query(optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_institution = (
-        db.query(MedicalInstitutionModel)
-        .filter(MedicalInstitutionModel.id == institution_id)
-        .first()
-    )
+    db_institution = await db.get(MedicalInstitutionModel, institution_id)
 
     if not db_institution:
         raise HTTPException(
@@ -1896,13 +2305,14 @@ async def get_medical_institution_by_id(
 async def post_medical_institution(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     institution: MedicalInstitutionPostRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     new_institution = MedicalInstitutionModel(**institution.model_dump())
 
     db.add(new_institution)
-    db.commit()
-    db.refresh(new_institution)
+    await db.commit()
+    await db.refresh(new_institution)
+    institution_typeahead.add(new_institution)
 
     return JSONResponse(
         content=jsonable_encoder(new_institution),
@@ -1915,13 +2325,9 @@ async def update_medical_institution(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     institution: MedicalInstitutionGetResponse,
     institution_id: str = Path(..., description="ID of Medical Institution to update"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_institution = (
-        db.query(MedicalInstitutionModel)
-        .filter(MedicalInstitutionModel.id == institution_id)
-        .first()
-    )
+    db_institution = await db.get(MedicalInstitutionModel, institution_id)
 
     if not db_institution:
         raise HTTPException(
@@ -1932,8 +2338,9 @@ async def update_medical_institution(
     for key, value in institution.model_dump().items():
         setattr(db_institution, key, value)
 
-    db.commit()
-    db.refresh(db_institution)
+    await db.commit()
+    await db.refresh(db_institution)
+    institution_typeahead.add(db_institution)
 
     return JSONResponse(
         content=jsonable_encoder(db_institution),
@@ -1948,13 +2355,9 @@ async def update_medical_institution(
 async def delete_medical_institution(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     institution_id: str = Path(..., description="ID of Medical Institution to delete"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_institution = (
-        db.query(MedicalInstitutionModel)
-        .filter(MedicalInstitutionModel.id == institution_id)
-        .first()
-    )
+    db_institution = await db.get(MedicalInstitutionModel, institution_id)
 
     if not db_institution:
         raise HTTPException(
@@ -1962,8 +2365,9 @@ async def delete_medical_institution(
             detail="Medical Institution not found",
         )
 
-    db.delete(db_institution)
-    db.commit()
+    await db.delete(db_institution)
+    await db.commit()
+    institution_typeahead.remove(institution_id)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -1975,13 +2379,13 @@ async def delete_medical_institution(
 async def get_telephones_for_medical_institution(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     institution_id: str = Path(..., description="ID of the Medical Institution"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Check if the medical institution exists first (optional but good)
-    institution = (
-        db.query(MedicalInstitutionModel)
-        .filter(MedicalInstitutionModel.id == institution_id)
-        .first()
+    institution = await db.scalar(
+        select(MedicalInstitutionModel.id).where(
+            MedicalInstitutionModel.id == institution_id
+        )
     )
 
     if not institution:
@@ -1991,11 +2395,11 @@ async def get_telephones_for_medical_institution(
         )
 
     # Query all telephone numbers for the given institution
-    telephones = db.query(MedicalInstitutionTelephoneModel).filter(
+    telephones = select(MedicalInstitutionTelephoneModel).where(
         MedicalInstitutionTelephoneModel.medical_institution_id == institution_id
     )
 
-    return paginate(telephones)
+    return await apaginate(db, telephones)
 
 
 @app.get(
@@ -2004,19 +2408,19 @@ async def get_telephones_for_medical_institution(
 )
 async def get_medical_institution_telephones(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    content = db.query(MedicalInstitutionTelephoneModel).order_by(
+    content = select(MedicalInstitutionTelephoneModel).order_by(
         desc(MedicalInstitutionTelephoneModel.created_at)
     )
-    return paginate(content)
+    return await apaginate(db, content)
 
 
 @app.post("/api/v1/medical_institution_telephone", status_code=status.HTTP_201_CREATED)
 async def create_medical_institution_telephone(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     data: MultipleMedicalInstitutionTelephonePostRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Create a list of MedicalInstitutionTelephoneModel instances
     new_telephones = [
@@ -2028,10 +2432,10 @@ async def create_medical_institution_telephone(
     ]
 
     db.add_all(new_telephones)  # Add all telephones to the session
-    db.commit()  # Commit the changes
+    await db.commit()  # Commit the changes
 
     for telephone in new_telephones:
-        db.refresh(telephone)
+        await db.refresh(telephone)
 
     return JSONResponse(
         content=jsonable_encoder(new_telephones),
@@ -2047,13 +2451,9 @@ async def update_medical_institution_telephone(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     telephone_update: MedicalInstitutionTelephonePostRequest,
     telephone_id: str = Path(..., description="ID of Telephone record to update"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_telephone = (
-        db.query(MedicalInstitutionTelephoneModel)
-        .filter(MedicalInstitutionTelephoneModel.id == telephone_id)
-        .first()
-    )
+    db_telephone = await db.get(MedicalInstitutionTelephoneModel, telephone_id)
 
     if not db_telephone:
         raise HTTPException(
@@ -2064,8 +2464,8 @@ async def update_medical_institution_telephone(
     for key, value in telephone_update.model_dump().items():
         setattr(db_telephone, key, value)
 
-    db.commit()
-    db.refresh(db_telephone)
+    await db.commit()
+    await db.refresh(db_telephone)
 
     return JSONResponse(
         content=jsonable_encoder(db_telephone),
@@ -2080,13 +2480,9 @@ async def update_medical_institution_telephone(
 async def delete_medical_institution_telephone(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     telephone_id: str = Path(..., description="ID of Telephone record to delete"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_telephone = (
-        db.query(MedicalInstitutionTelephoneModel)
-        .filter(MedicalInstitutionTelephoneModel.id == telephone_id)
-        .first()
-    )
+    db_telephone = await db.get(MedicalInstitutionTelephoneModel, telephone_id)
 
     if not db_telephone:
         raise HTTPException(
@@ -2094,43 +2490,41 @@ async def delete_medical_institution_telephone(
             detail="Telephone record not found",
         )
 
-    db.delete(db_telephone)
-    db.commit()
+    await db.delete(db_telephone)
+    await db.commit()
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @app.get(
     "/api/v1/sms_message",
-    response_model=Page[SMSMessageGetResponse],
+    response_model=KeysetPage[SMSMessageGetResponse],
 )
 async def get_sms_messages(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     sms_type: SMSMessageTypeEnum | None = Query(None, description="Filter by SMS type"),
     adr_id: str | None = Query(None, description="Filter by ADR ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    content = select(SMSMessageModel)
+
     if sms_type:
-        content = db.query(SMSMessageModel).filter(SMSMessageModel.sms_type == sms_type)
+        content = content.where(SMSMessageModel.sms_type == sms_type)
     elif adr_id:
-        content = db.query(SMSMessageModel).filter(SMSMessageModel.adr_id == adr_id)
-    else:
-        content = db.query(SMSMessageModel)
+        content = content.where(SMSMessageModel.adr_id == adr_id)
 
-    content = content.order_by(desc(SMSMessageModel.created_at))
+    content = after_cursor(content, SMSMessageModel.created_at, SMSMessageModel.id)
 
-    return paginate(content)
+    return await apaginate(db, content)
 
 
 @app.get("/api/v1/sms_message/{sms_message_id}", status_code=status.HTTP_200_OK)
 async def get_sms_message_by_id(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     sms_message_id: str = Path(..., description="ID of Medical Institution to delete"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_sms_message = (
-        db.query(SMSMessageModel).filter(SMSMessageModel.id == sms_message_id).first()
-    )
+    db_sms_message = await db.get(SMSMessageModel, sms_message_id)
 
     if not db_sms_message:
         raise HTTPException(
@@ -2143,95 +2537,101 @@ async def get_sms_message_by_id(
     )
 
 
-@app.get("/api/v1/sms_message_count", response_model=Page[dict])
+@app.get("/api/v1/sms_message_count", response_model=KeysetPage[dict])
 async def get_sms_message_with_adr_and_counts(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
     sms_type: SMSMessageTypeEnum | None = Query(None, description="Filter by SMS type"),
     db: Session = Depends(get_db),
 ):
-    # Calculate offset and limit based on page and size
-    offset = (page - 1) * size
+    # Calculate offset and limit based on page and size, or start after the cursor
+    offset = 0 if cursor else (page - 1) * size
     limit = size
 
-    # Query to count rows grouped by adr_id, sms_type, and include medical institution name
-    if sms_type:
-        query = (
-            db.query(
-                SMSMessageModel.adr_id,
-                SMSMessageModel.sms_type,
-                MedicalInstitutionModel.mfl_code.label("medical_institution_mfl_code"),
-                MedicalInstitutionModel.name.label("medical_institution_name"),
-                ADRModel.patient_name.label("patient_name"),
-                func.count().label("sms_count"),
-            )
-            .filter(SMSMessageModel.sms_type == sms_type)
-            .join(
-                ADRModel,
-                ADRModel.id == SMSMessageModel.adr_id,
-            )
-            .join(
-                MedicalInstitutionModel,
-                MedicalInstitutionModel.id == ADRModel.medical_institution_id,
-            )
-            .group_by(
-                SMSMessageModel.adr_id,
-                SMSMessageModel.sms_type,
-                MedicalInstitutionModel.name,
-                MedicalInstitutionModel.mfl_code,
-                ADRModel.patient_name,
-            )
-            .offset(offset)
-            .limit(limit)
+    # Query to count rows grouped by adr_id, sms_type, and include medical
+    # institution name, newest ADR first
+    query = (
+        db.query(
+            SMSMessageModel.adr_id,
+            SMSMessageModel.sms_type,
+            MedicalInstitutionModel.mfl_code.label("medical_institution_mfl_code"),
+            MedicalInstitutionModel.name.label("medical_institution_name"),
+            ADRModel.patient_name.label("patient_name"),
+            ADRModel.created_at.label("created_at"),
+            func.count().label("sms_count"),
         )
-    else:
-        query = (
-            db.query(
-                SMSMessageModel.adr_id,
-                SMSMessageModel.sms_type,
-                MedicalInstitutionModel.mfl_code.label("medical_institution_mfl_code"),
-                MedicalInstitutionModel.name.label("medical_institution_name"),
-                ADRModel.patient_name.label("patient_name"),
-                func.count().label("sms_count"),
-            )
-            .join(
-                ADRModel,
-                ADRModel.id == SMSMessageModel.adr_id,
-            )
-            .join(
-                MedicalInstitutionModel,
-                MedicalInstitutionModel.id == ADRModel.medical_institution_id,
-            )
-            .group_by(
-                SMSMessageModel.adr_id,
-                SMSMessageModel.sms_type,
-                MedicalInstitutionModel.name,
-                MedicalInstitutionModel.mfl_code,
-                ADRModel.patient_name,
-            )
-            .offset(offset)
-            .limit(limit)
+        .join(
+            ADRModel,
+            ADRModel.id == SMSMessageModel.adr_id,
+        )
+        .join(
+            MedicalInstitutionModel,
+            MedicalInstitutionModel.id == ADRModel.medical_institution_id,
+        )
+        .group_by(
+            ADRModel.created_at,
+            SMSMessageModel.adr_id,
+            SMSMessageModel.sms_type,
+            MedicalInstitutionModel.name,
+            MedicalInstitutionModel.mfl_code,
+            ADRModel.patient_name,
+        )
+        .order_by(
+            desc(ADRModel.created_at),
+            desc(SMSMessageModel.adr_id),
+            desc(SMSMessageModel.sms_type),
         )
+    )
 
-    # Query to get the total count of records
     if sms_type:
-        total_query = (
-            db.query(func.count().label("total"))
-            .select_from(SMSMessageModel)
-            .filter(SMSMessageModel.sms_type == sms_type)
-            .join(
-                ADRModel,
-                ADRModel.id == SMSMessageModel.adr_id,
+        query = query.filter(SMSMessageModel.sms_type == sms_type)
+
+    if offset == 0:
+        # Count only the messages of the ADRs the page can hold, read from the
+        # created_at index: the ADR of the cursor and the next size with
+        # messages, each adding a row at least
+        adrs = db.query(ADRModel.id).filter(
+            db.query(SMSMessageModel.id)
+            .filter(
+                SMSMessageModel.adr_id == ADRModel.id,
+                SMSMessageModel.sms_type == sms_type if sms_type else true(),
             )
-            .join(
-                MedicalInstitutionModel,
-                MedicalInstitutionModel.id == ADRModel.medical_institution_id,
+            .exists()
+        )
+
+        if cursor:
+            created_at, adr_id, last_sms_type = decode_cursor(cursor, 3)
+            adrs = adrs.filter(
+                older_than(
+                    [ADRModel.created_at, ADRModel.id],
+                    [created_at, adr_id],
+                    or_equal=True,
+                )
             )
+            query = query.filter(
+                older_than(
+                    [
+                        ADRModel.created_at,
+                        SMSMessageModel.adr_id,
+                        SMSMessageModel.sms_type,
+                    ],
+                    [created_at, adr_id, last_sms_type],
+                )
+            )
+
+        adrs = adrs.order_by(desc(ADRModel.created_at), desc(ADRModel.id))
+        query = query.filter(
+            SMSMessageModel.adr_id.in_(adrs.limit(size + 1).scalar_subquery())
         )
-    else:
+
+    query = query.offset(offset).limit(limit)
+
+    # Query to get the total count of rows, left out of pages after a cursor
+    total_result = pages = None
+    if cursor is None:
         total_query = (
-            db.query(func.count().label("total"))
-            .select_from(SMSMessageModel)
+            db.query(SMSMessageModel.adr_id, SMSMessageModel.sms_type)
             .join(
                 ADRModel,
                 ADRModel.id == SMSMessageModel.adr_id,
@@ -2240,14 +2640,16 @@ async def get_sms_message_with_adr_and_counts(
                 MedicalInstitutionModel,
                 MedicalInstitutionModel.id == ADRModel.medical_institution_id,
             )
+            .distinct()
         )
-    # Get total count
-    total_result = (
-        total_query.scalar()
-    )  # Executes the query and gets the scalar value (total count)
 
-    # Calculate the total number of pages
-    pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
+        if sms_type:
+            total_query = total_query.filter(SMSMessageModel.sms_type == sms_type)
+
+        total_result = total_query.count()
+
+        # Calculate the total number of pages
+        pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
 
     # Execute the query and get the results
     result = query.all()
@@ -2270,59 +2672,41 @@ async def get_sms_message_with_adr_and_counts(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(result, size, ["created_at", "adr_id", "sms_type"]),
     }
 
 
-@app.get("/api/v1/adrs_with_individual_alerts", response_model=Page[dict])
+@app.get("/api/v1/adrs_with_individual_alerts", response_model=KeysetPage[dict])
 async def get_adrs_with_individual_alerts(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
     query: str = Query("", description="Search query (optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Calculate offset and limit based on page and size
-    offset = (page - 1) * size
+    # Calculate offset and limit based on page and size, or start after the cursor
+    offset = 0 if cursor else (page - 1) * size
     limit = size
 
-    search_term = f"%{query}%" if query else None
-
-    result_sql = text("""
-    SELECT
-        adr.id AS adr_id,
-        adr.patient_name AS patient_name,
-        mi.name AS medical_institution_name,
-        mi.mfl_code AS medical_institution_mfl_code,
-        adr.created_at AS created_at,
-        GROUP_CONCAT(DISTINCT mit.telephone) AS telephones,
-        COUNT(DISTINCT sms.id) AS sms_count,
-        COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) AS approved_reviews,
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END) AS unapproved_reviews
-        
-    FROM adr
-    JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-    JOIN medical_institution mi ON adr.medical_institution_id = mi.id
-    LEFT JOIN medical_institution_telephone mit ON mi.id = mit.medical_institution_id
-    LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-    LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-    WHERE cal.causality_assessment_level_value = :level_value
-        AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-    GROUP BY adr.id, adr.patient_name, mi.name, mi.mfl_code, adr.created_at
-    HAVING COUNT(DISTINCT sms.id) != 0
-        AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ORDER BY adr.created_at DESC
-    LIMIT :limit OFFSET :offset
-    """)
+    search_term = match_expression(query, ["patient_name"])
+
+    result_sql = text(
+        queries.alert_adrs(
+            CausalityAssessmentLevelEnum.certain,
+            sent=True,
+            search=search_term is not None,
+        )
+    )
 
     result_params = {
-        "level_value": "certain",
         "limit": limit,
         "offset": offset,
         "query": search_term,
+        **cursor_params(cursor),
     }
 
-    result = db.execute(result_sql, result_params)
+    result = await db.execute(result_sql, result_params)
 
     rows = result.fetchall()
 
@@ -2339,28 +2723,17 @@ async def get_adrs_with_individual_alerts(
         for row in rows
     ]
 
-    total_sql = text("""
-    SELECT COUNT(*) FROM (
-        SELECT
-            adr.id,
-            COUNT(DISTINCT sms.id) AS sms_count
-        FROM adr
-        JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-        LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-        LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-        WHERE cal.causality_assessment_level_value = :level_value
-            AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-        GROUP BY adr.id
-        HAVING COUNT(DISTINCT sms.id) != 0
-            AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-            COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ) AS sub
-    """)
-
-    total_result_params = {"level_value": "certain", "query": search_term}
-    total_result = db.execute(total_sql, total_result_params).scalar()
-    # Calculate the total number of pages
-    pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
+    # Pages after a cursor leave out the total, see pagination.py
+    total_result = pages = None
+    if cursor is None:
+        total_sql = text(
+            queries.alert_adrs_total(CausalityAssessmentLevelEnum.certain, sent=True)
+        )
+
+        total_result_params = {"query": search_term}
+        total_result = (await db.execute(total_sql, total_result_params)).scalar()
+        # Calculate the total number of pages
+        pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
 
     return {
         "items": items,
@@ -2368,58 +2741,41 @@ async def get_adrs_with_individual_alerts(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(rows, size, ["created_at", "adr_id"]),
     }
 
 
-@app.get("/api/v1/adrs_to_be_sent_individual_alerts", response_model=Page[dict])
+@app.get("/api/v1/adrs_to_be_sent_individual_alerts", response_model=KeysetPage[dict])
 async def get_adrs_to_be_sent_for_individual_alerts(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
     query: str = Query("", description="Search query (optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Calculate offset and limit based on page and size
-    offset = (page - 1) * size
+    # Calculate offset and limit based on page and size, or start after the cursor
+    offset = 0 if cursor else (page - 1) * size
     limit = size
 
-    search_term = f"%{query}%" if query else None
-
-    result_sql = text("""
-    SELECT
-        adr.id AS adr_id,
-        adr.patient_name AS patient_name,
-        mi.name AS medical_institution_name,
-        mi.mfl_code AS medical_institution_mfl_code,
-        adr.created_at AS created_at,
-        GROUP_CONCAT(DISTINCT mit.telephone) AS telephones,
-        COUNT(DISTINCT sms.id) AS sms_count,
-        COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) AS approved_reviews,
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END) AS unapproved_reviews
-    FROM adr
-    JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-    JOIN medical_institution mi ON adr.medical_institution_id = mi.id
-    LEFT JOIN medical_institution_telephone mit ON mi.id = mit.medical_institution_id
-    LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-    LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-    WHERE cal.causality_assessment_level_value = :level_value
-        AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-    GROUP BY adr.id, adr.patient_name, mi.name, mi.mfl_code, adr.created_at
-    HAVING COUNT(DISTINCT sms.id) = 0
-        AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ORDER BY adr.created_at DESC
-    LIMIT :limit OFFSET :offset
-    """)
+    search_term = match_expression(query, ["patient_name"])
+
+    result_sql = text(
+        queries.alert_adrs(
+            CausalityAssessmentLevelEnum.certain,
+            sent=False,
+            search=search_term is not None,
+        )
+    )
 
     result_params = {
-        "level_value": "certain",
         "limit": limit,
         "offset": offset,
         "query": search_term,
+        **cursor_params(cursor),
     }
 
-    result = db.execute(result_sql, result_params)
+    result = await db.execute(result_sql, result_params)
 
     rows = result.fetchall()
 
@@ -2436,29 +2792,18 @@ async def get_adrs_to_be_sent_for_individual_alerts(
         for row in rows
     ]
 
-    total_sql = text("""
-    SELECT COUNT(*) FROM (
-        SELECT
-            adr.id,
-            COUNT(DISTINCT sms.id) AS sms_count
-        FROM adr
-        JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-        LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-        LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-        WHERE cal.causality_assessment_level_value = :level_value
-            AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-        GROUP BY adr.id
-        HAVING COUNT(DISTINCT sms.id) = 0
-            AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-            COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ) AS sub
-    """)
-
-    total_result_params = {"level_value": "certain", "query": search_term}
-
-    total_result = db.execute(total_sql, total_result_params).scalar()
-    # Calculate the total number of pages
-    pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
+    # Pages after a cursor leave out the total, see pagination.py
+    total_result = pages = None
+    if cursor is None:
+        total_sql = text(
+            queries.alert_adrs_total(CausalityAssessmentLevelEnum.certain, sent=False)
+        )
+
+        total_result_params = {"query": search_term}
+
+        total_result = (await db.execute(total_sql, total_result_params)).scalar()
+        # Calculate the total number of pages
+        pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
 
     return {
         "items": items,
@@ -2466,59 +2811,41 @@ async def get_adrs_to_be_sent_for_individual_alerts(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(rows, size, ["created_at", "adr_id"]),
     }
 
 
-@app.get("/api/v1/adrs_with_additional_info_requests", response_model=Page[dict])
+@app.get("/api/v1/adrs_with_additional_info_requests", response_model=KeysetPage[dict])
 async def get_adrs_with_additional_info_requests(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
     query: str = Query("", description="Search query (optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Calculate offset and limit based on page and size
-    offset = (page - 1) * size
+    # Calculate offset and limit based on page and size, or start after the cursor
+    offset = 0 if cursor else (page - 1) * size
     limit = size
 
-    search_term = f"%{query}%" if query else None
-
-    result_sql = text("""
-    SELECT
-        adr.id AS adr_id,
-        adr.patient_name AS patient_name,
-        mi.name AS medical_institution_name,
-        mi.mfl_code AS medical_institution_mfl_code,
-        adr.created_at AS created_at,
-        GROUP_CONCAT(DISTINCT mit.telephone) AS telephones,
-        COUNT(DISTINCT sms.id) AS sms_count,
-        COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) AS approved_reviews,
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END) AS unapproved_reviews
-        
-    FROM adr
-    JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-    JOIN medical_institution mi ON adr.medical_institution_id = mi.id
-    LEFT JOIN medical_institution_telephone mit ON mi.id = mit.medical_institution_id
-    LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-    LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-    WHERE cal.causality_assessment_level_value = :level_value
-        AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-    GROUP BY adr.id, adr.patient_name, mi.name, mi.mfl_code, adr.created_at
-    HAVING COUNT(DISTINCT sms.id) != 0
-        AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ORDER BY adr.created_at DESC
-    LIMIT :limit OFFSET :offset
-    """)
+    search_term = match_expression(query, ["patient_name"])
+
+    result_sql = text(
+        queries.alert_adrs(
+            CausalityAssessmentLevelEnum.unclassified,
+            sent=True,
+            search=search_term is not None,
+        )
+    )
 
     result_params = {
-        "level_value": "unclassified",
         "limit": limit,
         "offset": offset,
         "query": search_term,
+        **cursor_params(cursor),
     }
 
-    result = db.execute(result_sql, result_params)
+    result = await db.execute(result_sql, result_params)
 
     rows = result.fetchall()
 
@@ -2535,29 +2862,20 @@ async def get_adrs_with_additional_info_requests(
         for row in rows
     ]
 
-    total_sql = text("""
-    SELECT COUNT(*) FROM (
-        SELECT
-            adr.id,
-            COUNT(DISTINCT sms.id) AS sms_count
-        FROM adr
-        JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-        LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-        LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-        WHERE cal.causality_assessment_level_value = :level_value
-            AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-        GROUP BY adr.id
-        HAVING COUNT(DISTINCT sms.id) != 0
-            AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-            COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ) AS sub
-    """)
-
-    total_result_params = {"level_value": "unclassifiable", "query": search_term}
-
-    total_result = db.execute(total_sql, total_result_params).scalar()
-    # Calculate the total number of pages
-    pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
+    # Pages after a cursor leave out the total, see pagination.py
+    total_result = pages = None
+    if cursor is None:
+        total_sql = text(
+            queries.alert_adrs_total(
+                CausalityAssessmentLevelEnum.unclassified, sent=True
+            )
+        )
+
+        total_result_params = {"query": search_term}
+
+        total_result = (await db.execute(total_sql, total_result_params)).scalar()
+        # Calculate the total number of pages
+        pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
 
     return {
         "items": items,
@@ -2565,58 +2883,44 @@ async def get_adrs_with_additional_info_requests(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(rows, size, ["created_at", "adr_id"]),
     }
 
 
-@app.get("/api/v1/adrs_to_be_sent_additional_info_requests", response_model=Page[dict])
+@app.get(
+    "/api/v1/adrs_to_be_sent_additional_info_requests",
+    response_model=KeysetPage[dict],
+)
 async def get_adrs_to_be_sent_for_additional_info_requests(
     current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
     query: str = Query("", description="Search query (optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Calculate offset and limit based on page and size
-    offset = (page - 1) * size
+    # Calculate offset and limit based on page and size, or start after the cursor
+    offset = 0 if cursor else (page - 1) * size
     limit = size
 
-    search_term = f"%{query}%" if query else None
-
-    result_sql = text("""
-    SELECT
-        adr.id AS adr_id,
-        adr.patient_name AS patient_name,
-        mi.name AS medical_institution_name,
-        mi.mfl_code AS medical_institution_mfl_code,
-        adr.created_at AS created_at,
-        GROUP_CONCAT(DISTINCT mit.telephone) AS telephones,
-        COUNT(DISTINCT sms.id) AS sms_count,
-        COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) AS approved_reviews,
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END) AS unapproved_reviews
-    FROM adr
-    JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-    JOIN medical_institution mi ON adr.medical_institution_id = mi.id
-    LEFT JOIN medical_institution_telephone mit ON mi.id = mit.medical_institution_id
-    LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-    LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-    WHERE cal.causality_assessment_level_value = :level_value
-        AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-    GROUP BY adr.id, adr.patient_name, mi.name, mi.mfl_code, adr.created_at
-    HAVING COUNT(DISTINCT sms.id) = 0
-        AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ORDER BY adr.created_at DESC
-    LIMIT :limit OFFSET :offset
-    """)
+    search_term = match_expression(query, ["patient_name"])
+
+    result_sql = text(
+        queries.alert_adrs(
+            CausalityAssessmentLevelEnum.unclassified,
+            sent=False,
+            search=search_term is not None,
+        )
+    )
 
     result_params = {
-        "level_value": "unclassified",
         "limit": limit,
         "offset": offset,
         "query": search_term,
+        **cursor_params(cursor),
     }
 
-    result = db.execute(result_sql, result_params)
+    result = await db.execute(result_sql, result_params)
 
     rows = result.fetchall()
 
@@ -2633,29 +2937,20 @@ async def get_adrs_to_be_sent_for_additional_info_requests(
         for row in rows
     ]
 
-    total_sql = text("""
-    SELECT COUNT(*) FROM (
-        SELECT
-            adr.id,
-            COUNT(DISTINCT sms.id) AS sms_count
-        FROM adr
-        JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-        LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-        LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-        WHERE cal.causality_assessment_level_value = :level_value
-            AND (:query IS NULL OR LOWER(adr.patient_name) LIKE LOWER(:query))
-        GROUP BY adr.id
-        HAVING COUNT(DISTINCT sms.id) = 0
-            AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-            COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ) AS sub
-    """)
-
-    total_result_params = {"level_value": "unclassified", "query": search_term}
-
-    total_result = db.execute(total_sql, total_result_params).scalar()
-    # Calculate the total number of pages
-    pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
+    # Pages after a cursor leave out the total, see pagination.py
+    total_result = pages = None
+    if cursor is None:
+        total_sql = text(
+            queries.alert_adrs_total(
+                CausalityAssessmentLevelEnum.unclassified, sent=False
+            )
+        )
+
+        total_result_params = {"query": search_term}
+
+        total_result = (await db.execute(total_sql, total_result_params)).scalar()
+        # Calculate the total number of pages
+        pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
 
     return {
         "items": items,
@@ -2663,6 +2958,7 @@ async def get_adrs_to_be_sent_for_additional_info_requests(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(rows, size, ["created_at", "adr_id"]),
     }
 
 
@@ -2691,46 +2987,33 @@ def update_causalities_to_unclassifiable(
     )
 
 
-@app.get("/api/v1/adrs_with_unclassifiable_causality", response_model=Page[dict])
+@app.get("/api/v1/adrs_with_unclassifiable_causality", response_model=KeysetPage[dict])
 async def get_adrs_with_unclassifiable_causality(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description=CURSOR_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Calculate offset and limit based on page and size
-    offset = (page - 1) * size
+    # Calculate offset and limit based on page and size, or start after the cursor
+    offset = 0 if cursor else (page - 1) * size
     limit = size
 
-    result_sql = text("""
-    SELECT
-        adr.id AS adr_id,
-        adr.patient_name AS patient_name,
-        mi.name AS medical_institution_name,
-        mi.mfl_code AS medical_institution_mfl_code,
-        adr.created_at AS created_at,
-        GROUP_CONCAT(DISTINCT mit.telephone) AS telephones,
-        COUNT(DISTINCT sms.id) AS sms_count,
-        COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) AS approved_reviews,
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END) AS unapproved_reviews
-        
-    FROM adr
-    JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-    JOIN medical_institution mi ON adr.medical_institution_id = mi.id
-    LEFT JOIN medical_institution_telephone mit ON mi.id = mit.medical_institution_id
-    LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-    LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-    WHERE cal.causality_assessment_level_value = :level_value
-    GROUP BY adr.id, adr.patient_name, mi.name, mi.mfl_code, adr.created_at
-    HAVING COUNT(DISTINCT sms.id) != 0
-        AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-        COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ORDER BY adr.created_at DESC
-    LIMIT :limit OFFSET :offset
-    """)
-
-    result_params = {"level_value": "unclassifiable", "limit": limit, "offset": offset}
-
-    result = db.execute(result_sql, result_params)
+    result_sql = text(
+        queries.alert_adrs(
+            CausalityAssessmentLevelEnum.unclassifiable,
+            sent=True,
+            search=False,
+        )
+    )
+
+    result_params = {
+        "limit": limit,
+        "offset": offset,
+        "query": None,
+        **cursor_params(cursor),
+    }
+
+    result = await db.execute(result_sql, result_params)
 
     rows = result.fetchall()
 
@@ -2747,30 +3030,20 @@ async def get_adrs_with_unclassifiable_causality(
         for row in rows
     ]
 
-    total_sql = text("""
-    SELECT COUNT(*) FROM (
-        SELECT
-            adr.id,
-            COUNT(DISTINCT sms.id) AS sms_count
-        FROM adr
-        JOIN causality_assessment_level cal ON adr.id = cal.adr_id
-        LEFT JOIN review ON cal.id = review.causality_assessment_level_id
-        LEFT JOIN sms_message sms ON adr.id = sms.adr_id
-        WHERE cal.causality_assessment_level_value = :level_value
-        GROUP BY adr.id
-        HAVING COUNT(DISTINCT sms.id) != 0
-            AND COUNT(DISTINCT CASE WHEN review.approved = 1 THEN review.id END) >
-            COUNT(DISTINCT CASE WHEN review.approved = 0 THEN review.id END)
-    ) AS sub
-    """)
-
-    total_result_params = {
-        "level_value": "unclassifiable",
-    }
+    # Pages after a cursor leave out the total, see pagination.py
+    total_result = pages = None
+    if cursor is None:
+        total_sql = text(
+            queries.alert_adrs_total(
+                CausalityAssessmentLevelEnum.unclassifiable, sent=True
+            )
+        )
 
-    total_result = db.execute(total_sql, total_result_params).scalar()
-    # Calculate the total number of pages
-    pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
+        total_result_params = {"query": None}
+
+        total_result = (await db.execute(total_sql, total_result_params)).scalar()
+        # Calculate the total number of pages
+        pages = (total_result + size - 1) // size  # Equivalent to math.ceil(total / size)
 
     return {
         "items": items,
@@ -2778,6 +3051,7 @@ async def get_adrs_with_unclassifiable_causality(
         "page": page,
         "size": size,
         "pages": pages,
+        "next_cursor": next_cursor(rows, size, ["created_at", "adr_id"]),
     }
 
 
@@ -2925,198 +3199,56 @@ def send_additional_info_request(
     return JSONResponse(content=content, status_code=status.HTTP_200_OK)
 
 
-# Utility functions
-def get_ml_model() -> BaseEstimator:
-    """Load the trained ML model."""
-    model_path = f"{settings.mlflow_model_artifacts_path}/model/model.pkl"
-    return joblib.load(model_path)
-
-
-def get_scalers() -> BaseEstimator:
-    """Load the trained ML model."""
-    minmax_scaler_path = (
-        f"{settings.mlflow_model_artifacts_path}/scalers/minmax_scaler.pkl"
-    )
-    return joblib.load(minmax_scaler_path)
-
-
-def get_encoders() -> Tuple[OneHotEncoder, OrdinalEncoder]:
-    """Load the one-hot and ordinal encoders."""
-    encoders_path = f"{settings.mlflow_model_artifacts_path}/encoders"
-    one_hot_encoder = joblib.load(f"{encoders_path}/one_hot_encoder.pkl")
-    ordinal_encoder = joblib.load(f"{encoders_path}/ordinal_encoder.pkl")
-    return one_hot_encoder, ordinal_encoder
-
-
-def get_column_metadata() -> dict:
-    """Return list of categorical fields used for encoding."""
-    """Load the one-hot and ordinal encoders."""
-    column_metadata_path = (
-        f"{settings.mlflow_model_artifacts_path}/metadata/model_columns.json"
-    )
-    with open(column_metadata_path, "r") as f:
-        column_metadata = json.load(f)
-
-    categorical_columns = column_metadata["categorical_columns"]
-    numerical_columns = column_metadata["numerical_columns"]
-    date_columns = column_metadata["date_columns"]
-    boolean_columns = column_metadata["boolean_columns"]
-    prediction_columns = column_metadata["prediction_columns"]
-    columns_to_drop = column_metadata["columns_to_drop"]
-
-    return {
-        "categorical_columns": categorical_columns,
-        "numerical_columns": numerical_columns,
-        "date_columns": date_columns,
-        "boolean_columns": boolean_columns,
-        "prediction_columns": prediction_columns,
-        "columns_to_drop": columns_to_drop,
-    }
-
-
-def input_to_prediction_format(input_df: pd.DataFrame) -> pd.DataFrame:
-    """
-    This function returns for a proper dataframe for the ML model and SHAP model
-    """
-
-    column_metadata = get_column_metadata()
-
-    categorical_columns = column_metadata["categorical_columns"]
-    numerical_columns = column_metadata["numerical_columns"]
-    date_columns = column_metadata["date_columns"]
-    boolean_columns = column_metadata["boolean_columns"]
-    prediction_columns = column_metadata["prediction_columns"]
-    columns_to_drop = column_metadata["columns_to_drop"]
-
-    # Create all the columns not originally in dataset
-    ## Num suspected drugs
-    input_df["num_suspected_drugs"] = input_df[boolean_columns].sum(axis=1)
-
-    for column in categorical_columns:
-        input_df[column] = input_df[column].astype("category")
-
-    ## Patient Age and Patient Date of Birth
-    date_columns_without_created_at = date_columns
-    date_columns_without_created_at.remove("created_at")
-
-    for column in date_columns:
-        input_df[column] = pd.to_datetime(input_df[column], errors="coerce")
-
-    today = pd.to_datetime("today")
-
-    missing_age_mask = (
-        input_df["patient_age"].isnull() & input_df["patient_date_of_birth"].notnull()
-    )
-
-    input_df.loc[missing_age_mask, "patient_age"] = (
-        today - input_df.loc[missing_age_mask, "patient_date_of_birth"]
-    ).dt.days // 365
-
-    input_df["patient_age"] = input_df["patient_age"].fillna(
-        input_df["patient_age"].median()
-    )
-
-    ## Patient BMI
-    input_df["patient_bmi"] = input_df["patient_weight_kg"] / (
-        input_df["patient_height_cm"] * input_df["patient_height_cm"]
-    )
-
-    ## Drug columns
-    drug_names = ["rifampicin", "isoniazid", "pyrazinamide", "ethambutol"]
-
-    for drug in drug_names:
-        start_col = f"{drug}_start_to_onset_days"
-        stop_col = f"{drug}_stop_to_onset_days"
-        start_stop_col = f"{drug}_start_stop_difference"
-
-        input_df[start_col] = (
-            input_df["date_of_onset_of_reaction"] - input_df[f"{drug}_start_date"]
-        ).dt.days
-        input_df[stop_col] = (
-            input_df["date_of_onset_of_reaction"] - input_df[f"{drug}_stop_date"]
-        ).dt.days
-        input_df[start_stop_col] = (
-            input_df[f"{drug}_stop_date"] - input_df[f"{drug}_start_date"]
-        ).dt.days
-
-    # Drop date columns
-    input_df = input_df.drop(columns=date_columns)
-
-    input_df = input_df.drop(columns=columns_to_drop)
-
-    # Fill null valuea
-    input_df[numerical_columns] = input_df[numerical_columns].fillna(-1)
-
-    # Scale numerical columns
-    minmax_scaler = get_scalers()
-    scaled_numericals = minmax_scaler.transform(input_df[numerical_columns])
-    scaled_numericals_df = pd.DataFrame(scaled_numericals, columns=numerical_columns)
-
-    # Encode categorical columns
-
-    one_hot_encoder, _ = get_encoders()
-
-    cat_encoded = one_hot_encoder.transform(input_df[categorical_columns])
-    cat_encoded_df = pd.DataFrame(
-        cat_encoded, columns=one_hot_encoder.get_feature_names_out(categorical_columns)
-    )
-
-    # Merge all features
-    final_input_df = pd.concat(
-        [
-            cat_encoded_df,
-            input_df[boolean_columns].reset_index(drop=True),
-            scaled_numericals_df,
-        ],
-        axis=1,
-    )
+@app.get("/api/v1/metrics", status_code=status.HTTP_200_OK)
+def get_metrics(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+):
+    return metrics.snapshot()
 
-    # Reorder to match training time
-    final_input_df = final_input_df[prediction_columns]
 
-    return final_input_df
+@app.post("/api/v1/rescoring_job", status_code=status.HTTP_202_ACCEPTED)
+async def post_rescoring_job(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_async_db),
+):
+    job_id = await rescoring_runner.start(model_registry.current().ml_model_id)
 
+    content = await db.get(RescoringJobModel, job_id)
 
-def get_shap_values(shap_values: Explainer):
-    base_values = list(shap_values.base_values[0])
-    shap_values_matrix = shap_values.values[0].tolist()
-    shap_values_sum_per_class = np.sum(shap_values.values[0], axis=0).tolist()
-    shap_values_and_base_values_sum_per_class = list(
-        np.sum(shap_values.values[0], axis=0) + shap_values.base_values[0]
+    return JSONResponse(
+        content=jsonable_encoder(content),
+        status_code=status.HTTP_202_ACCEPTED,
     )
 
-    return {
-        "base_values": base_values,
-        "shap_values_matrix": shap_values_matrix,
-        "shap_values_sum_per_class": shap_values_sum_per_class,
-        "shap_values_and_base_values_sum_per_class": shap_values_and_base_values_sum_per_class,
-    }
 
+@app.get("/api/v1/rescoring_job/{job_id}", status_code=status.HTTP_200_OK)
+def get_rescoring_job(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    job_id: str = Path(..., description="ID of the re-scoring job to read"),
+    db: Session = Depends(get_db),
+):
+    job = db.query(RescoringJobModel).filter(RescoringJobModel.id == job_id).first()
 
-def format_feature_values(feature_values: List[any]) -> List[any]:
-    minmax_scaler = get_scalers()
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-scoring job not found")
 
-    reversed_values = []
+    return job
 
-    for i, value in enumerate(feature_values):
-        # Handle logical encoding: 0 → False, 1 → True, -1 → None
-        if value == 0:
-            reversed_values.append(False)
-        elif value == 1:
-            reversed_values.append(True)
 
-        # Reverse min-max scaling for decimal floats
-        elif isinstance(value, float) and not value.is_integer():
-            min_val = minmax_scaler.data_min_[i]
-            max_val = minmax_scaler.data_max_[i]
-            original = round(value * (max_val - min_val) + min_val)
-            if original == -1:
-                reversed_values.append(None)
-            else:
-                reversed_values.append(original)
+@app.get(
+    "/api/v1/shadow/summary",
+    status_code=status.HTTP_200_OK,
+    response_model=ShadowSummaryGetResponse,
+)
+def get_shadow_summary(
+    current_user: Annotated[UserDetailsBaseModel, Depends(get_current_user)],
+    challenger_model_id: str | None = Query(
+        None, description="Defaults to the challenger being scored now"
+    ),
+    db: Session = Depends(get_db),
+):
+    if challenger_model_id is None and shadow_scorer is not None:
+        challenger_model_id = shadow_scorer.registry.current().ml_model_id
 
-        # Leave all other values as-is
-        else:
-            reversed_values.append(value)
+    return summarize_shadow_predictions(db, challenger_model_id)
 
-    return reversed_values
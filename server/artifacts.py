@@ -0,0 +1,328 @@
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, List
+
+import boto3
+import joblib
+import mlflow
+import numpy as np
+import pandas as pd
+from config import settings
+from features import CompiledFeatureTransform, fit_patient_age_median
+from mlflow.tracking import MlflowClient
+from onnx_backend import convert_classifier
+from sklearn.base import BaseEstimator
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder
+
+ARTIFACTS_DIR = f"./{settings.mlflow_model_artifacts_path}"
+MODEL_VERSION_FILE = "model_version.json"
+LOCAL_MODEL_VERSION = "local"
+
+# Rows the ONNX model must reproduce sklearn on before it is used
+PARITY_CSV_PATH = "data.csv"
+
+# What the model was trained on
+TRAINING_CSV_PATH = "data.csv"
+
+# Files of an artifacts directory that make up the model
+MODEL_FILES = [
+    "model/model.pkl",
+    "encoders/one_hot_encoder.pkl",
+    "encoders/ordinal_encoder.pkl",
+    "scalers/minmax_scaler.pkl",
+    "metadata/model_columns.json",
+]
+
+
+@dataclass(frozen=True)
+class ModelArtifacts:
+    """One loaded, read-only version of the model and its preprocessing steps."""
+
+    version: str
+    artifacts_dir: str
+    ml_model: BaseEstimator
+    one_hot_encoder: OneHotEncoder
+    ordinal_encoder: OrdinalEncoder
+    minmax_scaler: MinMaxScaler
+    column_metadata: dict
+    feature_transform: CompiledFeatureTransform
+    # ml_model converted to ONNX, when inference_backend is onnx
+    onnx_model: Any = None
+
+    @property
+    def ml_model_id(self) -> str:
+        return f"{settings.mlflow_model_name}/{self.version}"
+
+    @functools.cached_property
+    def feature_schema(self) -> dict:
+        """
+        The model's feature names, display labels and scaler ranges, and the
+        causality assessment level of each column of its SHAP values, with an
+        id that changes whenever any of them or the model version does.
+        """
+        class_values = self.ordinal_encoder.inverse_transform(
+            np.asarray(self.ml_model.classes_).reshape(-1, 1)
+        )[:, 0]
+
+        schema = {
+            "ml_model_id": self.ml_model_id,
+            **self.feature_transform.feature_schema(),
+            "class_values": [str(value) for value in class_values],
+        }
+        digest = hashlib.sha256(json.dumps(schema, sort_keys=True).encode())
+
+        return {"id": digest.hexdigest()[:32], **schema}
+
+    @functools.cached_property
+    def content_digest(self) -> str:
+        """Hash of the model files, the same for the same model of any version."""
+        digest = hashlib.sha256()
+        for path in MODEL_FILES:
+            with open(os.path.join(self.artifacts_dir, path), "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+
+        return digest.hexdigest()
+
+    @property
+    def runtime_model(self) -> Any:
+        """What predict and predict_proba run on, ONNX Runtime when converted."""
+        return self.onnx_model if self.onnx_model is not None else self.ml_model
+
+
+def configure_mlflow():
+    """Point MLflow at the tracking server and the MinIO artifact store."""
+    mlflow.set_tracking_uri(
+        f"http://{settings.mlflow_tracking_server_host}:{settings.mlflow_tracking_server_port}"
+    )
+
+    # Set MinIO Credentials
+    os.environ["AWS_ACCESS_KEY_ID"] = settings.minio_access_key
+    os.environ["AWS_SECRET_ACCESS_KEY"] = settings.minio_secret_access_key
+    os.environ["AWS_DEFAULT_REGION"] = settings.aws_region
+
+    os.environ["MLFLOW_S3_ENDPOINT_URL"] = (
+        f"http://{settings.minio_host}:{settings.minio_api_port}"
+    )
+
+    # Test if credentials are set correctly
+    boto3.client(
+        "s3",
+        endpoint_url=os.getenv("MLFLOW_S3_ENDPOINT_URL"),
+    )
+
+
+def download_artifacts(model_version, artifacts_dir: str):
+    """Download every artifact of the model version's run into artifacts_dir."""
+    mlflow_client = MlflowClient()
+
+    artifacts = mlflow_client.list_artifacts(model_version.run_id)
+    if not artifacts:
+        logging.warning("No artifacts found for this model.")
+    else:
+        logging.info(f"Available artifacts: {[artifact.path for artifact in artifacts]}")
+
+    os.makedirs(artifacts_dir, exist_ok=True)
+    mlflow_client.download_artifacts(
+        model_version.run_id,
+        "",
+        dst_path=artifacts_dir,
+    )
+
+    # Remember which version lives here so restarts do not have to ask MLflow
+    with open(os.path.join(artifacts_dir, MODEL_VERSION_FILE), "w") as f:
+        json.dump(
+            {
+                "name": model_version.name,
+                "version": str(model_version.version),
+                "run_id": model_version.run_id,
+            },
+            f,
+        )
+
+
+def read_model_version(artifacts_dir: str) -> str:
+    """Return the model version stored in artifacts_dir, if it was recorded."""
+    version_path = os.path.join(artifacts_dir, MODEL_VERSION_FILE)
+
+    if not os.path.exists(version_path):
+        return LOCAL_MODEL_VERSION
+
+    with open(version_path, "r") as f:
+        return json.load(f)["version"]
+
+
+def load_artifacts(artifacts_dir: str) -> ModelArtifacts:
+    """Unpickle the model, scaler, encoders and column metadata once."""
+    with open(f"{artifacts_dir}/metadata/model_columns.json", "r") as f:
+        column_metadata = json.load(f)
+
+    # Missing ages are filled with the training median, which older
+    # artifacts do not record
+    if "patient_age_median" not in column_metadata:
+        column_metadata["patient_age_median"] = fit_patient_age_median(
+            pd.read_csv(
+                TRAINING_CSV_PATH, usecols=["patient_age", "patient_date_of_birth"]
+            )
+        )
+
+    one_hot_encoder = joblib.load(f"{artifacts_dir}/encoders/one_hot_encoder.pkl")
+    minmax_scaler = joblib.load(f"{artifacts_dir}/scalers/minmax_scaler.pkl")
+
+    artifacts = ModelArtifacts(
+        version=read_model_version(artifacts_dir),
+        artifacts_dir=artifacts_dir,
+        ml_model=joblib.load(f"{artifacts_dir}/model/model.pkl"),
+        one_hot_encoder=one_hot_encoder,
+        ordinal_encoder=joblib.load(f"{artifacts_dir}/encoders/ordinal_encoder.pkl"),
+        minmax_scaler=minmax_scaler,
+        column_metadata=column_metadata,
+        feature_transform=CompiledFeatureTransform(
+            column_metadata, one_hot_encoder, minmax_scaler
+        ),
+    )
+
+    if settings.inference_backend == "onnx" and os.path.exists(PARITY_CSV_PATH):
+        parity_records = pd.read_csv(PARITY_CSV_PATH).to_dict(orient="records")
+        artifacts = dataclasses.replace(
+            artifacts,
+            onnx_model=convert_classifier(
+                artifacts.ml_model,
+                artifacts.feature_transform.transform_frame(parity_records),
+            ),
+        )
+
+    return artifacts
+
+
+class ArtifactRegistry:
+    """
+    Holds the artifacts of the model version an MLflow alias points to.
+
+    Readers call current() once per request and keep using that snapshot, so a
+    swap to a new version never mixes a model with another version's encoders.
+    """
+
+    def __init__(self, alias: str, artifacts_dir: str = ARTIFACTS_DIR):
+        self.alias = alias
+        self.artifacts_dir = artifacts_dir
+        self._artifacts: ModelArtifacts | None = None
+        # The artifacts the last swap replaced, for swap listeners
+        self.previous: ModelArtifacts | None = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[ModelArtifacts], None]] = []
+
+    def current(self) -> ModelArtifacts:
+        artifacts = self._artifacts
+
+        if artifacts is None:
+            with self._lock:
+                if self._artifacts is None:
+                    self._artifacts = load_artifacts(self.artifacts_dir)
+                artifacts = self._artifacts
+
+        return artifacts
+
+    def on_swap(self, listener: Callable[[ModelArtifacts], None]):
+        """Register a callback that runs after a new version is swapped in."""
+        self._listeners.append(listener)
+
+    def load_model(self, ml_model_id: str) -> ModelArtifacts | None:
+        """
+        The artifacts of ml_model_id, one of the versions this registry held,
+        loaded again from disk, or None when they are no longer there.
+        """
+        name, _, version = ml_model_id.rpartition("/")
+        if name != settings.mlflow_model_name:
+            return None
+
+        current = self.current()
+        if version == current.version:
+            return current
+
+        # The first version lives in artifacts_dir, later ones in versions/
+        for version_dir in [
+            self.artifacts_dir,
+            os.path.join(self.artifacts_dir, "versions", version),
+        ]:
+            if os.path.isdir(version_dir) and read_model_version(version_dir) == version:
+                return load_artifacts(version_dir)
+
+        return None
+
+    def ensure_downloaded(self):
+        """Download the aliased version on first boot, when nothing is on disk."""
+        if os.path.exists(self.artifacts_dir):
+            logging.info("Skipping artifact download")
+            return
+
+        try:
+            logging.info("Downloading ML Model Artifacts")
+            configure_mlflow()
+
+            model_version = MlflowClient().get_model_version_by_alias(
+                settings.mlflow_model_name, self.alias
+            )
+            logging.info(
+                f"✅ Retrieved model version {model_version.version} (run_id: {model_version.run_id})"
+            )
+
+            download_artifacts(model_version, self.artifacts_dir)
+            logging.info("Downloaded ML Model Artifacts")
+
+        except Exception as e:
+            logging.error(f"Error during ML model retrieval: {e}")
+
+    def refresh(self) -> bool:
+        """Swap to the version the alias points to now. Returns True on a swap."""
+        configure_mlflow()
+
+        model_version = MlflowClient().get_model_version_by_alias(
+            settings.mlflow_model_name, self.alias
+        )
+        version = str(model_version.version)
+
+        if version == self.current().version:
+            return False
+
+        with self._lock:
+            version_dir = os.path.join(self.artifacts_dir, "versions", version)
+
+            if read_model_version(version_dir) != version:
+                logging.info(f"Downloading ML Model Artifacts for version {version}")
+                download_artifacts(model_version, version_dir)
+
+            # Fully load the new version before publishing it
+            artifacts = load_artifacts(version_dir)
+            self.previous, self._artifacts = self._artifacts, artifacts
+
+        logging.info(
+            f"Swapped {settings.mlflow_model_name}@{self.alias} from version {self.previous.version} to {version}"
+        )
+
+        for listener in self._listeners:
+            try:
+                listener(artifacts)
+            except Exception as e:
+                logging.error(f"Error running model swap listener: {e}")
+
+        return True
+
+    async def watch(self, interval_seconds: float):
+        """Poll the MLflow alias and hot-swap whenever it moves."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logging.warning(f"Could not refresh model artifacts: {e}")
+
+
+model_registry = ArtifactRegistry(settings.mlflow_model_alias)
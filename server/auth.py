@@ -8,9 +8,10 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
 from typing_extensions import Annotated
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import UserModel
-from dependencies import get_db
+from dependencies import get_async_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
 
@@ -27,7 +28,8 @@ def get_password_hash(plain_password):
 
 
 async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_async_db),
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,7 +51,13 @@ async def get_current_user(
     except InvalidTokenError:
         raise credentials_exception
 
-    user = db.query(UserModel).filter(UserModel.username == token_data.username).first()
+    user = (
+        await db.execute(
+            select(
+                UserModel.username, UserModel.first_name, UserModel.last_name
+            ).where(UserModel.username == token_data.username)
+        )
+    ).first()
 
     if user is None:
         raise credentials_exception
@@ -0,0 +1,211 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import shap
+from artifacts import ModelArtifacts
+from features import input_to_prediction_format
+from shap.utils._legacy import DenseData
+
+SAMPLE_SIZE = 100
+PROVENANCE_FILE = "provenance.json"
+
+# Artifacts that decide what the seed data looks like after preprocessing
+PREPROCESSING_ARTIFACTS = [
+    "metadata/model_columns.json",
+    "scalers/minmax_scaler.pkl",
+    "encoders/one_hot_encoder.pkl",
+]
+
+
+@dataclass(frozen=True)
+class Background:
+    """The seed data summarized for the explainers of one model version."""
+
+    columns: List[str]
+    # Cluster centers and weights by the number of clusters asked for
+    clusters: Dict[int, Tuple[np.ndarray, np.ndarray]]
+    sample: np.ndarray
+    provenance: dict
+
+    def kmeans(self, n_clusters: int) -> DenseData:
+        """The same summary shap.kmeans(final_input_df, n_clusters) returns."""
+        centers, weights = self.clusters[n_clusters]
+        # DenseData normalizes the weights in place, so they must be writable
+        return DenseData(np.asarray(centers), self.columns, None, np.array(weights))
+
+    def sample_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.sample, columns=self.columns)
+
+    @classmethod
+    def from_frame(
+        cls, final_input_df: pd.DataFrame, kmeans_clusters: List[int]
+    ) -> "Background":
+        """Summarize preprocessed rows without storing them, e.g. for benchmarks."""
+        return cls(**summarize(final_input_df, kmeans_clusters), provenance={})
+
+
+def array_names(kmeans_clusters: List[int]) -> List[str]:
+    names = ["sample"]
+    for n_clusters in kmeans_clusters:
+        names += [f"cluster_centers_{n_clusters}", f"cluster_weights_{n_clusters}"]
+    return names
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def background_key(
+    artifacts: ModelArtifacts, data_sha256: str, kmeans_clusters: List[int]
+) -> str:
+    """
+    Changes whenever the model version, its preprocessing, the data or the
+    cluster counts do.
+    """
+    digest = hashlib.sha256(
+        f"{artifacts.version}\0{data_sha256}\0{sorted(kmeans_clusters)}".encode()
+    )
+    for name in PREPROCESSING_ARTIFACTS:
+        digest.update(file_sha256(os.path.join(artifacts.artifacts_dir, name)).encode())
+    return digest.hexdigest()[:16]
+
+
+def summarize(final_input_df: pd.DataFrame, kmeans_clusters: List[int]) -> dict:
+    """
+    Summarize preprocessed seed data the way the explainers use it, with one
+    k-means summary per cluster count.
+    """
+    clusters = {}
+    for n_clusters in kmeans_clusters:
+        kmeans = shap.kmeans(final_input_df, min(n_clusters, len(final_input_df)))
+        clusters[n_clusters] = (
+            np.ascontiguousarray(kmeans.data, dtype=np.float64),
+            np.ascontiguousarray(kmeans.weights, dtype=np.float64),
+        )
+
+    sample = shap.sample(final_input_df, SAMPLE_SIZE, random_state=0)
+
+    return {
+        "columns": final_input_df.columns.tolist(),
+        "clusters": clusters,
+        "sample": np.ascontiguousarray(sample.to_numpy(), dtype=np.float64),
+    }
+
+
+def _flatten(summary: dict) -> Dict[str, np.ndarray]:
+    arrays = {"sample": summary["sample"]}
+    for n_clusters, (centers, weights) in summary["clusters"].items():
+        arrays[f"cluster_centers_{n_clusters}"] = centers
+        arrays[f"cluster_weights_{n_clusters}"] = weights
+    return arrays
+
+
+def save_background(directory: str, summary: dict, provenance: dict):
+    """Write the arrays and provenance, then move them into place at once."""
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+
+    staging = tempfile.mkdtemp(dir=parent)
+    checksums = {}
+    for name, array in _flatten(summary).items():
+        path = os.path.join(staging, f"{name}.npy")
+        np.save(path, array)
+        checksums[name] = file_sha256(path)
+
+    with open(os.path.join(staging, PROVENANCE_FILE), "w") as f:
+        json.dump({**provenance, "columns": summary["columns"], "sha256": checksums}, f)
+
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        # Another worker stored the same background first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_saved_background(directory: str) -> Background | None:
+    """Memory-map a stored background, or None if it is missing or corrupt."""
+    if not os.path.exists(os.path.join(directory, PROVENANCE_FILE)):
+        return None
+
+    try:
+        with open(os.path.join(directory, PROVENANCE_FILE), "r") as f:
+            provenance = json.load(f)
+
+        arrays = {}
+        for name in array_names(provenance["kmeans_clusters"]):
+            path = os.path.join(directory, f"{name}.npy")
+            if file_sha256(path) != provenance["sha256"][name]:
+                logging.warning(f"Checksum mismatch for {path}")
+                return None
+            arrays[name] = np.load(path, mmap_mode="r")
+
+    except (OSError, ValueError, KeyError) as e:
+        logging.info(f"No usable SHAP background in {directory}: {e}")
+        return None
+
+    return Background(
+        columns=provenance["columns"],
+        clusters={
+            n_clusters: (
+                arrays[f"cluster_centers_{n_clusters}"],
+                arrays[f"cluster_weights_{n_clusters}"],
+            )
+            for n_clusters in provenance["kmeans_clusters"]
+        },
+        sample=arrays["sample"],
+        provenance=provenance,
+    )
+
+
+def load_background(
+    artifacts: ModelArtifacts,
+    csv_path: str,
+    cache_dir: str,
+    kmeans_clusters: List[int],
+) -> Background:
+    """
+    Load the background for this model version and seed data from cache_dir,
+    computing and storing it first if it is not there yet.
+    """
+    data_sha256 = file_sha256(csv_path)
+    directory = os.path.join(
+        cache_dir, background_key(artifacts, data_sha256, kmeans_clusters)
+    )
+
+    background = load_saved_background(directory)
+    if background is not None:
+        logging.info(f"Loaded SHAP background from {directory}")
+        return background
+
+    logging.info(f"Summarizing {csv_path} into a SHAP background")
+    final_input_df = input_to_prediction_format(pd.read_csv(csv_path), artifacts)
+    summary = summarize(final_input_df, kmeans_clusters)
+
+    provenance = {
+        "model_id": artifacts.ml_model_id,
+        "model_version": artifacts.version,
+        "data_path": csv_path,
+        "data_sha256": data_sha256,
+        "rows": len(final_input_df),
+        "kmeans_clusters": sorted(kmeans_clusters),
+        "sample_size": len(summary["sample"]),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    save_background(directory, summary, provenance)
+
+    return load_saved_background(directory) or Background(
+        **summary, provenance=provenance
+    )
@@ -1,9 +1,9 @@
 import enum
 from datetime import date, datetime
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 
 
@@ -93,6 +93,32 @@ class ReviewEnum(str, enum.Enum):
     denied = "denied"
 
 
+class ExplanationStatusEnum(str, enum.Enum):
+    pending = "pending"
+    ready = "ready"
+    failed = "failed"
+    not_applicable = "not applicable"
+
+
+class ExplanationTierEnum(str, enum.Enum):
+    fast = "fast"
+    standard = "standard"
+    precise = "precise"
+
+
+class ADRBatchItemStatusEnum(str, enum.Enum):
+    classified = "classified"
+    unclassified = "unclassified"
+    rejected = "rejected"
+
+
+class RescoringJobStatusEnum(str, enum.Enum):
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
 class SMSMessageTypeEnum(str, enum.Enum):
     individual_alert = "individual alert"
     # bulk_alert = "bulk alert"
@@ -186,18 +212,44 @@ class ReviewGetResponse(BaseModel):
 #     reviews: List[ReviewGetResponse] = []
 
 
+class ExplanationDriverResponse(BaseModel):
+    rank: int
+    feature_name: str
+    feature_label: str | None = None
+    shap_value: float
+
+
+class ExplanationDriverGetResponse(BaseModel):
+    causality_assessment_level_id: str
+    adr_id: str
+    ml_model_id: str
+    causality_assessment_level_value: CausalityAssessmentLevelEnum
+    class_value: CausalityAssessmentLevelEnum
+    rank: int
+    feature_name: str
+    shap_value: float
+
+
 class CausalityAssessmentLevelGetResponse(BaseModel):
     id: str
     adr_id: str
     ml_model_id: str = "final_ml_model@champion"
     causality_assessment_level_value: CausalityAssessmentLevelEnum
+    explanation_status: ExplanationStatusEnum = ExplanationStatusEnum.ready
+    explanation_tier: ExplanationTierEnum | None = None
+    feature_schema_id: str | None = None
 
     base_values: Optional[List[float]] = None
     shap_values_matrix: Optional[List[List[float]]] = None
     shap_values_sum_per_class: Optional[List[float]] = None
     shap_values_and_base_values_sum_per_class: Optional[List[float]] = None
     feature_names: Optional[List[str]] = None
+    feature_labels: Optional[List[str]] = None
     feature_values: Optional[List[Any]] = None
+    # The strongest SHAP contributors of each class, in summary mode
+    drivers: Optional[
+        Dict[CausalityAssessmentLevelEnum, List[ExplanationDriverResponse]]
+    ] = None
 
 
 # ADR
@@ -277,6 +329,53 @@ class ADRPostRequest(BaseModel):
     comments: str | None = None
 
 
+class ADRBatchPostRequest(BaseModel):
+    adrs: List[ADRPostRequest] = Field(min_length=1, max_length=1000)
+
+
+class ADRBatchItemResponse(BaseModel):
+    index: int
+    status: ADRBatchItemStatusEnum
+    adr_id: str | None = None
+    causality_assessment_level_id: str | None = None
+    causality_assessment_level_value: CausalityAssessmentLevelEnum | None = None
+    detail: str | None = None
+
+
+class ADRBatchPostResponse(BaseModel):
+    classified: int
+    unclassified: int
+    rejected: int
+    items: List[ADRBatchItemResponse]
+
+
+class FeatureSchemaGetResponse(BaseModel):
+    id: str
+    ml_model_id: str
+    feature_names: List[str]
+    display_labels: List[str]
+    # Unscaled [min, max] of numerical features, None for the others
+    scaler_ranges: List[Optional[List[float]]]
+    class_values: List[CausalityAssessmentLevelEnum]
+
+
+class ShadowClassAgreementResponse(BaseModel):
+    champion_value: CausalityAssessmentLevelEnum
+    total: int
+    agreed: int
+    agreement: float
+    # How often the challenger predicted each level for this champion level
+    challenger_values: Dict[CausalityAssessmentLevelEnum, int]
+
+
+class ShadowSummaryGetResponse(BaseModel):
+    challenger_model_id: str | None = None
+    total: int
+    agreed: int
+    agreement: float | None = None
+    classes: List[ShadowClassAgreementResponse]
+
+
 class ADRGetResponse(BaseModel):
     id: str
     # User
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, ContextManager, List
+
+import metrics
+
+batch_size_histogram = metrics.histogram(
+    "inference_batch_size",
+    "ADRs per batched predict and explain call",
+    [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024],
+)
+batch_wait_histogram = metrics.histogram(
+    "inference_batch_wait_ms",
+    "Milliseconds a request waited for its batch to be sent",
+    [0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500],
+)
+batch_run_histogram = metrics.histogram(
+    "inference_batch_run_ms",
+    "Milliseconds spent predicting and explaining one batch",
+    [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
+)
+
+
+class MicroBatcher:
+    """
+    Collects ADRs from concurrent requests and scores them together.
+
+    A batch is sent when it holds max_size ADRs or when its oldest request has
+    waited max_wait_ms, whichever comes first. Each request gets back the
+    results for its own ADRs, in order, or the exception the batch raised.
+
+    Each request holds a queued() slot from when it is submitted until it is
+    answered, so a full queue turns requests away before they join a batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int,
+        max_wait_ms: float,
+        queued: Callable[[], ContextManager],
+    ):
+        self.run_batch = run_batch
+        self.queued = queued
+        self.max_size = max_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._pending: List[tuple] = []
+        self._pending_size = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._running = set()
+
+    @property
+    def busy(self) -> bool:
+        """Whether ADRs are waiting for or in a batch."""
+        return bool(self._pending or self._running)
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        with self.queued():
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+            self._pending.append((items, future, time.perf_counter()))
+            self._pending_size += len(items)
+
+            if self._pending_size >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+
+            return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending, self._pending_size = self._pending, [], 0
+        if not pending:
+            return
+
+        # Keep a reference so the task is not garbage collected mid-run
+        task = asyncio.create_task(self._run(pending))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, pending: List[tuple]):
+        start = time.perf_counter()
+        for _, _, submitted_at in pending:
+            batch_wait_histogram.observe((start - submitted_at) * 1000)
+
+        batch = [item for items, _, _ in pending for item in items]
+        batch_size_histogram.observe(len(batch))
+
+        try:
+            results = await self.run_batch(batch)
+        except Exception as e:
+            logging.error(f"Error scoring a batch of {len(batch)} ADRs: {e}")
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            batch_run_histogram.observe((time.perf_counter() - start) * 1000)
+
+        offset = 0
+        for items, future, _ in pending:
+            # The request may have been cancelled while it waited
+            if not future.done():
+                future.set_result(results[offset : offset + len(items)])
+            offset += len(items)
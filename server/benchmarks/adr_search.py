@@ -0,0 +1,175 @@
+"""
+Latency of an ADR search with the ilike filters GET /api/v1/adr used to run
+and with the adr_fts full-text index, as the number of ADRs grows.
+
+For each of --sizes, fills a scratch database with that many made up ADRs,
+adds the indexes from migrations.py, then times --queries searches for the
+names of patients the way the endpoint pages them: the total and the first
+page.
+
+Run from the server directory (a scratch database is created and deleted
+there):
+
+    python -m benchmarks.adr_search --sizes 10000,100000,1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import time
+import uuid
+
+from engines import build_engine
+from migrations import ADR_FULL_TEXT_SEARCH, HOT_PATH_INDEXES
+from models import ADRModel, Base
+from search import match_expression, ranked_adr_matches
+from sqlalchemy import Enum, desc, literal_column
+from sqlalchemy.orm import sessionmaker
+
+DB_PATH = "benchmark_search.sqlite"
+URL = f"sqlite:///{DB_PATH}"
+
+SYLLABLES = ["ka", "ki", "mu", "nja", "we", "ro", "si", "to", "la", "be", "ny", "ch"]
+PAGE_SIZE = 50
+
+
+def word() -> str:
+    return "".join(random.choices(SYLLABLES, k=random.randint(2, 4))).capitalize()
+
+
+def placeholder(column):
+    """A value the column accepts, the first member of an enum."""
+    return column.type.enums[0] if isinstance(column.type, Enum) else "x"
+
+
+# Required columns the benchmark has no values of its own for
+PLACEHOLDERS = {
+    column.name: placeholder(column)
+    for column in ADRModel.__table__.columns
+    if not column.nullable
+}
+
+
+def adr() -> dict:
+    return {
+        **PLACEHOLDERS,
+        "id": str(uuid.uuid4()),
+        "created_at": f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+        "patient_name": f"{word()} {word()}",
+        "patient_address": f"{word()} village",
+        "ward_or_clinic": random.choice(["TB clinic", "Ward 3", "MCH", "Outpatient"]),
+        "comments": "Rash and itching after starting treatment",
+    }
+
+
+def fill(size: int):
+    """Insert `size` made up ADRs."""
+    engine = build_engine(URL)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    connection = sqlite3.connect(DB_PATH)
+    columns = list(adr())
+    insert = (
+        f"INSERT INTO adr ({', '.join(columns)})"
+        f" VALUES ({', '.join(':' + column for column in columns)})"
+    )
+
+    for start in range(0, size, 10000):
+        connection.executemany(
+            insert,
+            [adr() for _ in range(min(10000, size - start))],
+        )
+    connection.commit()
+
+    # What migrations.py adds to a database that already has ADRs
+    for statement in HOT_PATH_INDEXES[:1] + ADR_FULL_TEXT_SEARCH:
+        connection.execute(statement)
+    connection.commit()
+    connection.close()
+
+
+def search_ilike(session, query: str) -> int:
+    content = session.query(ADRModel).filter(
+        ADRModel.patient_name.ilike(f"%{query}%")
+        | ADRModel.patient_address.ilike(f"%{query}%")
+        | ADRModel.inpatient_or_outpatient_number.ilike(f"%{query}%")
+        | ADRModel.ward_or_clinic.ilike(f"%{query}%")
+    )
+    total = content.count()
+    content.order_by(desc(ADRModel.created_at)).limit(PAGE_SIZE).all()
+    return total
+
+
+def search_fts(session, query: str) -> int:
+    matches = ranked_adr_matches(match_expression(query))
+    content = session.query(ADRModel).join(
+        matches, matches.c.rowid == literal_column("adr.rowid")
+    )
+    total = content.count()
+    content.order_by(matches.c.rank, desc(ADRModel.created_at)).limit(
+        PAGE_SIZE
+    ).all()
+    return total
+
+
+def measure(search, queries) -> tuple:
+    """Median milliseconds per search and the mean number of matches."""
+    engine = build_engine(URL)
+    Session = sessionmaker(bind=engine)
+    latencies, totals = [], []
+
+    try:
+        for query in queries:
+            with Session() as session:
+                start = time.perf_counter()
+                totals.append(search(session, query))
+                latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        engine.dispose()
+
+    return statistics.median(latencies), statistics.mean(totals)
+
+
+def remove_database():
+    for path in [DB_PATH, f"{DB_PATH}-wal", f"{DB_PATH}-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    print(f"{'adrs':>9} {'search':<7} {'ms':>9} {'matches':>9}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        remove_database()
+        try:
+            fill(size)
+
+            # Names of random patients, as typed in the search box
+            with sqlite3.connect(DB_PATH) as connection:
+                names = [
+                    row[0]
+                    for row in connection.execute(
+                        "SELECT patient_name FROM adr ORDER BY random() LIMIT ?",
+                        (args.queries,),
+                    )
+                ]
+            queries = [name.lower() for name in names]
+
+            for name, search in [("ilike", search_ilike), ("fts", search_fts)]:
+                milliseconds, matches = measure(search, queries)
+                print(f"{size:>9} {name:<7} {milliseconds:>9.2f} {matches:>9.0f}")
+        finally:
+            remove_database()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Throughput and "database is locked" errors of mixed reads and writes from
+many threads, with the engine as it used to be created and with the tuned one
+from engines.py.
+
+Seeds --rows causality assessment levels with JSON SHAP values, then runs
+--threads threads for --seconds each. Every operation is a detail read of a
+random level or, for --write-ratio of them, a new level saved and an existing
+one updated, the way scoring and the explanation worker write.
+
+Run from the server directory (a scratch database is created and deleted
+there):
+
+    python -m benchmarks.database_concurrency --threads 16
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+import uuid
+
+import numpy as np
+from basemodels import CausalityAssessmentLevelEnum, ExplanationStatusEnum
+from engines import build_engine
+from models import Base, CausalityAssessmentLevelModel
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, undefer_group
+
+DB_PATH = "benchmark_concurrency.sqlite"
+URL = f"sqlite:///{DB_PATH}"
+
+# Roughly the size of a real explanation
+SHAP_VALUES_MATRIX = np.random.default_rng(0).normal(size=(29, 4)).round(6).tolist()
+
+
+def level(adr_id: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "adr_id": adr_id,
+        "ml_model_id": "benchmark",
+        "causality_assessment_level_value": random.choice(
+            list(CausalityAssessmentLevelEnum)
+        ),
+        "explanation_status": ExplanationStatusEnum.pending,
+        "shap_values_matrix": SHAP_VALUES_MATRIX,
+        "base_values": [0.25] * 4,
+    }
+
+
+def read(session, level_ids):
+    session.query(CausalityAssessmentLevelModel).options(
+        undefer_group("explanation")
+    ).filter(CausalityAssessmentLevelModel.id == random.choice(level_ids)).first()
+
+
+def write(session, level_ids):
+    session.bulk_insert_mappings(
+        CausalityAssessmentLevelModel, [level(str(uuid.uuid4()))]
+    )
+    session.query(CausalityAssessmentLevelModel).filter(
+        CausalityAssessmentLevelModel.id == random.choice(level_ids)
+    ).update({"explanation_status": ExplanationStatusEnum.ready})
+    session.commit()
+
+
+def run(engine, args) -> dict:
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    mappings = [level(str(uuid.uuid4())) for _ in range(args.rows)]
+    with Session() as session:
+        session.bulk_insert_mappings(CausalityAssessmentLevelModel, mappings)
+        session.commit()
+    level_ids = [mapping["id"] for mapping in mappings]
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker():
+        thread_latencies, thread_errors = [], 0
+        while time.perf_counter() < deadline:
+            operation = write if random.random() < args.write_ratio else read
+            start = time.perf_counter()
+            try:
+                with Session() as session:
+                    operation(session, level_ids)
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                thread_errors += 1
+                continue
+            thread_latencies.append(time.perf_counter() - start)
+
+        with lock:
+            latencies.extend(thread_latencies)
+            errors.append(thread_errors)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "ops_per_second": len(latencies) / args.seconds,
+        "locked": sum(errors),
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else 0,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else 0,
+    }
+
+
+def remove_database():
+    for path in [DB_PATH, f"{DB_PATH}-wal", f"{DB_PATH}-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    engines = {
+        # What engines.py used to create
+        "default": lambda: create_engine(URL),
+        "tuned": lambda: build_engine(URL),
+    }
+
+    print(f"{'engine':<8} {'ops/s':>8} {'locked':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, make_engine in engines.items():
+        remove_database()
+        engine = make_engine()
+        try:
+            result = run(engine, args)
+        finally:
+            engine.dispose()
+            remove_database()
+
+        print(
+            f"{name:<8} {result['ops_per_second']:>8.1f} {result['locked']:>7}"
+            f" {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Latency of a cheap read while ADRs are being submitted.
+
+Starts the server with uvicorn, then measures GET /api/v1/adr on its own and
+while a few clients keep POSTing classifiable ADRs. When predict and SHAP
+block the event loop the read waits for them, which shows up in the p99.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.event_loop_latency --pool-sizes 0 2
+
+Each pool size starts a fresh server with INFERENCE_POOL_SIZE set to it. The
+server deletes its database and artifacts on shutdown, so every run seeds
+and downloads again. Run the same command on an older commit to get the
+before numbers.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+from auth import create_access_token
+from basemodels import ADRPostRequest
+from benchmarks.feature_pipeline import EDGE_CASE_ADR
+
+
+def start_server(port: int, pool_size: int) -> subprocess.Popen:
+    env = dict(os.environ, INFERENCE_POOL_SIZE=str(pool_size))
+
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_up(base_url: str, timeout_seconds: float):
+    deadline = time.monotonic() + timeout_seconds
+
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+
+    raise TimeoutError(f"Server at {base_url} did not start")
+
+
+def percentiles(latencies: list) -> str:
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return f"p50 {p50:8.1f} ms  p95 {p95:8.1f} ms  p99 {p99:8.1f} ms  (n={len(latencies)})"
+
+
+async def measure_reads(
+    client: httpx.AsyncClient, adr: dict, submitters: int, duration_seconds: float
+) -> list:
+    """GET latencies while `submitters` clients POST ADRs back to back."""
+    stop = asyncio.Event()
+    latencies = []
+
+    async def submit():
+        while not stop.is_set():
+            await client.post("/api/v1/adr", json=adr)
+
+    async def read():
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = await client.get("/api/v1/adr", params={"size": 10})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+            await asyncio.sleep(0.02)
+
+    tasks = [asyncio.create_task(submit()) for _ in range(submitters)]
+    tasks.append(asyncio.create_task(read()))
+
+    await asyncio.sleep(duration_seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    return latencies
+
+
+async def run(base_url: str, submitters: int, duration_seconds: float):
+    token = create_access_token({"sub": "A"})
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=300,
+    ) as client:
+        institutions = await client.get("/api/v1/medical_institution")
+        adr = ADRPostRequest(
+            **EDGE_CASE_ADR,
+            inpatient_or_outpatient_number="BENCH-1",
+            medical_institution_id=institutions.json()["items"][0]["id"],
+        ).model_dump(mode="json")
+
+        idle = await measure_reads(client, adr, 0, duration_seconds)
+        print(f"  GET /api/v1/adr idle:               {percentiles(idle)}")
+
+        busy = await measure_reads(client, adr, submitters, duration_seconds)
+        print(f"  GET /api/v1/adr with {submitters} submitters: {percentiles(busy)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--submitters", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    for pool_size in args.pool_sizes:
+        print(f"inference_pool_size={pool_size}")
+
+        server = start_server(args.port, pool_size)
+        try:
+            wait_until_up(base_url, args.startup_timeout)
+            asyncio.run(run(base_url, args.submitters, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
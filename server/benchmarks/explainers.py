@@ -0,0 +1,90 @@
+"""
+Latency and fidelity of each explainer engine.
+
+Holds out a sample of data.csv, builds every engine the loaded model supports
+on the remaining rows, and explains the held-out rows. Deviation is measured
+against the kernel engine at the standard tier, which is what the server used
+before engines were pluggable. Additivity error is how far base values plus SHAP values are from
+predict_proba.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.explainers --sample-size 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from background import Background
+from explainers import ENGINE_CLASSES, KMEANS_CLUSTERS, KernelEngine
+from features import input_to_prediction_format
+
+ADR_CSV_PATH = "data.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample-size", type=int, default=20)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    features = input_to_prediction_format(pd.read_csv(ADR_CSV_PATH), artifacts)
+
+    held_out = features.sample(
+        n=min(args.sample_size, len(features) // 5), random_state=0
+    )
+    background = features.drop(held_out.index)
+    probabilities = artifacts.ml_model.predict_proba(held_out)
+
+    print(
+        f"model {type(artifacts.ml_model).__name__}, {len(background)} background "
+        f"rows, {len(held_out)} held-out rows, {features.shape[1]} features"
+    )
+
+    summary = Background.from_frame(background, KMEANS_CLUSTERS)
+    reference = KernelEngine(artifacts, summary)(held_out)
+
+    print(
+        f"{'engine':<12} {'build s':>8} {'ms/row':>9} {'max |dev|':>10} "
+        f"{'mean |dev|':>11} {'top match':>10} {'additivity':>11}"
+    )
+
+    for name, engine_class in ENGINE_CLASSES.items():
+        try:
+            start = time.perf_counter()
+            engine = engine_class(artifacts, summary)
+            build_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"{name:<12} not supported: {e}")
+            continue
+
+        start = time.perf_counter()
+        explanation = engine(held_out)
+        ms_per_row = (time.perf_counter() - start) * 1000 / len(held_out)
+
+        assert explanation.values.shape == reference.values.shape, name
+        assert explanation.base_values.shape == reference.base_values.shape, name
+
+        deviation = np.abs(explanation.values - reference.values)
+
+        # Share of (row, class) pairs whose most influential feature matches
+        top_match = np.mean(
+            np.abs(explanation.values).argmax(axis=1)
+            == np.abs(reference.values).argmax(axis=1)
+        )
+
+        additivity = np.abs(
+            explanation.values.sum(axis=1) + explanation.base_values - probabilities
+        ).max()
+
+        print(
+            f"{name:<12} {build_seconds:>8.2f} {ms_per_row:>9.2f} {deviation.max():>10.4f} "
+            f"{deviation.mean():>11.4f} {top_match:>10.0%} {additivity:>11.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
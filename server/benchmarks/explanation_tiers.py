@@ -0,0 +1,91 @@
+"""
+Latency and accuracy of each explanation tier.
+
+Holds out a sample of data.csv and explains it with the kernel engine at
+every tier, against a background summarized from the remaining rows.
+Additivity error is how far base values plus SHAP values are from
+predict_proba. Deviation is measured against the precise tier, and against
+the exact tree engine when the model supports it.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.explanation_tiers --sample-size 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from background import Background
+from basemodels import ExplanationTierEnum
+from explainers import EXPLANATION_TIERS, KMEANS_CLUSTERS, KernelEngine, TreeEngine
+from features import input_to_prediction_format
+
+ADR_CSV_PATH = "data.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample-size", type=int, default=20)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    features = input_to_prediction_format(pd.read_csv(ADR_CSV_PATH), artifacts)
+
+    held_out = features.sample(
+        n=min(args.sample_size, len(features) // 5), random_state=0
+    )
+    summary = Background.from_frame(features.drop(held_out.index), KMEANS_CLUSTERS)
+    probabilities = artifacts.ml_model.predict_proba(held_out)
+
+    print(
+        f"model {type(artifacts.ml_model).__name__}, {len(held_out)} held-out rows, "
+        f"{features.shape[1]} features"
+    )
+
+    engine = KernelEngine(artifacts, summary)
+
+    explanations = {}
+    milliseconds = {}
+    for tier in ExplanationTierEnum:
+        start = time.perf_counter()
+        explanations[tier] = engine(held_out, tier)
+        milliseconds[tier] = (time.perf_counter() - start) * 1000 / len(held_out)
+
+    try:
+        exact = TreeEngine(artifacts, summary)(held_out)
+    except Exception as e:
+        print(f"no exact reference, tree engine not supported: {e}")
+        exact = None
+
+    print(
+        f"{'tier':<10} {'nsamples':>8} {'clusters':>8} {'l1_reg':>17} {'ms/row':>9} "
+        f"{'additivity':>11} {'dev precise':>12} {'dev exact':>10}"
+    )
+
+    precise = explanations[ExplanationTierEnum.precise]
+    for tier, explanation in explanations.items():
+        parameters = EXPLANATION_TIERS[tier]
+
+        additivity = np.abs(
+            explanation.values.sum(axis=1) + explanation.base_values - probabilities
+        ).max()
+        deviation_precise = np.abs(explanation.values - precise.values).mean()
+        deviation_exact = (
+            f"{np.abs(explanation.values - exact.values).mean():>10.4f}"
+            if exact is not None
+            else f"{'-':>10}"
+        )
+
+        print(
+            f"{tier.value:<10} {str(parameters.nsamples):>8} "
+            f"{parameters.kmeans_clusters:>8} {str(parameters.l1_reg):>17} "
+            f"{milliseconds[tier]:>9.2f} {additivity:>11.4f} "
+            f"{deviation_precise:>12.4f} {deviation_exact}"
+        )
+
+
+if __name__ == "__main__":
+    main()
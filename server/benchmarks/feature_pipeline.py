@@ -0,0 +1,154 @@
+"""
+Parity check and timings for the compiled feature transform.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.feature_pipeline
+
+Exits with status 1 when the compiled transform does not reproduce
+input_to_prediction_format exactly, apart from ages missing along with the
+date of birth, which it fills with the training median.
+"""
+
+import datetime
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from basemodels import ADRPostRequest
+from features import input_to_prediction_format
+
+ADR_CSV_PATH = "data.csv"
+
+EDGE_CASE_ADR = {
+    "patient_name": "Edge Case",
+    "patient_age": 34,
+    "patient_weight_kg": 60.5,
+    "patient_height_cm": 165,
+    "patient_gender": "female",
+    "pregnancy_status": "not pregnant",
+    "known_allergy": "no",
+    "date_of_onset_of_reaction": datetime.date(2024, 5, 1),
+    "rifampicin_suspected": True,
+    "rifampicin_start_date": datetime.date(2024, 3, 1),
+    "rifampicin_stop_date": datetime.date(2024, 4, 20),
+    "isoniazid_suspected": False,
+    "rechallenge": "yes",
+    "dechallenge": "yes",
+    "severity": "fatal",
+    "is_serious": "yes",
+    "criteria_for_seriousness": "hospitalisation",
+}
+
+EDGE_CASE_UPDATES = [
+    {},
+    {"patient_weight_kg": None},
+    {"patient_height_cm": None},
+    {"patient_age": None},
+    {"patient_age": None, "patient_date_of_birth": datetime.date(1990, 2, 3)},
+    {"rifampicin_suspected": None, "isoniazid_suspected": None},
+    {"pyrazinamide_suspected": True, "ethambutol_suspected": True},
+    {"date_of_onset_of_reaction": None},
+    {"rifampicin_stop_date": None},
+    {"rechallenge": "unknown", "dechallenge": "na", "severity": "mild"},
+]
+
+
+def time_per_call(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def same(reference: pd.DataFrame, compiled: np.ndarray) -> bool:
+    return np.array_equal(
+        reference.to_numpy(dtype=np.float64), compiled, equal_nan=True
+    )
+
+
+def reference_features(input_df: pd.DataFrame, artifacts) -> pd.DataFrame:
+    """input_to_prediction_format, with the ages filled from the training median."""
+    unknown_age = (
+        input_df["patient_age"].isnull() & input_df["patient_date_of_birth"].isnull()
+    )
+    input_df.loc[unknown_age, "patient_age"] = artifacts.column_metadata[
+        "patient_age_median"
+    ]
+    return input_to_prediction_format(input_df, artifacts)
+
+
+def main() -> int:
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    transform = artifacts.feature_transform
+    data_df = pd.read_csv(ADR_CSV_PATH)
+    records = data_df.to_dict(orient="records")
+
+    failures = 0
+
+    # Whole file as one batch
+    if not same(
+        reference_features(data_df.copy(), artifacts), transform.transform(records)
+    ):
+        print("MISMATCH: data.csv as one batch")
+        failures += 1
+
+    # Every row on its own, the way requests arrive
+    for i, record in enumerate(records):
+        if not same(
+            reference_features(pd.DataFrame([record]), artifacts),
+            transform.transform([record]),
+        ):
+            print(f"MISMATCH: data.csv row {i}")
+            failures += 1
+
+    # Validated requests, including missing values
+    adrs = [
+        ADRPostRequest(**{**EDGE_CASE_ADR, **update}) for update in EDGE_CASE_UPDATES
+    ]
+    for adr, update in zip(adrs, EDGE_CASE_UPDATES):
+        if not same(
+            reference_features(pd.DataFrame([adr.model_dump()]), artifacts),
+            transform.transform([adr]),
+        ):
+            print(f"MISMATCH: ADRPostRequest with {update}")
+            failures += 1
+
+    if not same(
+        reference_features(
+            pd.DataFrame([adr.model_dump() for adr in adrs]), artifacts
+        ),
+        transform.transform(adrs),
+    ):
+        print("MISMATCH: ADRPostRequest batch")
+        failures += 1
+
+    print(f"Parity: {'OK' if failures == 0 else f'{failures} mismatches'}")
+
+    # Timings
+    adr = adrs[0]
+    pandas_seconds = time_per_call(
+        lambda: input_to_prediction_format(pd.DataFrame([adr.model_dump()]), artifacts),
+        200,
+    )
+    compiled_seconds = time_per_call(lambda: transform.transform([adr]), 2000)
+    print(
+        f"Single row: pandas {pandas_seconds * 1e6:.0f} us, "
+        f"compiled {compiled_seconds * 1e6:.0f} us"
+    )
+
+    for batch_size in [1, 10, 100, 1000]:
+        batch = (records * (batch_size // len(records) + 1))[:batch_size]
+        seconds = time_per_call(lambda: transform.transform(batch), 20)
+        print(
+            f"Batch {batch_size:>5}: {seconds * 1e3:8.3f} ms, "
+            f"{seconds / batch_size * 1e6:7.1f} us per row"
+        )
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
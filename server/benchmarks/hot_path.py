@@ -0,0 +1,219 @@
+"""
+Timings of each step of scoring an ADR, at batch sizes 1, 10, 100 and 1000.
+
+Batches are synthetic ADRs: every column is drawn from its distribution in
+data.csv, missing values included, with each drug's columns drawn together
+so its dates and doses stay consistent. Results are written as JSON. Given a
+baseline from an earlier run, every step whose median time per row got
+slower by more than the threshold is flagged.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.hot_path --output hot_path.json
+    python -m benchmarks.hot_path --baseline hot_path.json --threshold 0.2
+
+Exits with status 1 when a regression is flagged.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import shap
+import sklearn
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from background import Background
+from basemodels import ExplanationTierEnum
+from config import settings
+from explainers import KMEANS_CLUSTERS, build_engine
+from features import DRUG_NAMES, input_to_prediction_format
+from scoring import explanation_arrays, explanation_rows, format_feature_values
+
+ADR_CSV_PATH = "data.csv"
+BATCH_SIZES = [1, 10, 100, 1000]
+
+# Seconds spent timing each step at each batch size, at least MIN_REPEAT runs
+TIME_BUDGET_SECONDS = 2
+MIN_REPEAT = 3
+MAX_REPEAT = 200
+
+
+def synthetic_adrs(data_df: pd.DataFrame, n: int, seed: int) -> pd.DataFrame:
+    """n ADRs drawn from the per-column distributions of data_df."""
+    rng = np.random.default_rng(seed)
+
+    groups = [
+        [column for column in data_df.columns if column.startswith(f"{drug}_")]
+        for drug in DRUG_NAMES
+    ]
+    grouped = {column for group in groups for column in group}
+    groups += [[column] for column in data_df.columns if column not in grouped]
+
+    synthetic = {}
+    for group in groups:
+        rows = rng.integers(0, len(data_df), n)
+        for column in group:
+            synthetic[column] = data_df[column].to_numpy()[rows]
+
+    return pd.DataFrame(synthetic, columns=data_df.columns)
+
+
+def time_step(function, repeat: int | None = None) -> dict:
+    """Median and min milliseconds of function over repeated runs."""
+    timings = []
+    deadline = time.perf_counter() + TIME_BUDGET_SECONDS
+
+    while len(timings) < (repeat or MAX_REPEAT):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+
+        if repeat is None and len(timings) >= MIN_REPEAT and time.perf_counter() > deadline:
+            break
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "repeat": len(timings),
+    }
+
+
+def run(sizes, seed: int, explain_max_size: int) -> dict:
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    data_df = pd.read_csv(ADR_CSV_PATH)
+
+    features = input_to_prediction_format(data_df.copy(), artifacts)
+    explainer = build_engine(
+        settings.explainer_engine,
+        artifacts,
+        Background.from_frame(features, KMEANS_CLUSTERS),
+    )
+    model = artifacts.runtime_model
+    tier = ExplanationTierEnum(settings.explanation_tier)
+
+    results = {}
+    for size in sizes:
+        adrs_df = synthetic_adrs(data_df, size, seed)
+        records = adrs_df.to_dict(orient="records")
+        prediction_input = artifacts.feature_transform.transform_frame(records)
+
+        steps = {
+            "input_to_prediction_format": lambda: input_to_prediction_format(
+                adrs_df.copy(), artifacts
+            ),
+            "feature_transform": lambda: artifacts.feature_transform.transform(records),
+            "predict": lambda: model.predict(prediction_input),
+            "predict_proba": lambda: model.predict_proba(prediction_input),
+        }
+
+        # Explaining is by far the slowest step, so large batches are optional
+        shap_values = explainer(prediction_input.iloc[:explain_max_size], tier)
+        if size <= explain_max_size:
+            steps["explainer"] = lambda: explainer(prediction_input, tier)
+
+        steps["explanation_rows"] = lambda: explanation_rows(
+            explanation_arrays(shap_values)
+        )
+        steps["format_feature_values"] = lambda: format_feature_values(
+            prediction_input.to_numpy(), artifacts
+        )
+
+        for name, step in steps.items():
+            result = time_step(step)
+            # The explanation rows may cover fewer rows than the batch
+            rows = len(shap_values.values) if name == "explanation_rows" else size
+            result["per_row_ms"] = result["median_ms"] / rows
+            results[f"{name}/{size}"] = result
+
+            print(
+                f"{name:<28} {size:>5} {result['median_ms']:>10.3f} ms "
+                f"{result['per_row_ms']:>9.4f} ms/row  (n={result['repeat']})"
+            )
+
+    return {
+        "metadata": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "shap": shap.__version__,
+            "model": type(artifacts.ml_model).__name__,
+            "model_version": artifacts.version,
+            "explainer": explainer.name,
+            "explanation_tier": tier.value,
+            "inference_backend": settings.inference_backend,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Print changes per row against the baseline, return how many regressed."""
+    regressions = 0
+
+    print(f"\n{'step':<34} {'baseline ms/row':>16} {'current ms/row':>15} {'change':>8}")
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+
+        before = baseline["results"][key]["per_row_ms"]
+        after = result["per_row_ms"]
+        change = after / before - 1 if before else 0.0
+
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+
+        print(f"{key:<34} {before:>16.4f} {after:>15.4f} {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--explain-max-size",
+        type=int,
+        default=max(BATCH_SIZES),
+        help="Largest batch the explainer is timed on",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Slowdown per row, as a fraction, that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    current = run(args.sizes, args.seed, args.explain_max_size)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+
+    regressions = compare(current, baseline, args.threshold)
+    print(f"{regressions} regressions beyond {args.threshold:.0%}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Latency of a medical institution search with the ilike filters
+GET /api/v1/medical_institution used to run and with the typeahead index,
+for queries as they are typed into the institution form.
+
+Loads medical_institutions.csv into a scratch database, then times every
+prefix of --queries names of random institutions, some with a typo, and
+their codes, and how often the institution is on the first page.
+
+Run from the server directory (a scratch database is created and deleted
+there):
+
+    python -m benchmarks.institution_typeahead --queries 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import pandas as pd
+from engines import build_engine
+from models import Base, MedicalInstitutionModel
+from sqlalchemy import desc
+from sqlalchemy.orm import sessionmaker
+from typeahead import InstitutionTypeahead, institution_record
+
+DB_PATH = "benchmark_typeahead.sqlite"
+URL = f"sqlite:///{DB_PATH}"
+CSV_PATH = "medical_institutions.csv"
+PAGE_SIZE = 50
+
+
+def fill(Session):
+    """Insert the institutions of the facility list."""
+    institutions = pd.read_csv(CSV_PATH).to_dict(orient="records")
+
+    with Session() as session:
+        session.add_all(
+            MedicalInstitutionModel(
+                mfl_code=record["MFL Code"],
+                dhis_code=record["DHIS Code"],
+                name=record["Name"],
+                county=record["County"],
+                sub_county=record["Subcounty"],
+            )
+            for record in institutions
+        )
+        session.commit()
+
+
+def typo(word: str) -> str:
+    """`word` with two neighbouring letters swapped."""
+    if len(word) < 4:
+        return word
+    i = random.randrange(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def keystrokes(institutions) -> list:
+    """
+    Queries the form sends while names and codes are typed, with the id of
+    the institution being looked for.
+    """
+    queries = []
+    for institution in institutions:
+        name = institution.name.lower()
+        if random.random() < 0.3:
+            name = " ".join(typo(word) for word in name.split())
+        queries += [
+            (name[:length], institution.id) for length in range(2, len(name) + 1)
+        ]
+        queries.append((institution.mfl_code, institution.id))
+    return queries
+
+
+def search_ilike(Session, query: str) -> list:
+    """Ids of the first page of institutions matching `query`."""
+    with Session() as session:
+        content = session.query(MedicalInstitutionModel.id).filter(
+            MedicalInstitutionModel.name.ilike(f"%{query}%")
+            | MedicalInstitutionModel.county.ilike(f"%{query}%")
+            | MedicalInstitutionModel.sub_county.ilike(f"%{query}%")
+        )
+        content.count()
+        page = content.order_by(desc(MedicalInstitutionModel.created_at)).limit(
+            PAGE_SIZE
+        )
+        return [institution_id for (institution_id,) in page]
+
+
+def search_typeahead(typeahead: InstitutionTypeahead, query: str) -> list:
+    """Ids of the first page of institutions matching `query`."""
+    return [
+        institution["id"] for institution in typeahead.search(query)[:PAGE_SIZE]
+    ]
+
+
+def measure(search, queries) -> tuple:
+    """
+    Median and 99th percentile milliseconds, and the share of queries with
+    the institution looked for on the first page.
+    """
+    latencies, found = [], 0
+
+    for query, institution_id in queries:
+        start = time.perf_counter()
+        found += institution_id in search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return (
+        statistics.median(latencies),
+        statistics.quantiles(latencies, n=100)[98],
+        found / len(queries),
+    )
+
+
+def remove_database():
+    for path in [DB_PATH, f"{DB_PATH}-wal", f"{DB_PATH}-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    remove_database()
+    engine = build_engine(URL)
+    Session = sessionmaker(bind=engine)
+
+    try:
+        Base.metadata.create_all(engine)
+        fill(Session)
+
+        with Session() as session:
+            institutions = session.query(MedicalInstitutionModel).all()
+
+        start = time.perf_counter()
+        typeahead = InstitutionTypeahead()
+        typeahead.rebuild(institution_record(row) for row in institutions)
+        print(
+            f"indexed {len(institutions)} institutions in"
+            f" {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+        queries = keystrokes(random.sample(institutions, args.queries))
+        searches = [
+            ("ilike", lambda query: search_ilike(Session, query)),
+            ("typeahead", lambda query: search_typeahead(typeahead, query)),
+        ]
+
+        print(f"{len(queries)} queries")
+        print(f"{'search':<10} {'p50 ms':>8} {'p99 ms':>8} {'found':>7}")
+        for name, search in searches:
+            p50, p99, found = measure(search, queries)
+            print(f"{name:<10} {p50:>8.2f} {p99:>8.2f} {found:>7.0%}")
+    finally:
+        engine.dispose()
+        remove_database()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Latency of deep pages of GET /api/v1/adr read with OFFSET, as every list did,
+and after a cursor, see pagination.py.
+
+Fills a scratch database with --size made up ADRs and the (created_at, id)
+index from migrations.py, then times each of --pages read both ways.
+
+Run from the server directory (a scratch database is created and deleted
+there):
+
+    python -m benchmarks.keyset_pagination --size 1000000 --pages 1,10,100,1000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import time
+
+from benchmarks.adr_search import adr
+from engines import build_engine
+from migrations import KEYSET_INDEXES
+from models import ADRModel, Base
+from pagination import decode_cursor, encode_cursor, older_than
+from sqlalchemy import desc
+from sqlalchemy.orm import sessionmaker
+
+DB_PATH = "benchmark_keyset.sqlite"
+URL = f"sqlite:///{DB_PATH}"
+PAGE_SIZE = 50
+REPEATS = 20
+
+
+def fill(size: int):
+    """Insert `size` made up ADRs."""
+    engine = build_engine(URL)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    connection = sqlite3.connect(DB_PATH)
+    columns = list(adr())
+    insert = (
+        f"INSERT INTO adr ({', '.join(columns)})"
+        f" VALUES ({', '.join(':' + column for column in columns)})"
+    )
+
+    for start in range(0, size, 10000):
+        rows = [adr() for _ in range(min(10000, size - start))]
+        # Timestamps as SQLAlchemy stores them, many ADRs share a day
+        for row in rows:
+            row["created_at"] += " 00:00:00.000000"
+        connection.executemany(insert, rows)
+    connection.commit()
+
+    for statement in KEYSET_INDEXES:
+        connection.execute(statement)
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+
+
+def newest_first(session):
+    return session.query(ADRModel).order_by(
+        desc(ADRModel.created_at), desc(ADRModel.id)
+    )
+
+
+def read_offset(session, page: int, cursor: str):
+    return newest_first(session).offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE).all()
+
+
+def read_cursor(session, page: int, cursor: str):
+    key = [ADRModel.created_at, ADRModel.id]
+    return (
+        newest_first(session)
+        .filter(older_than(key, decode_cursor(cursor)))
+        .limit(PAGE_SIZE)
+        .all()
+    )
+
+
+def measure(Session, read, page: int, cursor: str) -> float:
+    """Median milliseconds to read the page."""
+    latencies = []
+
+    for _ in range(REPEATS):
+        with Session() as session:
+            start = time.perf_counter()
+            read(session, page, cursor)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(latencies)
+
+
+def remove_database():
+    for path in [DB_PATH, f"{DB_PATH}-wal", f"{DB_PATH}-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--pages", default="1,10,100,1000")
+    args = parser.parse_args()
+
+    random.seed(0)
+    remove_database()
+    engine = None
+
+    try:
+        fill(args.size)
+        engine = build_engine(URL)
+        Session = sessionmaker(bind=engine)
+
+        print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+        for page in [int(page) for page in args.pages.split(",")]:
+            # The cursor the client has from the page before
+            with Session() as session:
+                before = newest_first(session).offset((page - 1) * PAGE_SIZE - 1)
+                last = before.first() if page > 1 else None
+            cursor = encode_cursor(
+                [last.created_at, last.id] if last else ["9999-12-31", ""]
+            )
+
+            offset_ms = measure(Session, read_offset, page, cursor)
+            cursor_ms = measure(Session, read_cursor, page, cursor)
+            print(f"{page:>6} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+    finally:
+        if engine is not None:
+            engine.dispose()
+        remove_database()
+
+
+if __name__ == "__main__":
+    main()
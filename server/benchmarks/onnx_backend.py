@@ -0,0 +1,73 @@
+"""
+Parity and latency of the ONNX Runtime backend against sklearn.
+
+Converts the loaded model, checks predict and predict_proba agree with
+sklearn on every row of data.csv, and times both backends at batch sizes
+1, 32 and 1024. Needs requirements-onnx.txt installed.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.onnx_backend
+
+Exits with status 1 when the model does not convert or its outputs differ.
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from onnx_backend import PARITY_TOLERANCE, convert_classifier
+
+ADR_CSV_PATH = "data.csv"
+BATCH_SIZES = [1, 32, 1024]
+
+
+def milliseconds_per_call(function, rows, repeat: int) -> float:
+    function(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(rows)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    features = artifacts.feature_transform.transform_frame(
+        pd.read_csv(ADR_CSV_PATH).to_dict(orient="records")
+    )
+    model = artifacts.ml_model
+
+    onnx_model = convert_classifier(model, features)
+    if onnx_model is None:
+        print(f"{type(model).__name__} could not be converted, see the log")
+        sys.exit(1)
+
+    deviation = np.abs(onnx_model.predict_proba(features) - model.predict_proba(features))
+    label_match = np.mean(onnx_model.predict(features) == model.predict(features))
+
+    print(
+        f"model {type(model).__name__}, {len(features)} rows, "
+        f"max |dev| {deviation.max():.2e} (tolerance {PARITY_TOLERANCE:.0e}), "
+        f"labels match {label_match:.2%}"
+    )
+
+    print(f"{'batch':>6} {'method':<14} {'sklearn ms':>11} {'onnx ms':>9} {'speedup':>8}")
+    for batch_size in BATCH_SIZES:
+        # Repeat rows when data.csv is smaller than the batch
+        rows = features.iloc[np.arange(batch_size) % len(features)]
+        repeat = max(5, 2048 // batch_size)
+
+        for method in ["predict", "predict_proba"]:
+            sklearn_ms = milliseconds_per_call(getattr(model, method), rows, repeat)
+            onnx_ms = milliseconds_per_call(getattr(onnx_model, method), rows, repeat)
+
+            print(
+                f"{batch_size:>6} {method:<14} {sklearn_ms:>11.3f} {onnx_ms:>9.3f} "
+                f"{sklearn_ms / onnx_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
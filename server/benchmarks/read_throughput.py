@@ -0,0 +1,137 @@
+"""
+Requests per second of the read endpoints under concurrent clients.
+
+Starts the server with uvicorn, then for each endpoint keeps --clients
+clients sending requests back to back for --duration seconds. When the
+handlers query the database synchronously from the event loop, concurrent
+requests wait on each other's queries.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.read_throughput --clients 32
+
+--app-dir starts the server from another checkout, such as a worktree of an
+older commit, to get the before numbers with the same client.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+from auth import create_access_token
+from benchmarks.event_loop_latency import wait_until_up
+
+
+def start_server(port: int, app_dir: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+        cwd=app_dir,
+        env=dict(os.environ, PYTHONPATH=app_dir),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def endpoints(client: httpx.AsyncClient) -> dict:
+    """Paths to read, with ids of rows the server seeded."""
+    institution_id = (
+        await client.get("/api/v1/medical_institution", params={"size": 1})
+    ).json()["items"][0]["id"]
+    review = (await client.get("/api/v1/review", params={"size": 1})).json()[
+        "items"
+    ][0]
+    level_id = review["causality_assessment_level_id"]
+
+    return {
+        "users/me": "/api/v1/users/me",
+        "review list": "/api/v1/review?size=20",
+        "level reviews": f"/api/v1/causality_assessment_level/{level_id}/review",
+        "institution list": "/api/v1/medical_institution?size=20",
+        "institution": f"/api/v1/medical_institution/{institution_id}",
+        "level": f"/api/v1/causality_assessment_level/{level_id}",
+        "level summary": f"/api/v1/causality_assessment_level/{level_id}?summary=true",
+        "sms list": "/api/v1/sms_message?size=20",
+    }
+
+
+async def measure(
+    client: httpx.AsyncClient, path: str, clients: int, duration_seconds: float
+) -> tuple:
+    """Requests per second and latencies of `clients` clients reading `path`."""
+    deadline = time.perf_counter() + duration_seconds
+    latencies = []
+    failures = 0
+
+    async def read():
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+            except httpx.TransportError:
+                failures += 1
+                continue
+            if response.is_success:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+
+    await asyncio.gather(*[read() for _ in range(clients)])
+
+    return len(latencies) / duration_seconds, latencies, failures
+
+
+async def run(base_url: str, clients: int, duration_seconds: float):
+    token = create_access_token({"sub": "A"})
+    limits = httpx.Limits(max_connections=clients)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=300,
+        limits=limits,
+    ) as client:
+        print(f"{'endpoint':<18} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+
+        for name, path in (await endpoints(client)).items():
+            # Warm up the connections and any caches first
+            await measure(client, path, clients, 1)
+
+            rps, latencies, failures = await measure(
+                client, path, clients, duration_seconds
+            )
+            p50, p99 = (
+                np.percentile(np.array(latencies) * 1000, [50, 99])
+                if latencies
+                else (np.nan, np.nan)
+            )
+            print(f"{name:<18} {rps:>8.1f} {p50:>8.1f} {p99:>8.1f} {failures:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--app-dir", default=".")
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    server = start_server(args.port, os.path.abspath(args.app_dir))
+    try:
+        wait_until_up(base_url, args.startup_timeout)
+        asyncio.run(run(base_url, args.clients, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+The HTTP predictor against the local stand-in inference server.
+
+Starts stand_in_inference_server.py, checks the HTTP predictor returns the
+same predictions as the in-process one on data.csv, times both at a few
+batch sizes and concurrency levels, then stops the server and checks the
+circuit opens after failure_threshold calls.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python -m benchmarks.remote_predictor
+
+Point --url at a real MLflow inference server to skip the stand-in.
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from predictors import HTTPPredictor, InProcessPredictor, PredictorUnavailable
+
+ADR_CSV_PATH = "data.csv"
+BATCH_SIZES = [1, 32, 256]
+CONCURRENCY = [1, 8]
+FAILURE_THRESHOLD = 3
+
+
+def start_stand_in(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "stand_in_inference_server.py", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+
+    process.kill()
+    raise TimeoutError("The stand-in inference server did not start")
+
+
+async def milliseconds_per_batch(predictor, artifacts, rows, concurrency: int) -> float:
+    await predictor.predict(artifacts, rows)
+
+    repeat = max(5, 512 // len(rows))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.gather(
+            *[predictor.predict(artifacts, rows) for _ in range(concurrency)]
+        )
+    return (time.perf_counter() - start) * 1000 / (repeat * concurrency)
+
+
+async def run(url: str, stand_in: subprocess.Popen | None):
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    features = artifacts.feature_transform.transform(
+        pd.read_csv(ADR_CSV_PATH).to_dict(orient="records")
+    )
+
+    local = InProcessPredictor()
+    remote = HTTPPredictor(
+        url,
+        timeout_seconds=5,
+        max_connections=16,
+        max_batch_rows=256,
+        failure_threshold=FAILURE_THRESHOLD,
+        reset_seconds=30,
+    )
+
+    expected = await local.predict(artifacts, features)
+    actual = await remote.predict(artifacts, features)
+    print(f"{len(features)} rows, predictions match {np.mean(expected == actual):.2%}")
+
+    print(f"{'batch':>6} {'clients':>8} {'in-process ms':>14} {'http ms':>9}")
+    for batch_size in BATCH_SIZES:
+        rows = features[np.arange(batch_size) % len(features)]
+        for concurrency in CONCURRENCY:
+            local_ms = await milliseconds_per_batch(local, artifacts, rows, concurrency)
+            remote_ms = await milliseconds_per_batch(remote, artifacts, rows, concurrency)
+            print(f"{batch_size:>6} {concurrency:>8} {local_ms:>14.2f} {remote_ms:>9.2f}")
+
+    if stand_in is not None:
+        stand_in.terminate()
+        stand_in.wait()
+
+        outcomes = []
+        for _ in range(FAILURE_THRESHOLD + 2):
+            start = time.perf_counter()
+            try:
+                await remote.predict(artifacts, features[:1])
+                outcome = "ok"
+            except PredictorUnavailable as e:
+                outcome = "open" if "Circuit" in str(e) else "failed"
+            outcomes.append(f"{outcome} {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        print(f"after stopping the server: {', '.join(outcomes)}")
+
+    await remote.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=5002)
+    parser.add_argument("--url")
+    args = parser.parse_args()
+
+    stand_in = None
+    url = args.url
+    if url is None:
+        stand_in = start_stand_in(args.port)
+        url = f"http://127.0.0.1:{args.port}/invocations"
+
+    try:
+        asyncio.run(run(url, stand_in))
+    finally:
+        if stand_in is not None:
+            stand_in.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Database size and causality assessment level detail latency with SHAP values
+stored as JSON and as float32 blobs.
+
+Saves --rows levels explained from data.csv as JSON, times reading them back
+the way the detail endpoint does, converts them with migrate_shap_storage,
+and does the same again. Checks the binary values match the JSON ones to
+float32 precision.
+
+Run from the server directory, with the model artifacts downloaded and no
+db.sqlite (it is created and deleted):
+
+    python -m benchmarks.shap_storage
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from basemodels import ExplanationTierEnum
+from engines import engine
+from migrate_shap_storage import migrate_shap_storage
+from models import Base, CausalityAssessmentLevelModel
+from scoring import build_explainer, score_features
+from sessions import Session
+from shap_storage import SHAP_COLUMNS, explanation_content
+from sqlalchemy import text
+from sqlalchemy.orm import undefer_group
+
+DB_PATH = "db.sqlite"
+ADR_CSV_PATH = "data.csv"
+
+
+def database_bytes() -> int:
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as connection:
+        connection.execute(text("VACUUM"))
+    return os.path.getsize(DB_PATH)
+
+
+def read_details(cal_ids) -> tuple:
+    """Milliseconds per level to load and decode each one, and the contents."""
+    contents = []
+    start = time.perf_counter()
+
+    for cal_id in cal_ids:
+        with Session() as session:
+            causality_assessment_level = (
+                session.query(CausalityAssessmentLevelModel)
+                .options(undefer_group("explanation"))
+                .filter(CausalityAssessmentLevelModel.id == cal_id)
+                .first()
+            )
+            contents.append(explanation_content(causality_assessment_level))
+
+    return (time.perf_counter() - start) * 1000 / len(cal_ids), contents
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    if os.path.exists(DB_PATH):
+        sys.exit(f"{DB_PATH} exists, run this where it can be created and deleted")
+
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    features = artifacts.feature_transform.transform(
+        pd.read_csv(ADR_CSV_PATH).to_dict(orient="records")
+    )
+    explainer = build_explainer(artifacts, ADR_CSV_PATH)
+    assessments = score_features(
+        artifacts, explainer, features, ExplanationTierEnum.standard
+    )
+
+    try:
+        Base.metadata.create_all(engine)
+
+        mappings = [
+            {
+                **assessments[i % len(assessments)],
+                "id": str(uuid.uuid4()),
+                "adr_id": str(uuid.uuid4()),
+            }
+            for i in range(args.rows)
+        ]
+        with Session() as session:
+            session.bulk_insert_mappings(CausalityAssessmentLevelModel, mappings)
+            session.commit()
+
+        cal_ids = [mapping["id"] for mapping in mappings[: args.reads]]
+
+        json_bytes = database_bytes()
+        json_ms, json_contents = read_details(cal_ids)
+
+        migrate_shap_storage("binary")
+
+        binary_bytes = database_bytes()
+        binary_ms, binary_contents = read_details(cal_ids)
+
+        max_difference = max(
+            np.max(
+                np.abs(
+                    np.asarray(json_content[column])
+                    - np.asarray(binary_content[column])
+                )
+            )
+            for json_content, binary_content in zip(json_contents, binary_contents)
+            for column in SHAP_COLUMNS
+        )
+
+        print(f"{'format':<8} {'db MB':>8} {'detail ms':>10}")
+        print(f"{'json':<8} {json_bytes / 2**20:>8.2f} {json_ms:>10.3f}")
+        print(f"{'binary':<8} {binary_bytes / 2**20:>8.2f} {binary_ms:>10.3f}")
+        print(f"{args.rows} levels, largest difference {max_difference:.2e}")
+
+    finally:
+        engine.dispose()
+        os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
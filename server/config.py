@@ -17,6 +17,89 @@ class Settings(BaseSettings):
     mlflow_model_name: str
     mlflow_model_alias: str
     mlflow_model_artifacts_path: str
+    # Alias of a challenger model scored in the shadow of the champion, empty
+    # disables shadow scoring
+    mlflow_challenger_model_alias: str = ""
+    # ADRs waiting for the challenger before new ones are dropped
+    shadow_queue_depth: int = 256
+    shadow_batch_size: int = 32
+    # Seconds between checks for a moved model alias, 0 disables hot-swapping
+    mlflow_model_refresh_interval_seconds: int = 0
+    # Worker processes for predict and SHAP, 0 runs them in a thread instead
+    inference_pool_size: int = 2
+    # Requests allowed in or waiting for inference before answering 503
+    inference_queue_depth: int = 64
+    # Concurrent ADRs are scored together, up to this many per batch
+    inference_batch_max_size: int = 32
+    # Milliseconds a request waits for others to join its batch
+    inference_batch_max_wait_ms: float = 5
+    # sklearn, or onnx to predict with ONNX Runtime, falling back to sklearn
+    # when the model does not convert or differs from sklearn on data.csv.
+    # onnx needs pip install -r requirements-onnx.txt
+    inference_backend: str = "sklearn"
+    # local predicts in the inference workers, http calls /invocations on the
+    # MLflow inference server and falls back to local when it fails or its
+    # X-Model-Version response header is not the version being scored with
+    inference_predictor: str = "local"
+    # mlflow models serve sends no X-Model-Version, require it only when a
+    # proxy in front of the server adds it
+    inference_predictor_require_version: bool = False
+    inference_predictor_timeout_seconds: float = 2
+    inference_predictor_max_connections: int = 16
+    # Larger batches are split into concurrent calls of at most this many rows
+    inference_predictor_max_batch_rows: int = 256
+    # Failed calls in a row before the server is left alone for reset_seconds
+    inference_predictor_failure_threshold: int = 5
+    inference_predictor_reset_seconds: float = 30
+    # auto, tree, linear, permutation or kernel. auto picks tree or kernel,
+    # which explain probabilities, linear explains the margin
+    explainer_engine: str = "auto"
+    # Summarized SHAP backgrounds, kept outside the artifacts that are deleted
+    # on shutdown so restarts can reuse them
+    explainer_cache_path: str = "explainer_cache"
+    # sync explains before responding, deferred saves the prediction first and
+    # explains in the background
+    explanation_mode: str = "sync"
+    explanation_batch_size: int = 8
+    # fast, standard or precise, how much work the kernel explainer puts into
+    # an explanation when the request does not pick a tier
+    explanation_tier: str = "standard"
+    # Tier for re-classifying an edited ADR, empty uses explanation_tier
+    explanation_tier_on_update: str = "fast"
+    # In-memory budget of the prediction and explanation cache
+    explanation_cache_max_bytes: int = 64 * 1024 * 1024
+    # SQLite file that keeps the cache across restarts, empty keeps it in memory
+    explanation_cache_path: str = "explanation_cache.sqlite"
+    # Budget of the SQLite file, the oldest entries are deleted beyond it
+    explanation_cache_max_disk_bytes: int = 1024 * 1024 * 1024
+    # Strongest SHAP contributors per class saved as explanation drivers
+    explanation_top_k: int = 5
+    # json, or binary to keep SHAP values as float32 blobs. Saved levels are
+    # converted at startup, see migrate_shap_storage.py
+    shap_storage_format: str = "json"
+    # Re-score every ADR when the champion model is hot-swapped to another
+    # model. Otherwise POST /api/v1/rescoring_job starts a job
+    rescoring_on_model_swap: bool = False
+    # ADRs read per chunk, and chunks scored at once, by a re-scoring job
+    rescoring_chunk_size: int = 64
+    rescoring_concurrency: int = 1
+    # Milliseconds a re-scoring job pauses between rounds for online requests
+    rescoring_pause_ms: float = 100
+    # Both point at the same database, the async one is used by async endpoints
+    database_url: str = "sqlite:///db.sqlite"
+    async_database_url: str = "sqlite+aiosqlite:///db.sqlite"
+    # SQLite PRAGMAs set on every new connection, see engines.py
+    database_journal_mode: str = "wal"
+    database_synchronous: str = "normal"
+    # Milliseconds a connection waits for a lock before "database is locked"
+    database_busy_timeout_ms: int = 5000
+    database_mmap_size: int = 256 * 1024 * 1024
+    database_cache_size_kib: int = 64 * 1024
+    database_temp_store: str = "memory"
+    # Connections kept open, and opened beyond those under load
+    database_pool_size: int = 8
+    database_max_overflow: int = 16
+    database_pool_timeout_seconds: float = 30
     minio_host: str
     minio_api_port: str
     minio_access_key: str
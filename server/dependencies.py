@@ -1,4 +1,4 @@
-from sessions import Session
+from sessions import AsyncSession, Session
 
 
 def get_db():
@@ -7,3 +7,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSession() as db:
+        yield db
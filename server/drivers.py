@@ -0,0 +1,125 @@
+import logging
+from typing import Iterable, List, Tuple
+from uuid import uuid4
+
+import numpy as np
+from basemodels import CausalityAssessmentLevelEnum, ExplanationStatusEnum
+from config import settings
+from feature_schemas import feature_schemas
+from models import CausalityAssessmentLevelModel, ExplanationDriverModel
+from sessions import Session
+from sqlalchemy import exists
+
+# Levels backfilled per transaction
+BATCH_SIZE = 500
+
+
+def top_drivers(matrix: np.ndarray, k: int) -> List[tuple]:
+    """
+    (class index, rank, feature index, SHAP value) of the k features with
+    the largest absolute SHAP value for each class of a features x classes
+    matrix, leaving out features that did not contribute at all.
+    """
+    k = min(k, matrix.shape[0])
+    order = np.argsort(-np.abs(matrix), axis=0, kind="stable")[:k]
+    values = np.take_along_axis(matrix, order, axis=0)
+
+    return [
+        (class_index, rank + 1, int(order[rank, class_index]), float(value))
+        for class_index in range(matrix.shape[1])
+        for rank, value in enumerate(values[:, class_index])
+        if value != 0
+    ]
+
+
+def _shap_matrix(columns: dict) -> np.ndarray | None:
+    # Either storage format, see shap_storage.py
+    for column in ["shap_values_matrix_blob", "shap_values_matrix"]:
+        if columns.get(column) is not None:
+            return np.asarray(columns[column], dtype=np.float64)
+    return None
+
+
+def save_drivers(session, levels: Iterable[Tuple[str, dict]]):
+    """
+    Replace the explanation drivers of causality assessment levels, given as
+    (id, columns) with feature_schema_id and the SHAP values among the
+    columns. Levels without SHAP values are left without drivers. The caller
+    commits.
+    """
+    level_ids = []
+    mappings = []
+
+    for level_id, columns in levels:
+        level_ids.append(level_id)
+
+        matrix = _shap_matrix(columns)
+        schema_id = columns.get("feature_schema_id")
+        schema = feature_schemas.get(schema_id) if schema_id is not None else None
+        if matrix is None or schema is None:
+            continue
+
+        for class_index, rank, feature_index, value in top_drivers(
+            matrix, settings.explanation_top_k
+        ):
+            mappings.append(
+                {
+                    "id": str(uuid4()),
+                    "causality_assessment_level_id": level_id,
+                    "class_value": CausalityAssessmentLevelEnum(
+                        schema["class_values"][class_index]
+                    ),
+                    "rank": rank,
+                    "feature_index": feature_index,
+                    "feature_name": schema["feature_names"][feature_index],
+                    "shap_value": value,
+                }
+            )
+
+    if level_ids:
+        session.query(ExplanationDriverModel).filter(
+            ExplanationDriverModel.causality_assessment_level_id.in_(level_ids)
+        ).delete(synchronize_session=False)
+    session.bulk_insert_mappings(ExplanationDriverModel, mappings)
+
+
+def backfill_drivers() -> int:
+    """Save the drivers of explained levels that have none, return how many."""
+    model = CausalityAssessmentLevelModel
+    backfilled = 0
+    last_id = ""
+
+    while True:
+        with Session() as session:
+            rows = (
+                session.query(
+                    model.id,
+                    model.feature_schema_id,
+                    model.shap_values_matrix,
+                    model.shap_values_matrix_blob,
+                )
+                .filter(
+                    model.explanation_status == ExplanationStatusEnum.ready,
+                    model.feature_schema_id.is_not(None),
+                    ~exists().where(
+                        ExplanationDriverModel.causality_assessment_level_id
+                        == model.id
+                    ),
+                    model.id > last_id,
+                )
+                .order_by(model.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            save_drivers(session, [(row.id, row._asdict()) for row in rows])
+            session.commit()
+            backfilled += len(rows)
+
+    if backfilled:
+        logging.info(f"Saved explanation drivers of {backfilled} levels")
+
+    return backfilled
@@ -1,3 +1,98 @@
-from sqlalchemy import create_engine
+from config import settings
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
-engine = create_engine("sqlite:///db.sqlite")
+
+def sqlite_pragmas() -> dict:
+    """PRAGMAs from the settings, set on every new connection."""
+    return {
+        # Readers no longer block the writer, nor the writer the readers
+        "journal_mode": settings.database_journal_mode,
+        # Safe with WAL, fsyncs at checkpoints instead of on every commit
+        "synchronous": settings.database_synchronous,
+        "busy_timeout": settings.database_busy_timeout_ms,
+        "mmap_size": settings.database_mmap_size,
+        # Negative sizes are in KiB rather than pages
+        "cache_size": -settings.database_cache_size_kib,
+        "temp_store": settings.database_temp_store,
+    }
+
+
+def _pool_options(pool_size: int | None, max_overflow: int | None) -> dict:
+    return {
+        "pool_size": settings.database_pool_size if pool_size is None else pool_size,
+        "max_overflow": (
+            settings.database_max_overflow if max_overflow is None else max_overflow
+        ),
+        "pool_timeout": settings.database_pool_timeout_seconds,
+    }
+
+
+def _set_pragmas_on_connect(engine: Engine, pragmas: dict):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def build_engine(
+    url: str | None = None,
+    pragmas: dict | None = None,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+) -> Engine:
+    """
+    Engine with a connection pool shared by FastAPI's threadpool and the
+    background workers, its URL, pool sizes and SQLite PRAGMAs coming from
+    the settings unless given.
+    """
+    url = settings.database_url if url is None else url
+
+    connect_args = {}
+    if url.startswith("sqlite"):
+        # Pooled connections move between threads, one at a time
+        connect_args = {
+            "check_same_thread": False,
+            "timeout": settings.database_busy_timeout_ms / 1000,
+        }
+
+    engine = create_engine(
+        url, connect_args=connect_args, **_pool_options(pool_size, max_overflow)
+    )
+    _set_pragmas_on_connect(engine, sqlite_pragmas() if pragmas is None else pragmas)
+
+    return engine
+
+
+def build_async_engine(
+    url: str | None = None,
+    pragmas: dict | None = None,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+) -> AsyncEngine:
+    """The same for async endpoints, over aiosqlite by default."""
+    url = settings.async_database_url if url is None else url
+
+    connect_args = {}
+    if url.startswith("sqlite"):
+        connect_args = {"timeout": settings.database_busy_timeout_ms / 1000}
+
+    engine = create_async_engine(
+        url, connect_args=connect_args, **_pool_options(pool_size, max_overflow)
+    )
+    _set_pragmas_on_connect(
+        engine.sync_engine, sqlite_pragmas() if pragmas is None else pragmas
+    )
+
+    return engine
+
+
+# Sync endpoints, scripts and the background workers use engine
+engine = build_engine()
+async_engine = build_async_engine()
@@ -0,0 +1,219 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import shap
+from artifacts import ModelArtifacts
+from background import Background
+from basemodels import ExplanationTierEnum
+
+ENGINES = ["auto", "tree", "linear", "permutation", "kernel"]
+
+
+@dataclass(frozen=True)
+class ExplanationTier:
+    """How much work a sampling engine puts into each explanation."""
+
+    # Model evaluations per row, "auto" is 2 * features + 2048
+    nsamples: int | str
+    # Size of the k-means summary the background is reduced to
+    kmeans_clusters: int
+    # Feature selection before the SHAP regression, False keeps every feature
+    l1_reg: str | bool
+
+
+EXPLANATION_TIERS = {
+    ExplanationTierEnum.fast: ExplanationTier(
+        nsamples=256, kmeans_clusters=5, l1_reg="num_features(10)"
+    ),
+    # What the kernel explainer did before tiers existed
+    ExplanationTierEnum.standard: ExplanationTier(
+        nsamples="auto", kmeans_clusters=10, l1_reg="num_features(10)"
+    ),
+    ExplanationTierEnum.precise: ExplanationTier(
+        nsamples=8192, kmeans_clusters=25, l1_reg=False
+    ),
+}
+
+# Every k-means summary the tiers need from the background
+KMEANS_CLUSTERS = sorted({tier.kmeans_clusters for tier in EXPLANATION_TIERS.values()})
+
+
+def normalize_shapes(values, base_values, n_rows: int):
+    """
+    Return SHAP values shaped (rows, features, classes) and base values shaped
+    (rows, classes), which is what KernelExplainer gives for predict_proba and
+    what is stored on the causality assessment level.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    base_values = np.asarray(base_values, dtype=np.float64)
+
+    if values.ndim == 2:
+        values = values[:, :, np.newaxis]
+
+    if base_values.ndim == 1 and values.shape[2] == 1:
+        base_values = base_values[:, np.newaxis]
+
+    base_values = np.broadcast_to(base_values, (n_rows, values.shape[2])).copy()
+
+    return values, base_values
+
+
+class ExplainerEngine:
+    """
+    One way of computing SHAP values for a loaded model. Calling an engine
+    works like calling a shap explainer and returns a shap.Explanation with
+    normalized shapes.
+
+    Exact engines give the same values whatever the tier, sampling engines
+    set tier_sensitive and do more work for better tiers.
+    """
+
+    name: str
+    tier_sensitive = False
+
+    def __init__(self, artifacts: ModelArtifacts, background: Background):
+        self.explainer = self._build(artifacts, background)
+        self.data_sha256 = background.provenance.get("data_sha256", "")
+
+    def _build(self, artifacts: ModelArtifacts, background: Background):
+        raise NotImplementedError
+
+    def cache_id(self, tier: ExplanationTierEnum) -> str:
+        """What explanations depend on besides the model and the row."""
+        # Including the data the background came from
+        if self.tier_sensitive:
+            return f"{self.name}/{tier.value}/{self.data_sha256}"
+        return f"{self.name}/{self.data_sha256}"
+
+    def _explain(
+        self, features: pd.DataFrame, tier: ExplanationTierEnum
+    ) -> shap.Explanation:
+        return self.explainer(features)
+
+    def __call__(
+        self,
+        features: pd.DataFrame,
+        tier: ExplanationTierEnum = ExplanationTierEnum.standard,
+    ) -> shap.Explanation:
+        explanation = self._explain(features, tier)
+        values, base_values = normalize_shapes(
+            explanation.values, explanation.base_values, len(features)
+        )
+
+        return shap.Explanation(
+            values=values,
+            base_values=base_values,
+            data=features.to_numpy(),
+            feature_names=features.columns.tolist(),
+        )
+
+
+class TreeEngine(ExplainerEngine):
+    """
+    Exact, fast SHAP values for tree ensembles, in probability space. Fails to
+    build for tree models that only explain their raw output.
+    """
+
+    name = "tree"
+
+    def _build(self, artifacts, background):
+        return shap.TreeExplainer(
+            artifacts.ml_model,
+            data=background.sample_frame(),
+            feature_perturbation="interventional",
+            model_output="probability",
+        )
+
+    def _explain(self, features, tier):
+        return self.explainer(features, check_additivity=False)
+
+
+class LinearEngine(ExplainerEngine):
+    """
+    Exact SHAP values for linear models, in the model's margin space rather
+    than the probabilities the other engines explain, so auto never picks it.
+    """
+
+    name = "linear"
+
+    def _build(self, artifacts, background):
+        return shap.LinearExplainer(artifacts.ml_model, background.sample_frame())
+
+
+class PermutationEngine(ExplainerEngine):
+    """Model-agnostic SHAP values by permuting features against a background."""
+
+    name = "permutation"
+
+    def _build(self, artifacts, background):
+        return shap.PermutationExplainer(
+            artifacts.runtime_model.predict_proba,
+            shap.maskers.Independent(
+                background.sample_frame(), len(background.sample)
+            ),
+        )
+
+
+class KernelEngine(ExplainerEngine):
+    """
+    Model-agnostic SHAP values against a k-means summary of the background,
+    with one explainer per tier since each tier has its own summary.
+    """
+
+    name = "kernel"
+    tier_sensitive = True
+
+    def _build(self, artifacts, background):
+        return {
+            name: shap.KernelExplainer(
+                artifacts.runtime_model.predict_proba,
+                background.kmeans(tier.kmeans_clusters),
+            )
+            for name, tier in EXPLANATION_TIERS.items()
+        }
+
+    def _explain(self, features, tier):
+        parameters = EXPLANATION_TIERS[tier]
+        explainer = self.explainer[tier]
+
+        values = explainer.shap_values(
+            features,
+            nsamples=parameters.nsamples,
+            l1_reg=parameters.l1_reg,
+            silent=True,
+        )
+
+        return shap.Explanation(values, base_values=explainer.expected_value)
+
+
+ENGINE_CLASSES = {
+    engine_class.name: engine_class
+    for engine_class in [TreeEngine, LinearEngine, PermutationEngine, KernelEngine]
+}
+
+
+def build_engine(
+    name: str, artifacts: ModelArtifacts, background: Background
+) -> ExplainerEngine:
+    """
+    Build the named engine. "auto" tries the tree engine and falls back to
+    the kernel engine, so explanations are always in probability space.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown explainer engine {name!r}, expected one of {ENGINES}")
+
+    if name != "auto":
+        return ENGINE_CLASSES[name](artifacts, background)
+
+    try:
+        engine = TreeEngine(artifacts, background)
+    except Exception as e:
+        logging.info(f"tree explainer does not support the model: {e}")
+    else:
+        logging.info(f"Using the tree explainer for model version {artifacts.version}")
+        return engine
+
+    logging.info(f"Using the kernel explainer for model version {artifacts.version}")
+    return KernelEngine(artifacts, background)
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import metrics
+import numpy as np
+
+memory_hits = metrics.counter(
+    "explanation_cache_memory_hits", "Cache lookups answered from memory"
+)
+disk_hits = metrics.counter(
+    "explanation_cache_disk_hits", "Cache lookups answered from the SQLite tier"
+)
+misses = metrics.counter("explanation_cache_misses", "Cache lookups not found")
+evictions = metrics.counter(
+    "explanation_cache_evictions", "Entries dropped from memory to stay in budget"
+)
+disk_evictions = metrics.counter(
+    "explanation_cache_disk_evictions",
+    "Entries deleted from the SQLite tier to stay in budget",
+)
+
+# Bumped when the table changes, older cache files are emptied
+SCHEMA_VERSION = 1
+# Oldest rows deleted at a time once the SQLite tier is over budget
+EVICTION_BATCH_ROWS = 256
+
+
+def cache_key(*parts: str, row: np.ndarray) -> str:
+    """Hash of the final prediction input row and whatever else it depends on."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(np.ascontiguousarray(row, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class ExplanationCache:
+    """
+    Predictions and SHAP payloads by content hash.
+
+    Entries live in an in-memory LRU bounded by the size of their JSON, and in
+    a SQLite file that survives restarts, bounded by max_disk_bytes of JSON
+    with the oldest written entries deleted first. Pass an empty path to keep
+    the cache in memory only.
+
+    Every call does blocking work, callers on the event loop run them in a
+    thread.
+    """
+
+    def __init__(self, max_bytes: int, path: str, max_disk_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            (schema_version,) = self._db.execute("PRAGMA user_version").fetchone()
+            if schema_version != SCHEMA_VERSION:
+                self._db.execute("DROP TABLE IF EXISTS explanation_cache")
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            # Rows are replaced rather than updated, so rowid order is write order
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS explanation_cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.commit()
+            (self._disk_bytes,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM explanation_cache"
+            ).fetchone()
+
+    def get_many(self, keys: Sequence[str], persistent: bool = True) -> List[dict | None]:
+        """Look keys up in memory, then on disk. Disk hits are kept in memory."""
+        found: Dict[str, bytes] = {}
+
+        with self._lock:
+            for key in keys:
+                value = self._memory.get(key)
+                if value is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = value
+        memory_hits.inc(len(found))
+
+        remaining = [key for key in set(keys) if key not in found]
+        if remaining and persistent and self._db is not None:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT key, value FROM explanation_cache WHERE key IN "
+                    f"({', '.join('?' * len(remaining))})",
+                    remaining,
+                ).fetchall()
+
+            for key, value in rows:
+                found[key] = value
+                self._remember(key, value)
+            disk_hits.inc(len(rows))
+
+        results = [json.loads(found[key]) if key in found else None for key in keys]
+        misses.inc(sum(result is None for result in results))
+
+        return results
+
+    def put_many(self, entries: Dict[str, dict], persistent: bool = True):
+        encoded = {key: json.dumps(value).encode() for key, value in entries.items()}
+
+        for key, value in encoded.items():
+            self._remember(key, value)
+
+        if persistent and self._db is not None and encoded:
+            with self._lock:
+                (replaced_bytes,) = self._db.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM explanation_cache WHERE key IN "
+                    f"({', '.join('?' * len(encoded))})",
+                    list(encoded),
+                ).fetchone()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO explanation_cache (key, value, size)"
+                    " VALUES (?, ?, ?)",
+                    [(key, value, len(value)) for key, value in encoded.items()],
+                )
+                self._disk_bytes += (
+                    sum(len(value) for value in encoded.values()) - replaced_bytes
+                )
+                self._evict_from_disk()
+                self._db.commit()
+
+    def _evict_from_disk(self):
+        """Delete the oldest written rows until the SQLite tier is in budget."""
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute(
+                "SELECT rowid, size FROM explanation_cache ORDER BY rowid LIMIT ?",
+                (EVICTION_BATCH_ROWS,),
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+
+            # Just enough of the batch to get back in budget
+            over, last_rowid, count = self._disk_bytes - self.max_disk_bytes, None, 0
+            for rowid, size in rows:
+                over -= size
+                self._disk_bytes -= size
+                last_rowid, count = rowid, count + 1
+                if over <= 0:
+                    break
+
+            self._db.execute(
+                "DELETE FROM explanation_cache WHERE rowid <= ?", (last_rowid,)
+            )
+            disk_evictions.inc(count)
+
+    def _remember(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+
+            self._memory[key] = value
+            self._memory_bytes += len(value)
+
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                evictions.inc()
@@ -0,0 +1,186 @@
+import asyncio
+import itertools
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List
+
+from basemodels import ExplanationStatusEnum, ExplanationTierEnum
+from drivers import save_drivers
+from inference import InferenceQueueFull
+from models import ADRModel, CausalityAssessmentLevelModel
+from sessions import Session
+from shap_storage import storage_columns
+
+REVIEWER_PRIORITY = 0
+DEFAULT_PRIORITY = 1
+
+# Seconds to wait before retrying when the inference queue is full
+RETRY_DELAY_SECONDS = 1
+
+
+class ModelVersionUnavailable(Exception):
+    """Raised when the model version that saved a CAL can no longer explain it."""
+
+
+class ExplanationWorker:
+    """
+    Fills in the SHAP columns of causality assessment levels saved with
+    explanation_status pending.
+
+    CALs are explained in batches in priority order, so a CAL a reviewer has
+    opened jumps ahead of ones nobody is looking at yet. Each CAL is explained
+    with the tier it was saved with, by the model version and feature schema
+    that predicted it. CALs whose version is gone are marked failed.
+    """
+
+    def __init__(
+        self,
+        explain: Callable[
+            [List[ADRModel], ExplanationTierEnum, str, str], Awaitable[List[dict]]
+        ],
+        batch_size: int,
+    ):
+        self.explain = explain
+        self.batch_size = batch_size
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        # Best priority each queued CAL id is waiting with
+        self._queued: Dict[str, int] = {}
+        self._sequence = itertools.count()
+
+    def enqueue(self, cal_id: str, priority: int = DEFAULT_PRIORITY):
+        if self._queued.get(cal_id, priority + 1) <= priority:
+            return
+
+        self._queued[cal_id] = priority
+        self._queue.put_nowait((priority, next(self._sequence), cal_id))
+
+    def prioritize(self, cal_id: str):
+        """Explain a pending CAL next, e.g. because a reviewer opened it."""
+        self.enqueue(cal_id, REVIEWER_PRIORITY)
+
+    def enqueue_pending(self):
+        """Queue every CAL still pending, e.g. after a restart."""
+        with Session() as session:
+            cal_ids = [
+                cal_id
+                for (cal_id,) in session.query(CausalityAssessmentLevelModel.id)
+                .filter(
+                    CausalityAssessmentLevelModel.explanation_status
+                    == ExplanationStatusEnum.pending
+                )
+                .order_by(CausalityAssessmentLevelModel.created_at)
+            ]
+
+        for cal_id in cal_ids:
+            self.enqueue(cal_id)
+
+        logging.info(f"Queued {len(cal_ids)} pending explanations")
+
+    async def run(self):
+        while True:
+            entries = [await self._queue.get()]
+            while len(entries) < self.batch_size and not self._queue.empty():
+                entries.append(self._queue.get_nowait())
+
+            # A boosted CAL is queued twice, only its best entry counts
+            batch = {}
+            for priority, _, cal_id in entries:
+                if self._queued.get(cal_id) == priority:
+                    batch[cal_id] = priority
+                    del self._queued[cal_id]
+
+            if not batch:
+                continue
+
+            try:
+                await self._explain_batch(list(batch))
+            except InferenceQueueFull:
+                for cal_id, priority in batch.items():
+                    self.enqueue(cal_id, priority)
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+            except Exception as e:
+                logging.error(f"Error explaining causality assessment levels: {e}")
+                await asyncio.to_thread(self._mark_failed, list(batch))
+
+    async def _explain_batch(self, cal_ids: List[str]):
+        pending = await asyncio.to_thread(self._load_pending, cal_ids)
+
+        by_model = defaultdict(list)
+        for cal_id, tier, ml_model_id, feature_schema_id, adr in pending:
+            by_model[tier, ml_model_id, feature_schema_id].append(
+                (cal_id, feature_schema_id, adr)
+            )
+
+        for (tier, ml_model_id, feature_schema_id), model_pending in by_model.items():
+            try:
+                explanations = await self.explain(
+                    [adr for _, _, adr in model_pending],
+                    tier,
+                    ml_model_id,
+                    feature_schema_id,
+                )
+            except ModelVersionUnavailable as e:
+                logging.warning(f"Not explaining {len(model_pending)} levels: {e}")
+                await asyncio.to_thread(
+                    self._mark_failed, [cal_id for cal_id, _, _ in model_pending]
+                )
+                continue
+
+            await asyncio.to_thread(self._save, model_pending, explanations)
+
+    def _load_pending(self, cal_ids: List[str]) -> List[tuple]:
+        with Session() as session:
+            return (
+                session.query(
+                    CausalityAssessmentLevelModel.id,
+                    CausalityAssessmentLevelModel.explanation_tier,
+                    CausalityAssessmentLevelModel.ml_model_id,
+                    CausalityAssessmentLevelModel.feature_schema_id,
+                    ADRModel,
+                )
+                .join(ADRModel, CausalityAssessmentLevelModel.adr_id == ADRModel.id)
+                .filter(
+                    CausalityAssessmentLevelModel.id.in_(cal_ids),
+                    CausalityAssessmentLevelModel.explanation_status
+                    == ExplanationStatusEnum.pending,
+                )
+                .all()
+            )
+
+    def _save(self, pending: List[tuple], explanations: List[dict]):
+        with Session() as session:
+            explained = []
+            for (cal_id, feature_schema_id, _), explanation in zip(
+                pending, explanations
+            ):
+                # Only fill in CALs that are still waiting for one
+                updated = (
+                    session.query(CausalityAssessmentLevelModel)
+                    .filter(
+                        CausalityAssessmentLevelModel.id == cal_id,
+                        CausalityAssessmentLevelModel.explanation_status
+                        == ExplanationStatusEnum.pending,
+                    )
+                    .update(
+                        {
+                            **storage_columns(explanation),
+                            "explanation_status": ExplanationStatusEnum.ready,
+                        }
+                    )
+                )
+                if updated:
+                    explained.append(
+                        (cal_id, {**explanation, "feature_schema_id": feature_schema_id})
+                    )
+
+            save_drivers(session, explained)
+            session.commit()
+
+    def _mark_failed(self, cal_ids: List[str]):
+        with Session() as session:
+            session.query(CausalityAssessmentLevelModel).filter(
+                CausalityAssessmentLevelModel.id.in_(cal_ids),
+                CausalityAssessmentLevelModel.explanation_status
+                == ExplanationStatusEnum.pending,
+            ).update({"explanation_status": ExplanationStatusEnum.failed})
+            session.commit()
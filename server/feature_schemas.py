@@ -0,0 +1,82 @@
+import logging
+import threading
+from typing import Dict
+
+from artifacts import ModelArtifacts
+from models import FeatureSchemaModel
+from sessions import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SCHEMA_COLUMNS = [
+    "ml_model_id",
+    "feature_names",
+    "display_labels",
+    "scaler_ranges",
+    "class_values",
+]
+
+
+class FeatureSchemaCache:
+    """
+    Feature schemas by id. Schemas never change once saved, so each one is
+    read from the feature_schema table at most once. Async endpoints use
+    get_async, which reads a missing schema with their own session instead
+    of blocking the event loop.
+    """
+
+    def __init__(self):
+        self._schemas: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def register(self, artifacts: ModelArtifacts):
+        """Save the schema of a model version before levels refer to it."""
+        schema = artifacts.feature_schema
+
+        with Session() as session:
+            if session.get(FeatureSchemaModel, schema["id"]) is None:
+                session.add(FeatureSchemaModel(**schema))
+                session.commit()
+                logging.info(f"Saved feature schema {schema['id']}")
+
+        with self._lock:
+            self._schemas[schema["id"]] = schema
+
+    def get(self, schema_id: str | None) -> dict | None:
+        if schema_id is None:
+            return None
+
+        with self._lock:
+            schema = self._schemas.get(schema_id)
+        if schema is not None:
+            return schema
+
+        with Session() as session:
+            return self._remember(session.get(FeatureSchemaModel, schema_id))
+
+    async def get_async(self, db: AsyncSession, schema_id: str | None) -> dict | None:
+        if schema_id is None:
+            return None
+
+        with self._lock:
+            schema = self._schemas.get(schema_id)
+        if schema is not None:
+            return schema
+
+        return self._remember(await db.get(FeatureSchemaModel, schema_id))
+
+    def _remember(self, row: FeatureSchemaModel | None) -> dict | None:
+        if row is None:
+            return None
+
+        schema = {
+            "id": row.id,
+            **{column: getattr(row, column) for column in SCHEMA_COLUMNS},
+        }
+
+        with self._lock:
+            self._schemas[row.id] = schema
+
+        return schema
+
+
+feature_schemas = FeatureSchemaCache()
@@ -0,0 +1,448 @@
+import datetime
+from typing import Any, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+DRUG_NAMES = ["rifampicin", "isoniazid", "pyrazinamide", "ethambutol"]
+
+NANOSECONDS_PER_DAY = 86_400 * 10**9
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# Kinds of prediction columns
+ONE_HOT = "one_hot"
+BOOLEAN = "boolean"
+NUMERICAL = "numerical"
+
+# inverse_transform treats unscaled numbers this close to an integer as one
+NUMERICAL_TOLERANCE = 1e-6
+NUMERICAL_DECIMALS = 6
+
+
+def input_to_prediction_format(input_df: pd.DataFrame, artifacts) -> pd.DataFrame:
+    """
+    This function returns for a proper dataframe for the ML model and SHAP model
+    """
+
+    column_metadata = artifacts.column_metadata
+
+    categorical_columns = list(column_metadata["categorical_columns"])
+    numerical_columns = list(column_metadata["numerical_columns"])
+    date_columns = list(column_metadata["date_columns"])
+    boolean_columns = list(column_metadata["boolean_columns"])
+    prediction_columns = list(column_metadata["prediction_columns"])
+    columns_to_drop = list(column_metadata["columns_to_drop"])
+
+    # Create all the columns not originally in dataset
+    ## Num suspected drugs
+    input_df["num_suspected_drugs"] = input_df[boolean_columns].sum(axis=1)
+
+    for column in categorical_columns:
+        input_df[column] = input_df[column].astype("category")
+
+    ## Patient Age and Patient Date of Birth
+    date_columns_without_created_at = date_columns
+    date_columns_without_created_at.remove("created_at")
+
+    for column in date_columns:
+        input_df[column] = pd.to_datetime(input_df[column], errors="coerce")
+
+    today = pd.to_datetime("today")
+
+    missing_age_mask = (
+        input_df["patient_age"].isnull() & input_df["patient_date_of_birth"].notnull()
+    )
+
+    input_df.loc[missing_age_mask, "patient_age"] = (
+        today - input_df.loc[missing_age_mask, "patient_date_of_birth"]
+    ).dt.days // 365
+
+    patient_age = pd.to_numeric(input_df["patient_age"])
+    input_df["patient_age"] = patient_age.fillna(patient_age.median())
+
+    ## Patient BMI
+    input_df["patient_bmi"] = input_df["patient_weight_kg"] / (
+        input_df["patient_height_cm"] * input_df["patient_height_cm"]
+    )
+
+    ## Drug columns
+    for drug in DRUG_NAMES:
+        start_col = f"{drug}_start_to_onset_days"
+        stop_col = f"{drug}_stop_to_onset_days"
+        start_stop_col = f"{drug}_start_stop_difference"
+
+        input_df[start_col] = (
+            input_df["date_of_onset_of_reaction"] - input_df[f"{drug}_start_date"]
+        ).dt.days
+        input_df[stop_col] = (
+            input_df["date_of_onset_of_reaction"] - input_df[f"{drug}_stop_date"]
+        ).dt.days
+        input_df[start_stop_col] = (
+            input_df[f"{drug}_stop_date"] - input_df[f"{drug}_start_date"]
+        ).dt.days
+
+    # Drop date columns
+    input_df = input_df.drop(columns=date_columns)
+
+    input_df = input_df.drop(columns=columns_to_drop)
+
+    # Fill null valuea
+    input_df[numerical_columns] = (
+        input_df[numerical_columns].apply(pd.to_numeric).fillna(-1)
+    )
+
+    # Scale numerical columns
+    minmax_scaler = artifacts.minmax_scaler
+    scaled_numericals = minmax_scaler.transform(input_df[numerical_columns])
+    scaled_numericals_df = pd.DataFrame(scaled_numericals, columns=numerical_columns)
+
+    # Encode categorical columns
+
+    one_hot_encoder = artifacts.one_hot_encoder
+
+    cat_encoded = one_hot_encoder.transform(input_df[categorical_columns])
+    cat_encoded_df = pd.DataFrame(
+        cat_encoded, columns=one_hot_encoder.get_feature_names_out(categorical_columns)
+    )
+
+    # Merge all features
+    final_input_df = pd.concat(
+        [
+            cat_encoded_df,
+            input_df[boolean_columns].reset_index(drop=True),
+            scaled_numericals_df,
+        ],
+        axis=1,
+    )
+
+    # Reorder to match training time
+    final_input_df = final_input_df[prediction_columns]
+
+    return final_input_df
+
+
+def fit_patient_age_median(training_df: pd.DataFrame) -> float:
+    """
+    The median age training filled missing ages with, taking the age from
+    the date of birth where it is missing like input_to_prediction_format.
+    """
+    ages = training_df["patient_age"].astype(float)
+    date_of_birth = pd.to_datetime(training_df["patient_date_of_birth"], errors="coerce")
+
+    missing_age_mask = ages.isnull() & date_of_birth.notnull()
+    ages[missing_age_mask] = (
+        pd.to_datetime("today") - date_of_birth[missing_age_mask]
+    ).dt.days // 365
+
+    return float(ages.median())
+
+
+def _display_label(column: str) -> str:
+    return column.replace("_", " ").capitalize()
+
+
+def _is_missing(value: Any) -> bool:
+    # NaN and NaT are the only values not equal to themselves
+    return value is None or value != value
+
+
+def _get(row: Any, field: str) -> Any:
+    if isinstance(row, dict):
+        return row.get(field)
+    return getattr(row, field, None)
+
+
+def _to_nanoseconds(value: Any) -> int | None:
+    """Parse a date the way pd.to_datetime(errors="coerce") does."""
+    if _is_missing(value):
+        return None
+
+    if isinstance(value, str) and len(value) == 10:
+        # Fast path for the ISO dates in data.csv
+        try:
+            value = datetime.date.fromisoformat(value)
+        except ValueError:
+            pass
+
+    if isinstance(value, datetime.date) and not isinstance(
+        value, datetime.datetime
+    ):
+        return (value.toordinal() - EPOCH_ORDINAL) * NANOSECONDS_PER_DAY
+
+    try:
+        timestamp = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+
+    if _is_missing(timestamp):
+        return None
+
+    return timestamp.value
+
+
+class CompiledFeatureTransform:
+    """
+    input_to_prediction_format compiled into index maps and lookup tables.
+
+    Built once per model version from model_columns.json and the fitted
+    encoder and scaler. It only computes the prediction columns, straight into
+    a contiguous float array, and matches input_to_prediction_format bit for
+    bit (see benchmarks/feature_pipeline.py), except for missing ages.
+
+    An age missing along with the date of birth is filled with the training
+    median, patient_age_median, where input_to_prediction_format takes the
+    median of the batch, or leaves -1 when no age in the batch is known. So
+    an ADR's features no longer depend on the ADRs scored with it.
+    """
+
+    def __init__(self, column_metadata: dict, one_hot_encoder, minmax_scaler):
+        self.prediction_columns: List[str] = list(column_metadata["prediction_columns"])
+        self.boolean_columns: List[str] = list(column_metadata["boolean_columns"])
+
+        categorical_columns = list(column_metadata["categorical_columns"])
+        numerical_columns = list(column_metadata["numerical_columns"])
+        self.patient_age_median = float(column_metadata["patient_age_median"])
+
+        # One-hot output name -> (input feature, category)
+        one_hot_lookup = {}
+        feature_names_out = one_hot_encoder.get_feature_names_out(categorical_columns)
+        drop_idx = getattr(one_hot_encoder, "drop_idx_", None)
+        position = 0
+        for i, (feature, categories) in enumerate(
+            zip(categorical_columns, one_hot_encoder.categories_)
+        ):
+            for k, category in enumerate(categories):
+                if drop_idx is not None and drop_idx[i] is not None and drop_idx[i] == k:
+                    continue
+                one_hot_lookup[feature_names_out[position]] = (feature, category)
+                position += 1
+
+        if position != len(feature_names_out):
+            raise ValueError("One-hot encoder layout is not supported")
+
+        # Scaler column of each numerical feature, by the names it was fitted
+        # on when it kept them, rather than by position
+        scaler_columns = list(
+            getattr(minmax_scaler, "feature_names_in_", numerical_columns)
+        )
+        numerical_index = {
+            column: scaler_columns.index(column) for column in numerical_columns
+        }
+
+        # Prediction column -> how to compute it
+        self.plan = []
+        for column in self.prediction_columns:
+            if column in one_hot_lookup:
+                feature, category = one_hot_lookup[column]
+                self.plan.append((ONE_HOT, feature, category))
+            elif column in self.boolean_columns:
+                self.plan.append((BOOLEAN, column, None))
+            elif column in numerical_index:
+                self.plan.append((NUMERICAL, column, numerical_index[column]))
+            else:
+                raise ValueError(f"Don't know how to compute column {column}")
+
+        self.numerical_positions = np.array(
+            [j for j, (kind, _, _) in enumerate(self.plan) if kind == NUMERICAL],
+            dtype=np.intp,
+        )
+        self.numerical_scaler_columns = np.array(
+            [param for kind, _, param in self.plan if kind == NUMERICAL],
+            dtype=np.intp,
+        )
+        self.logical_positions = np.array(
+            [j for j, (kind, _, _) in enumerate(self.plan) if kind != NUMERICAL],
+            dtype=np.intp,
+        )
+
+        self.data_min = np.asarray(minmax_scaler.data_min_, dtype=np.float64)
+        self.data_max = np.asarray(minmax_scaler.data_max_, dtype=np.float64)
+        self.scale = np.asarray(minmax_scaler.scale_, dtype=np.float64)
+        self.min = np.asarray(minmax_scaler.min_, dtype=np.float64)
+        self.clip = getattr(minmax_scaler, "clip", False)
+        self.feature_range = minmax_scaler.feature_range
+
+    @classmethod
+    def from_artifacts(cls, artifacts) -> "CompiledFeatureTransform":
+        return cls(
+            artifacts.column_metadata,
+            artifacts.one_hot_encoder,
+            artifacts.minmax_scaler,
+        )
+
+    def transform(self, rows: Sequence[Any]) -> np.ndarray:
+        """
+        Map ADRs (ADRPostRequest objects or dicts of their fields) to a
+        float64 array with one row per ADR, in prediction_columns order.
+        """
+        output = np.empty((len(rows), len(self.plan)), dtype=np.float64)
+        derived = {}
+
+        for j, (kind, column, param) in enumerate(self.plan):
+            if kind == ONE_HOT:
+                values = self._categorical(rows, column, derived)
+                output[:, j] = [1.0 if value == param else 0.0 for value in values]
+
+            elif kind == BOOLEAN:
+                output[:, j] = [
+                    np.nan if _is_missing(value) else float(value)
+                    for value in (_get(row, column) for row in rows)
+                ]
+
+            else:
+                values = self._numerical(rows, column, derived)
+                values = np.where(np.isnan(values), -1.0, values)
+                values = values * self.scale[param] + self.min[param]
+                if self.clip:
+                    np.clip(values, *self.feature_range, out=values)
+                output[:, j] = values
+
+        return output
+
+    def transform_frame(self, rows: Sequence[Any]) -> pd.DataFrame:
+        """Same as transform, with the column names the model was fitted on."""
+        return pd.DataFrame(self.transform(rows), columns=self.prediction_columns)
+
+    def feature_schema(self) -> dict:
+        """
+        The prediction columns with a display label each, and the unscaled
+        [min, max] the scaler was fitted on for numerical ones (None for the
+        others).
+        """
+        display_labels = []
+        scaler_ranges = []
+
+        for kind, column, param in self.plan:
+            if kind == ONE_HOT:
+                display_labels.append(f"{_display_label(column)}: {param}")
+            else:
+                display_labels.append(_display_label(column))
+
+            if kind == NUMERICAL:
+                scaler_ranges.append(
+                    [float(self.data_min[param]), float(self.data_max[param])]
+                )
+            else:
+                scaler_ranges.append(None)
+
+        return {
+            "feature_names": list(self.prediction_columns),
+            "display_labels": display_labels,
+            "scaler_ranges": scaler_ranges,
+        }
+
+    def inverse_transform(self, features: np.ndarray) -> List[list]:
+        """
+        Readable values of transformed rows: one-hot and boolean columns as
+        True or False, numerical columns unscaled and rounded, and None where
+        the value was missing.
+        """
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(self.plan))
+        values = np.empty(features.shape, dtype=object)
+
+        logical = features[:, self.logical_positions]
+        values[:, self.logical_positions] = np.where(
+            np.isnan(logical), None, logical == 1
+        )
+
+        columns = self.numerical_scaler_columns
+        numerical = (
+            features[:, self.numerical_positions] - self.min[columns]
+        ) / self.scale[columns]
+
+        # Whole numbers like ages and day counts come back as ints, ratios
+        # like BMI as floats, both without the unscaling's rounding error
+        whole = np.rint(numerical)
+        is_whole = np.abs(numerical - whole) < NUMERICAL_TOLERANCE
+        unscaled = np.where(
+            is_whole,
+            np.where(np.isnan(whole), 0, whole).astype(np.int64).astype(object),
+            np.round(numerical, NUMERICAL_DECIMALS).astype(object),
+        )
+
+        # Missing numbers were filled with -1 before scaling
+        missing = np.isnan(numerical) | (is_whole & (whole == -1))
+        values[:, self.numerical_positions] = np.where(missing, None, unscaled)
+
+        return values.tolist()
+
+    def _categorical(self, rows, column, derived) -> list:
+        if column == "num_suspected_drugs":
+            if column not in derived:
+                derived[column] = [
+                    sum(
+                        bool(value)
+                        for value in (_get(row, c) for c in self.boolean_columns)
+                        if not _is_missing(value)
+                    )
+                    for row in rows
+                ]
+            return derived[column]
+
+        return [_get(row, column) for row in rows]
+
+    def _dates(self, rows, column, derived) -> tuple:
+        """Return (nanoseconds, missing mask) for a date column."""
+        if column not in derived:
+            nanoseconds = [_to_nanoseconds(_get(row, column)) for row in rows]
+            missing = np.array([value is None for value in nanoseconds], dtype=bool)
+            values = np.array(
+                [0 if value is None else value for value in nanoseconds],
+                dtype=np.int64,
+            )
+            derived[column] = (values, missing)
+        return derived[column]
+
+    def _days_between(self, rows, later, earlier, derived) -> np.ndarray:
+        later_values, later_missing = self._dates(rows, later, derived)
+        earlier_values, earlier_missing = self._dates(rows, earlier, derived)
+        days = ((later_values - earlier_values) // NANOSECONDS_PER_DAY).astype(
+            np.float64
+        )
+        days[later_missing | earlier_missing] = np.nan
+        return days
+
+    def _raw_numbers(self, rows, column) -> np.ndarray:
+        return np.array(
+            [
+                np.nan if _is_missing(value) else value
+                for value in (_get(row, column) for row in rows)
+            ],
+            dtype=np.float64,
+        )
+
+    def _numerical(self, rows, column, derived) -> np.ndarray:
+        """Unscaled numerical column, with NaN where it is missing."""
+        if column == "patient_age":
+            ages = self._raw_numbers(rows, "patient_age")
+            date_of_birth, date_of_birth_missing = self._dates(
+                rows, "patient_date_of_birth", derived
+            )
+            from_date_of_birth = np.isnan(ages) & ~date_of_birth_missing
+            if from_date_of_birth.any():
+                today = pd.to_datetime("today").value
+                ages[from_date_of_birth] = (
+                    (today - date_of_birth[from_date_of_birth]) // NANOSECONDS_PER_DAY
+                ) // 365
+            ages[np.isnan(ages)] = self.patient_age_median
+            return ages
+
+        if column == "patient_bmi":
+            height = self._raw_numbers(rows, "patient_height_cm")
+            return self._raw_numbers(rows, "patient_weight_kg") / (height * height)
+
+        for drug in DRUG_NAMES:
+            if column == f"{drug}_start_to_onset_days":
+                return self._days_between(
+                    rows, "date_of_onset_of_reaction", f"{drug}_start_date", derived
+                )
+            if column == f"{drug}_stop_to_onset_days":
+                return self._days_between(
+                    rows, "date_of_onset_of_reaction", f"{drug}_stop_date", derived
+                )
+            if column == f"{drug}_start_stop_difference":
+                return self._days_between(
+                    rows, f"{drug}_stop_date", f"{drug}_start_date", derived
+                )
+
+        return self._raw_numbers(rows, column)
@@ -0,0 +1,419 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+import metrics
+import numpy as np
+from artifacts import LOCAL_MODEL_VERSION, ModelArtifacts, load_artifacts
+from basemodels import ExplanationTierEnum
+from explainers import ExplainerEngine
+from explanation_cache import ExplanationCache, cache_key
+from predictors import Predictor, PredictorUnavailable
+from scoring import (
+    build_explainer,
+    classify_adrs,
+    combine_assessment,
+    explain_features,
+    predict_and_explain,
+)
+
+predictor_fallbacks = metrics.counter(
+    "predictor_fallbacks",
+    "Batches predicted by the inference workers because the predictor failed",
+)
+
+# Loaded once per worker process by _init_worker
+_worker_artifacts: ModelArtifacts | None = None
+_worker_explainer: ExplainerEngine | None = None
+
+
+class InferenceQueueFull(Exception):
+    """Raised when queue_depth requests are already waiting or in inference."""
+
+
+@dataclass
+class _Version:
+    """A model version's artifacts and explainer, and the workers that loaded them."""
+
+    artifacts: ModelArtifacts
+    explainer: ExplainerEngine
+    pool: ProcessPoolExecutor | None
+    # Requests scoring with this version now
+    requests: int = 0
+    retired: bool = False
+
+    def shutdown_if_done(self):
+        if self.retired and self.requests == 0 and self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+def _init_worker(artifacts_dir: str, csv_path: str):
+    global _worker_artifacts, _worker_explainer
+
+    _worker_artifacts = load_artifacts(artifacts_dir)
+    _worker_explainer = build_explainer(_worker_artifacts, csv_path)
+
+    logging.info(
+        f"Inference worker ready with model version {_worker_artifacts.version}"
+    )
+
+
+def _worker_version() -> str:
+    return _worker_artifacts.version
+
+
+def _run_in_worker(function: Callable, features: np.ndarray, *args) -> Any:
+    return function(_worker_artifacts, _worker_explainer, features, *args)
+
+
+class InferenceExecutor:
+    """
+    Runs predict and SHAP off the event loop.
+
+    With a pool size above 0, requests go to worker processes that each hold
+    their own copy of the model and explainer. The parent only runs the cheap
+    feature transform and ships the matrix. With a pool size of 0 the work
+    runs in a single thread instead, using the version's explainer, since a
+    KernelExplainer must not be called from two threads at once.
+
+    Predictions and explanations are looked up in the cache, when given, by
+    the hash of the feature row, so repeated rows skip the model entirely.
+
+    With a predictor, predictions come from it and the workers only explain.
+    If the predictor fails the workers predict as well.
+
+    Callers hold a queued() slot per request, online requests from when they
+    are submitted to a batch, so at most queue_depth wait at once.
+
+    A request scores with the version current when it starts, its artifacts,
+    explainer and workers together. The workers of a swapped out version are
+    shut down once the last request using them is done.
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        queue_depth: int,
+        csv_path: str,
+        cache: ExplanationCache | None = None,
+        predictor: Predictor | None = None,
+    ):
+        self.pool_size = pool_size
+        self.csv_path = csv_path
+        self.cache = cache
+        self.predictor = predictor
+        self.queue_depth = queue_depth
+        self._queued = 0
+        self._current: _Version | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="inference"
+        )
+
+    def start(self, artifacts: ModelArtifacts, explainer: ExplainerEngine):
+        """
+        (Re)create the worker pool for a model version and its explainer.
+        Called on the loop at startup and from the swap listener thread after
+        a hot-swap.
+        """
+        pool = None
+
+        if self.pool_size > 0:
+            pool = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(artifacts.artifacts_dir, self.csv_path),
+            )
+
+            # Start every worker now rather than on the first ADRs it gets
+            for _ in range(self.pool_size):
+                pool.submit(_worker_version)
+
+            logging.info(
+                f"Started {self.pool_size} inference workers for model version {artifacts.version}"
+            )
+
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Requests read _current on the loop, so it only changes there
+            try:
+                self._loop.call_soon_threadsafe(
+                    self._publish, _Version(artifacts, explainer, pool)
+                )
+            except RuntimeError:
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            return
+
+        self._publish(_Version(artifacts, explainer, pool))
+
+    def _publish(self, version: _Version):
+        previous, self._current = self._current, version
+
+        # Requests that started with the old workers still finish there
+        if previous is not None:
+            previous.retired = True
+            previous.shutdown_if_done()
+
+    def shutdown(self):
+        if self._current is not None and self._current.pool is not None:
+            self._current.pool.shutdown(wait=False, cancel_futures=True)
+            self._current.pool = None
+
+    @property
+    def artifacts(self) -> ModelArtifacts:
+        """The artifacts requests are scored with now."""
+        return self._current.artifacts
+
+    @contextmanager
+    def _using(self) -> Iterator[_Version]:
+        """The current version, kept from being shut down until the request is done."""
+        version = self._current
+        version.requests += 1
+        try:
+            yield version
+        finally:
+            version.requests -= 1
+            version.shutdown_if_done()
+
+    async def score(
+        self,
+        adrs: Sequence[Any],
+        tier: ExplanationTierEnum,
+        explain: bool = True,
+        artifacts: ModelArtifacts | None = None,
+        explainer: ExplainerEngine | None = None,
+    ) -> List[dict]:
+        """
+        Predict, and optionally explain, classifiable ADRs off the loop. Rows
+        whose prediction or explanation is cached are not sent to the model.
+        artifacts of another version are scored on the inference thread, like
+        in explain.
+        """
+        if artifacts is not None:
+            return await self._score(artifacts, explainer, None, adrs, tier, explain)
+
+        with self._using() as version:
+            return await self._score(
+                version.artifacts, version.explainer, version.pool, adrs, tier, explain
+            )
+
+    async def _score(
+        self,
+        artifacts: ModelArtifacts,
+        explainer: ExplainerEngine,
+        pool: ProcessPoolExecutor | None,
+        adrs: Sequence[Any],
+        tier: ExplanationTierEnum,
+        explain: bool,
+    ) -> List[dict]:
+        features = artifacts.feature_transform.transform(adrs)
+
+        prediction_keys = [
+            cache_key(
+                "prediction",
+                artifacts.version,
+                artifacts.feature_schema["id"],
+                row=row,
+            )
+            for row in features
+        ]
+        explanation_keys = self._explanation_keys(
+            artifacts, explainer, features, tier
+        )
+
+        cached = await self._cache_get(artifacts, prediction_keys + explanation_keys)
+        predictions, explanations = cached[: len(features)], cached[len(features) :]
+
+        missing = [
+            i
+            for i in range(len(features))
+            if predictions[i] is None or (explain and explanations[i] is None)
+        ]
+
+        if missing:
+            scored_predictions, scored_explanations = await self._call(
+                predict_and_explain,
+                artifacts,
+                explainer,
+                pool,
+                features[missing],
+                tier,
+                explain,
+                await self._predict(artifacts, features[missing]),
+            )
+
+            for i, prediction, explanation in zip(
+                missing, scored_predictions, scored_explanations
+            ):
+                predictions[i] = prediction
+                if explain:
+                    explanations[i] = explanation
+
+            entries = {prediction_keys[i]: predictions[i] for i in missing}
+            if explain:
+                entries.update({explanation_keys[i]: explanations[i] for i in missing})
+            await self._cache_put(artifacts, entries)
+
+        return [
+            combine_assessment(prediction, explanation, tier)
+            for prediction, explanation in zip(predictions, explanations)
+        ]
+
+    async def explain(
+        self,
+        adrs: Sequence[Any],
+        tier: ExplanationTierEnum,
+        artifacts: ModelArtifacts | None = None,
+        explainer: ExplainerEngine | None = None,
+    ) -> List[dict]:
+        """
+        Compute only the SHAP columns for ADRs, off the loop. artifacts of an
+        earlier version, with their own explainer, are explained on the
+        inference thread, since the workers only hold the current version.
+        """
+        if artifacts is not None:
+            return await self._explain(artifacts, explainer, None, adrs, tier)
+
+        with self._using() as version:
+            return await self._explain(
+                version.artifacts, version.explainer, version.pool, adrs, tier
+            )
+
+    async def _explain(
+        self,
+        artifacts: ModelArtifacts,
+        explainer: ExplainerEngine,
+        pool: ProcessPoolExecutor | None,
+        adrs: Sequence[Any],
+        tier: ExplanationTierEnum,
+    ) -> List[dict]:
+        features = artifacts.feature_transform.transform(adrs)
+
+        explanation_keys = self._explanation_keys(
+            artifacts, explainer, features, tier
+        )
+        explanations = await self._cache_get(artifacts, explanation_keys)
+
+        missing = [i for i, explanation in enumerate(explanations) if explanation is None]
+
+        if missing:
+            computed = await self._call(
+                explain_features,
+                artifacts,
+                explainer,
+                pool,
+                features[missing],
+                tier,
+            )
+
+            for i, explanation in zip(missing, computed):
+                explanations[i] = explanation
+
+            await self._cache_put(
+                artifacts, {explanation_keys[i]: explanations[i] for i in missing}
+            )
+
+        return explanations
+
+    async def classify(self, artifacts: ModelArtifacts, adrs: Sequence[Any]) -> List[str]:
+        """
+        Predict the levels of ADRs with another model than the one being
+        scored with, e.g. the shadow challenger. Its feature transform and
+        predict both run on the inference thread, the workers only hold the
+        current version.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._thread, classify_adrs, artifacts, adrs
+        )
+
+    async def _predict(
+        self, artifacts: ModelArtifacts, features: np.ndarray
+    ) -> np.ndarray | None:
+        """The predictor's output, or None for the workers to predict."""
+        if self.predictor is None:
+            return None
+
+        try:
+            return await self.predictor.predict(artifacts, features)
+        except PredictorUnavailable as e:
+            predictor_fallbacks.inc()
+            logging.warning(f"Predicting in process, the predictor failed: {e}")
+            return None
+
+    @contextmanager
+    def queued(self, requests: int = 1):
+        """
+        Count requests against queue_depth while they wait for or are in
+        inference, raising InferenceQueueFull when there is no room for them.
+        """
+        if self._queued + requests > self.queue_depth:
+            raise InferenceQueueFull()
+
+        self._queued += requests
+        try:
+            yield
+        finally:
+            self._queued -= requests
+
+    async def _call(
+        self,
+        function: Callable,
+        artifacts: ModelArtifacts,
+        explainer: ExplainerEngine,
+        pool: ProcessPoolExecutor | None,
+        features: np.ndarray,
+        *args,
+    ) -> Any:
+        if pool is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._thread, function, artifacts, explainer, features, *args
+            )
+
+        return await asyncio.wrap_future(
+            pool.submit(_run_in_worker, function, features, *args)
+        )
+
+    def _explanation_keys(
+        self,
+        artifacts: ModelArtifacts,
+        explainer: ExplainerEngine,
+        features: np.ndarray,
+        tier: ExplanationTierEnum,
+    ) -> List[str]:
+        cache_id = explainer.cache_id(tier)
+        return [
+            cache_key("explanation", artifacts.version, cache_id, row=row)
+            for row in features
+        ]
+
+    async def _cache_get(
+        self, artifacts: ModelArtifacts, keys: List[str]
+    ) -> List[dict | None]:
+        if self.cache is None:
+            return [None] * len(keys)
+
+        # SQLite reads and JSON decoding stay off the loop. Local artifacts
+        # have no version to tell them apart on disk
+        return await asyncio.to_thread(
+            self.cache.get_many,
+            keys,
+            persistent=artifacts.version != LOCAL_MODEL_VERSION,
+        )
+
+    async def _cache_put(self, artifacts: ModelArtifacts, entries: Dict[str, dict]):
+        if self.cache is None:
+            return
+
+        await asyncio.to_thread(
+            self.cache.put_many,
+            entries,
+            persistent=artifacts.version != LOCAL_MODEL_VERSION,
+        )
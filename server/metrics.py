@@ -0,0 +1,86 @@
+import bisect
+import threading
+from typing import Dict, Sequence
+
+
+class Counter:
+    """A number that only goes up."""
+
+    def __init__(self, description: str):
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "counter",
+            "description": self.description,
+            "value": self._value,
+        }
+
+
+class Histogram:
+    """Counts observations into fixed buckets, Prometheus style (cumulative)."""
+
+    def __init__(self, description: str, buckets: Sequence[float]):
+        self.description = description
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets + ["+Inf"], counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+
+        return {
+            "type": "histogram",
+            "description": self.description,
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "buckets": cumulative,
+        }
+
+
+registry: Dict[str, Counter | Histogram] = {}
+
+
+def counter(name: str, description: str) -> Counter:
+    """Get or create the counter registered under name."""
+    if name not in registry:
+        registry[name] = Counter(description)
+    return registry[name]
+
+
+def histogram(name: str, description: str, buckets: Sequence[float]) -> Histogram:
+    """Get or create the histogram registered under name."""
+    if name not in registry:
+        registry[name] = Histogram(description, buckets)
+    return registry[name]
+
+
+def snapshot() -> dict:
+    return {name: metric.snapshot() for name, metric in sorted(registry.items())}
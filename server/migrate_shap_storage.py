@@ -0,0 +1,112 @@
+"""
+Converts the SHAP values of saved causality assessment levels to the json or
+binary storage format.
+
+Runs at startup for SHAP_STORAGE_FORMAT. To convert by hand and reclaim the
+space, run from the server directory:
+
+    python migrate_shap_storage.py binary
+"""
+
+import argparse
+import logging
+
+from engines import engine
+from migrations import run_migrations
+from models import Base, CausalityAssessmentLevelModel
+from sessions import Session
+from shap_storage import SHAP_BLOB_COLUMNS, SHAP_COLUMNS
+from sqlalchemy import text
+
+# Levels converted per transaction
+BATCH_SIZE = 500
+
+
+def migrate_shap_storage(to_format: str) -> int:
+    """
+    Convert every level stored in the other format, return how many were.
+    The blob columns come from migrations.py, which runs first.
+    """
+    model = CausalityAssessmentLevelModel
+    if to_format == "binary":
+        # JSON columns hold the JSON null rather than SQL NULL when empty
+        source = [model.base_values, model.shap_values_matrix]
+        pending = model.shap_values_matrix_blob.is_(None)
+    else:
+        source = [model.base_values_blob, model.shap_values_matrix_blob]
+        pending = model.shap_values_matrix_blob.is_not(None)
+
+    converted = 0
+    last_id = ""
+
+    while True:
+        with Session() as session:
+            rows = (
+                session.query(model.id, *source)
+                .filter(pending, model.id > last_id)
+                .order_by(model.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            updates = []
+            for cal_id, base_values, matrix in rows:
+                if matrix is None:
+                    continue
+
+                if to_format == "binary":
+                    updates.append(
+                        {
+                            "id": cal_id,
+                            **dict.fromkeys(SHAP_COLUMNS),
+                            "base_values_blob": base_values,
+                            "shap_values_matrix_blob": matrix,
+                        }
+                    )
+                else:
+                    sum_per_class = matrix.astype(float).sum(axis=0)
+                    updates.append(
+                        {
+                            "id": cal_id,
+                            **dict.fromkeys(SHAP_BLOB_COLUMNS),
+                            "base_values": base_values.tolist(),
+                            "shap_values_matrix": matrix.tolist(),
+                            "shap_values_sum_per_class": sum_per_class.tolist(),
+                            "shap_values_and_base_values_sum_per_class": (
+                                sum_per_class + base_values
+                            ).tolist(),
+                        }
+                    )
+
+            session.bulk_update_mappings(model, updates)
+            session.commit()
+            converted += len(updates)
+
+    if converted:
+        logging.info(f"Converted {converted} SHAP explanations to {to_format}")
+
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("to_format", choices=["json", "binary"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(engine)
+    run_migrations()
+    migrate_shap_storage(args.to_format)
+
+    # SQLite only gives the freed pages back to the file system on VACUUM
+    with engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as connection:
+        connection.execute(text("VACUUM"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Versioned schema changes that create_all does not make, such as the indexes
+of the hot query paths. Applied versions are recorded in schema_migration.
+
+Runs at startup. To apply the migrations by hand, or to print the query plan
+of every raw SQL query and check that it uses the indexes, run from the
+server directory:
+
+    python migrations.py
+    python migrations.py check
+"""
+
+import argparse
+import logging
+import sys
+from typing import List
+
+from engines import engine
+from models import Base
+from queries import (
+    ADRS_MONTHLY,
+    ADRS_WEEKLY,
+    ADRS_WITH_CAUSALITY_AND_REVIEW_COUNT_TOTAL,
+    ALERT_LEVELS,
+    APPROVAL_STATUS,
+    SMS_MONTHLY,
+    SMS_MONTHLY_BY_TYPE,
+    SMS_WEEKLY,
+    adrs_with_causality_and_review_count,
+    alert_adrs,
+    alert_adrs_total,
+)
+from search import ADR_SEARCH_COLUMNS, match_expression
+from sqlalchemy import Connection, inspect, text
+
+# ADR columns the dashboards count by, over a created_at range
+ADR_DASHBOARD_COLUMNS = [
+    "patient_gender",
+    "pregnancy_status",
+    "known_allergy",
+    "rechallenge",
+    "dechallenge",
+    "severity",
+    "criteria_for_seriousness",
+    "is_serious",
+    "outcome",
+]
+
+# Columns causality_assessment_level gained with deferred, binary and
+# schema-referenced explanations, for tables made before them
+EXPLANATION_COLUMNS = [
+    ("explanation_status", "VARCHAR(14) NOT NULL DEFAULT 'ready'"),
+    ("explanation_tier", "VARCHAR(8)"),
+    ("feature_schema_id", "VARCHAR REFERENCES feature_schema (id)"),
+    ("base_values_blob", "BLOB"),
+    ("shap_values_matrix_blob", "BLOB"),
+]
+
+
+def add_explanation_columns(connection: Connection):
+    """Add the EXPLANATION_COLUMNS a table made by create_all already has not."""
+    existing = {
+        column["name"]
+        for column in inspect(connection).get_columns("causality_assessment_level")
+    }
+
+    for name, definition in EXPLANATION_COLUMNS:
+        if name not in existing:
+            connection.execute(
+                text(
+                    f"ALTER TABLE causality_assessment_level"
+                    f" ADD COLUMN {name} {definition}"
+                )
+            )
+
+
+HOT_PATH_INDEXES = [
+    # Lists sort on created_at, alerts join institutions and users
+    "CREATE INDEX IF NOT EXISTS ix_adr_created_at ON adr (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_adr_medical_institution_id"
+    " ON adr (medical_institution_id)",
+    "CREATE INDEX IF NOT EXISTS ix_adr_user_id ON adr (user_id)",
+    *[
+        f"CREATE INDEX IF NOT EXISTS ix_adr_{column}_created_at"
+        f" ON adr ({column}, created_at)"
+        for column in ADR_DASHBOARD_COLUMNS
+    ],
+    # The latest level of an ADR
+    "CREATE INDEX IF NOT EXISTS ix_causality_assessment_level_adr_id_created_at"
+    " ON causality_assessment_level (adr_id, created_at)",
+    # Only the few levels alerts are about, see queries.py. These cover the
+    # alert joins, a full index on the level would be picked over them
+    *[
+        f"CREATE INDEX IF NOT EXISTS ix_causality_assessment_level_{level.name}"
+        f" ON causality_assessment_level (adr_id, id)"
+        f" WHERE causality_assessment_level_value = '{level.name}'"
+        for level in ALERT_LEVELS
+    ],
+    # The explanation worker looks up pending levels
+    "CREATE INDEX IF NOT EXISTS ix_causality_assessment_level_explanation_status"
+    " ON causality_assessment_level (explanation_status)",
+    # Approved and not approved counts of a level without reading the reviews
+    "CREATE INDEX IF NOT EXISTS ix_review_causality_assessment_level_id_approved"
+    " ON review (causality_assessment_level_id, approved, id)",
+    "CREATE INDEX IF NOT EXISTS ix_review_created_at ON review (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_sms_message_adr_id ON sms_message (adr_id)",
+    "CREATE INDEX IF NOT EXISTS ix_sms_message_sms_type_created_at"
+    " ON sms_message (sms_type, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_sms_message_status ON sms_message (status)",
+    "CREATE INDEX IF NOT EXISTS ix_medical_institution_created_at"
+    " ON medical_institution (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_medical_institution_telephone_institution_id"
+    " ON medical_institution_telephone (medical_institution_id)",
+]
+
+_OLDER_DUPLICATE_REVIEWS = """
+    FROM review WHERE rowid NOT IN (
+        SELECT MAX(rowid) FROM review
+        GROUP BY user_id, causality_assessment_level_id
+    )
+"""
+
+
+def remove_duplicate_reviews(connection: Connection):
+    """
+    Keep the latest review when a reviewer reviewed a level more than once,
+    logging the ones removed so they can be restored by hand.
+    """
+    duplicates = connection.execute(
+        text(
+            "SELECT id, user_id, causality_assessment_level_id, approved,"
+            f" proposed_causality_level, reason, created_at {_OLDER_DUPLICATE_REVIEWS}"
+        )
+    ).all()
+
+    for review in duplicates:
+        logging.warning(f"Removing duplicate review {dict(review._mapping)}")
+
+    if duplicates:
+        connection.execute(text(f"DELETE {_OLDER_DUPLICATE_REVIEWS}"))
+        logging.warning(
+            f"Removed {len(duplicates)} reviews of levels their reviewer reviewed again"
+        )
+
+
+UNIQUE_REVIEWS = [
+    remove_duplicate_reviews,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_review_user_id_causality_assessment_level_id"
+    " ON review (user_id, causality_assessment_level_id)",
+]
+
+_columns = ", ".join(ADR_SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{column}" for column in ADR_SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{column}" for column in ADR_SEARCH_COLUMNS)
+
+ADR_FULL_TEXT_SEARCH = [
+    # Reads the text from adr by rowid, and indexes the first 2 and 3
+    # characters of words for prefix searches
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS adr_fts USING fts5(
+        {_columns},
+        content='adr',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS adr_fts_insert AFTER INSERT ON adr BEGIN
+        INSERT INTO adr_fts (rowid, {_columns}) VALUES (new.rowid, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS adr_fts_delete AFTER DELETE ON adr BEGIN
+        INSERT INTO adr_fts (adr_fts, rowid, {_columns})
+        VALUES ('delete', old.rowid, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS adr_fts_update AFTER UPDATE OF {_columns} ON adr
+    BEGIN
+        INSERT INTO adr_fts (adr_fts, rowid, {_columns})
+        VALUES ('delete', old.rowid, {_old_values});
+        INSERT INTO adr_fts (rowid, {_columns}) VALUES (new.rowid, {_new_values});
+    END
+    """,
+    # Index the ADRs saved before the triggers
+    "INSERT INTO adr_fts (adr_fts) VALUES ('rebuild')",
+]
+
+KEYSET_INDEXES = [
+    # Lists page newest first on (created_at, id), see pagination.py. These
+    # replace the created_at indexes, which they start with
+    "DROP INDEX IF EXISTS ix_adr_created_at",
+    "CREATE INDEX IF NOT EXISTS ix_adr_created_at_id ON adr (created_at, id)",
+    "DROP INDEX IF EXISTS ix_review_created_at",
+    "CREATE INDEX IF NOT EXISTS ix_review_created_at_id ON review (created_at, id)",
+    "DROP INDEX IF EXISTS ix_medical_institution_created_at",
+    "CREATE INDEX IF NOT EXISTS ix_medical_institution_created_at_id"
+    " ON medical_institution (created_at, id)",
+    "DROP INDEX IF EXISTS ix_sms_message_sms_type_created_at",
+    "CREATE INDEX IF NOT EXISTS ix_sms_message_sms_type_created_at_id"
+    " ON sms_message (sms_type, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_sms_message_created_at_id"
+    " ON sms_message (created_at, id)",
+]
+
+CURRENT_LEVEL_INDEXES = [
+    # The current level of an ADR is its latest by (created_at, id), see
+    # queries.py. This covers finding it, so the levels, SHAP blobs and all,
+    # are not read
+    "DROP INDEX IF EXISTS ix_causality_assessment_level_adr_id_created_at",
+    "CREATE INDEX IF NOT EXISTS ix_causality_assessment_level_adr_id_created_at_id"
+    " ON causality_assessment_level (adr_id, created_at, id)",
+]
+
+# (version, name, statements), applied in order and never edited once shipped.
+# A statement is SQL or a function of the connection, for changes SQLite can
+# not make conditionally. Migration 0 comes first because migration 1 indexes
+# explanation_status
+MIGRATIONS = [
+    (0, "causality assessment level explanation columns", [add_explanation_columns]),
+    (1, "hot path indexes", HOT_PATH_INDEXES),
+    (2, "one review per reviewer and level", UNIQUE_REVIEWS),
+    (3, "ADR full-text search", ADR_FULL_TEXT_SEARCH),
+    (4, "keyset pagination indexes", KEYSET_INDEXES),
+    (5, "current level index", CURRENT_LEVEL_INDEXES),
+]
+
+# A search like the endpoints make
+SEARCH = match_expression("ki", ["patient_name"])
+
+# A page after a cursor
+PAGE = {
+    "limit": 50,
+    "offset": 0,
+    "cursor_created_at": "2024-01-01 00:00:00.000000",
+    "cursor_id": "",
+}
+
+# Raw SQL queries with example parameters, and indexes or tables their plans
+# must use
+QUERY_PLAN_CHECKS = [
+    (
+        "adrs_with_causality_and_review_count",
+        adrs_with_causality_and_review_count(search=False),
+        PAGE,
+        [
+            "ix_adr_created_at_id",
+            "ix_causality_assessment_level_adr_id_created_at_id",
+            "ix_review_causality_assessment_level_id_approved",
+        ],
+    ),
+    (
+        "adrs_with_causality_and_review_count search",
+        adrs_with_causality_and_review_count(search=True),
+        {"query": SEARCH, **PAGE},
+        [
+            "adr_fts",
+            "ix_causality_assessment_level_adr_id_created_at_id",
+            "ix_review_causality_assessment_level_id_approved",
+        ],
+    ),
+    (
+        "adrs_with_causality_and_review_count total",
+        ADRS_WITH_CAUSALITY_AND_REVIEW_COUNT_TOTAL,
+        {"query": SEARCH},
+        ["adr_fts"],
+    ),
+    (
+        "approval_status",
+        APPROVAL_STATUS,
+        {},
+        [
+            "ix_causality_assessment_level_adr_id_created_at_id",
+            "ix_review_causality_assessment_level_id_approved",
+        ],
+    ),
+    ("adrs_weekly", ADRS_WEEKLY, {}, ["ix_adr_created_at_id"]),
+    ("adrs_monthly", ADRS_MONTHLY, {}, ["ix_adr_created_at_id"]),
+    ("sms_weekly", SMS_WEEKLY, {}, ["ix_sms_message_created_at_id"]),
+    (
+        "sms_monthly_by_type",
+        SMS_MONTHLY_BY_TYPE,
+        {"sms_type": "individual_alert"},
+        ["ix_sms_message_sms_type_created_at_id"],
+    ),
+    ("sms_monthly", SMS_MONTHLY, {}, ["ix_sms_message_created_at_id"]),
+    *[
+        (
+            f"alert_adrs {level.name} {'sent' if sent else 'to send'}"
+            f"{' search' if search else ''}",
+            alert_adrs(level, sent, search),
+            {"query": SEARCH, **PAGE},
+            (["adr_fts"] if search else ["ix_adr_created_at_id"])
+            + [
+                f"ix_causality_assessment_level_{level.name}",
+                "ix_review_causality_assessment_level_id_approved",
+                "ix_sms_message_adr_id",
+                "ix_medical_institution_telephone_institution_id",
+            ],
+        )
+        for level in ALERT_LEVELS
+        for sent in [True, False]
+        for search in [False, True]
+    ],
+    *[
+        (
+            f"alert_adrs {level.name} {'sent' if sent else 'to send'} total",
+            alert_adrs_total(level, sent),
+            {"query": SEARCH},
+            [
+                "adr_fts",
+                f"ix_causality_assessment_level_{level.name}",
+                "ix_review_causality_assessment_level_id_approved",
+                "ix_sms_message_adr_id",
+            ],
+        )
+        for level in ALERT_LEVELS
+        for sent in [True, False]
+    ],
+]
+
+
+def run_migrations() -> List[int]:
+    """Apply the migrations not applied yet, return their versions."""
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migration ("
+                "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+                "applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        applied = set(
+            connection.execute(text("SELECT version FROM schema_migration")).scalars()
+        )
+
+    versions = []
+    for version, name, statements in MIGRATIONS:
+        if version in applied:
+            continue
+
+        # Each migration is applied entirely or not at all
+        with engine.begin() as connection:
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(text(statement))
+            connection.execute(
+                text(
+                    "INSERT INTO schema_migration (version, name)"
+                    " VALUES (:version, :name)"
+                ),
+                {"version": version, "name": name},
+            )
+
+        logging.info(f"Applied migration {version}: {name}")
+        versions.append(version)
+
+    return versions
+
+
+def check_query_plans() -> List[str]:
+    """Print the plan of every raw SQL query, return those missing an index."""
+    failing = []
+
+    with engine.connect() as connection:
+        # Plans follow the table statistics, without them SQLite guesses
+        connection.execute(text("ANALYZE"))
+
+        for name, query, params, indexes in QUERY_PLAN_CHECKS:
+            plan = [
+                row.detail
+                for row in connection.execute(
+                    text(f"EXPLAIN QUERY PLAN {query}"), params
+                )
+            ]
+            missing = [
+                index
+                for index in indexes
+                if not any(index in detail for detail in plan)
+            ]
+
+            print(f"{name}{'  MISSING ' + ', '.join(missing) if missing else ''}")
+            for detail in plan:
+                print(f"    {detail}")
+
+            if missing:
+                failing.append(name)
+
+    return failing
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "command", nargs="?", choices=["apply", "check"], default="apply"
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    run_migrations()
+
+    if args.command == "check" and check_query_plans():
+        sys.exit(1)
@@ -5,10 +5,13 @@ from sqlalchemy import Column, DateTime, String
 
 
 class TimestampMixin:
+    # Called per row rather than once at import, lists order rows by created_at
     created_at = Column(
-        DateTime, default=datetime.datetime.now(datetime.timezone.utc)
+        DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc)
     )  # Set at creation
-    updated_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    updated_at = Column(
+        DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc)
+    )
 
 
 class IDMixin:
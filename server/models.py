@@ -7,17 +7,21 @@ from basemodels import (
     CausalityAssessmentLevelGetResponse,
     CriteriaForSeriousnessEnum,
     DechallengeEnum,
+    ExplanationStatusEnum,
+    ExplanationTierEnum,
     GenderEnum,
     IsSeriousEnum,
     KnownAllergyEnum,
     OutcomeEnum,
     PregnancyStatusEnum,
     RechallengeEnum,
+    RescoringJobStatusEnum,
     ReviewEnum,
     SeverityEnum,
     SMSMessageTypeEnum,
 )
 from mixins import IDMixin, TimestampMixin
+from shap_storage import pack_array, unpack_array
 from sqlalchemy import (
     JSON,
     Boolean,
@@ -26,17 +30,36 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     LargeBinary,
     String,
     Uuid,
 )
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, deferred, relationship
+from sqlalchemy.types import TypeDecorator
 
 Base = declarative_base()
 
 
+class Float32Array(TypeDecorator):
+    """Numeric array stored as a float32 blob by pack_array."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return pack_array(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return unpack_array(value)
+
+
 class MedicalInstitutionModel(Base, IDMixin, TimestampMixin):
     __tablename__ = "medical_institution"
 
@@ -210,13 +233,35 @@ class CausalityAssessmentLevelModel(Base, IDMixin, TimestampMixin):
     causality_assessment_level_value = Column(
         SQLAlchemyEnum(CausalityAssessmentLevelEnum), nullable=False
     )
-
-    base_values = Column(JSON, nullable=True)
-    shap_values_matrix = Column(JSON, nullable=True)
-    shap_values_sum_per_class = Column(JSON, nullable=True)
-    shap_values_and_base_values_sum_per_class = Column(JSON, nullable=True)
-    feature_names = Column(JSON, nullable=True)
-    feature_values = Column(JSON, nullable=True)
+    explanation_status = Column(
+        SQLAlchemyEnum(ExplanationStatusEnum),
+        nullable=False,
+        default=ExplanationStatusEnum.ready,
+    )
+    # Tier the SHAP values were or will be computed with, None if unclassified
+    explanation_tier = Column(SQLAlchemyEnum(ExplanationTierEnum), nullable=True)
+
+    # Explanations are deferred so rows load without them, see shap_storage.py
+    base_values = deferred(Column(JSON, nullable=True), group="explanation")
+    shap_values_matrix = deferred(Column(JSON, nullable=True), group="explanation")
+    shap_values_sum_per_class = deferred(
+        Column(JSON, nullable=True), group="explanation"
+    )
+    shap_values_and_base_values_sum_per_class = deferred(
+        Column(JSON, nullable=True), group="explanation"
+    )
+    # Rows saved before feature schemas list their feature names themselves
+    feature_schema_id = Column(String, ForeignKey("feature_schema.id"), nullable=True)
+    feature_names = deferred(Column(JSON, nullable=True), group="explanation")
+    feature_values = deferred(Column(JSON, nullable=True), group="explanation")
+
+    # The same SHAP values when SHAP_STORAGE_FORMAT=binary
+    base_values_blob = deferred(
+        Column(Float32Array, nullable=True), group="explanation"
+    )
+    shap_values_matrix_blob = deferred(
+        Column(Float32Array, nullable=True), group="explanation"
+    )
 
     reviews = relationship(
         "ReviewModel",
@@ -224,10 +269,95 @@ class CausalityAssessmentLevelModel(Base, IDMixin, TimestampMixin):
         cascade="all, delete-orphan",
     )
 
+    drivers = relationship(
+        "ExplanationDriverModel",
+        back_populates="causality_assessment_level",
+        cascade="all, delete-orphan",
+        order_by="(ExplanationDriverModel.class_value, ExplanationDriverModel.rank)",
+    )
+
 
 # ml_model = relationship("MLModelModel", back_populates="causality_assessment_levels")
 
 
+class FeatureSchemaModel(Base, IDMixin, TimestampMixin):
+    __tablename__ = "feature_schema"
+
+    ml_model_id = Column(String, nullable=False, index=True)
+    feature_names = Column(JSON, nullable=False)
+    display_labels = Column(JSON, nullable=False)
+    # Unscaled [min, max] of numerical features, None for the others
+    scaler_ranges = Column(JSON, nullable=False)
+    # Causality assessment level of each column of the SHAP values
+    class_values = Column(JSON, nullable=False)
+
+
+class ExplanationDriverModel(Base, IDMixin):
+    __tablename__ = "explanation_driver"
+    __table_args__ = (
+        # Which levels a feature drove towards or away from a class
+        Index(
+            "ix_explanation_driver_feature_class",
+            "feature_name",
+            "class_value",
+            "shap_value",
+        ),
+    )
+
+    causality_assessment_level_id = Column(
+        String, ForeignKey("causality_assessment_level.id"), nullable=False, index=True
+    )
+    causality_assessment_level = relationship(
+        "CausalityAssessmentLevelModel",
+        back_populates="drivers",
+    )
+
+    class_value = Column(SQLAlchemyEnum(CausalityAssessmentLevelEnum), nullable=False)
+    # 1 for the feature with the largest absolute SHAP value for the class
+    rank = Column(Integer, nullable=False)
+    feature_index = Column(Integer, nullable=False)
+    feature_name = Column(String, nullable=False)
+    shap_value = Column(Float, nullable=False)
+
+
+class ShadowPredictionModel(Base, IDMixin, TimestampMixin):
+    __tablename__ = "shadow_prediction"
+
+    adr_id = Column(String, ForeignKey("adr.id"), nullable=False)
+    causality_assessment_level_id = Column(
+        String, ForeignKey("causality_assessment_level.id"), nullable=False
+    )
+
+    champion_model_id = Column(String, nullable=False)
+    challenger_model_id = Column(String, nullable=False)
+    champion_value = Column(SQLAlchemyEnum(CausalityAssessmentLevelEnum), nullable=False)
+    challenger_value = Column(
+        SQLAlchemyEnum(CausalityAssessmentLevelEnum), nullable=False
+    )
+    agrees = Column(Boolean, nullable=False)
+
+
+class RescoringJobModel(Base, IDMixin, TimestampMixin):
+    __tablename__ = "rescoring_job"
+
+    # Model version the ADRs are re-scored with
+    ml_model_id = Column(String, nullable=False)
+    status = Column(
+        SQLAlchemyEnum(RescoringJobStatusEnum),
+        nullable=False,
+        default=RescoringJobStatusEnum.running,
+    )
+
+    # (created_at, id) of the last ADR whose chunk was written
+    cursor_created_at = Column(DateTime, nullable=True)
+    cursor_adr_id = Column(String, nullable=True)
+
+    adrs_seen = Column(Integer, nullable=False, default=0)
+    adrs_rescored = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
 class ReviewModel(Base, IDMixin, TimestampMixin):
     __tablename__ = "review"
 
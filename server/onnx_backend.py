@@ -0,0 +1,96 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Optional, only needed with inference_backend set to onnx, see
+# requirements-onnx.txt
+try:
+    import onnxruntime
+    from skl2onnx import to_onnx
+except ImportError:
+    onnxruntime = None
+
+# Largest difference in predict_proba allowed between ONNX Runtime and sklearn
+PARITY_TOLERANCE = 1e-4
+
+
+class OnnxClassifier:
+    """
+    predict and predict_proba of a fitted sklearn classifier, run by ONNX
+    Runtime on the CPU. Rows are cast to float32, which the converted graph
+    takes.
+    """
+
+    def __init__(self, onnx_model, classes: np.ndarray):
+        options = onnxruntime.SessionOptions()
+        # Inference workers already run side by side, one thread each
+        options.intra_op_num_threads = 1
+
+        self._session = onnxruntime.InferenceSession(
+            onnx_model.SerializeToString(),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_name = self._session.get_inputs()[0].name
+        # Outputs are the label and then the probabilities of each class
+        self._probabilities_name = self._session.get_outputs()[1].name
+        self.classes_ = classes
+
+    def predict_proba(self, X) -> np.ndarray:
+        (probabilities,) = self._session.run(
+            [self._probabilities_name],
+            {self._input_name: np.asarray(X, dtype=np.float32)},
+        )
+        return probabilities.astype(np.float64)
+
+    def predict(self, X) -> np.ndarray:
+        # Same as sklearn classifiers, without a second pass for the label
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+
+def convert_classifier(
+    estimator, parity_features: pd.DataFrame
+) -> OnnxClassifier | None:
+    """
+    Convert a fitted classifier to ONNX and check it reproduces sklearn on
+    parity_features. Returns None when either step fails, so callers keep
+    using sklearn.
+    """
+    if onnxruntime is None:
+        raise RuntimeError(
+            "inference_backend is onnx but onnxruntime or skl2onnx is not"
+            " installed, pip install -r requirements-onnx.txt"
+        )
+
+    rows = parity_features.to_numpy(dtype=np.float32)
+
+    try:
+        onnx_model = to_onnx(
+            estimator,
+            rows[:1],
+            options={id(estimator): {"zipmap": False}},
+        )
+        classifier = OnnxClassifier(onnx_model, estimator.classes_)
+        probabilities = classifier.predict_proba(rows)
+    except Exception as e:
+        logging.warning(
+            f"Could not convert {type(estimator).__name__} to ONNX, using sklearn: {e}"
+        )
+        return None
+
+    deviation = np.abs(probabilities - estimator.predict_proba(parity_features)).max()
+    mismatches = np.sum(classifier.predict(rows) != estimator.predict(parity_features))
+
+    if deviation > PARITY_TOLERANCE or mismatches:
+        logging.warning(
+            f"ONNX model differs from sklearn on {len(rows)} rows "
+            f"(max |dev| {deviation:.2e}, {mismatches} labels), using sklearn"
+        )
+        return None
+
+    logging.info(
+        f"Running {type(estimator).__name__} on ONNX Runtime "
+        f"(max |dev| {deviation:.2e} on {len(rows)} rows)"
+    )
+    return classifier
@@ -0,0 +1,154 @@
+"""
+Keyset pagination of lists, newest first.
+
+Lists are ordered by a key, (created_at, id) unless said otherwise, in
+descending order. Besides page and size every page has next_cursor, an
+opaque cursor of the key of its last row. Sent back as cursor it reads the
+next page from the index right after that row, rather than counting past
+every row before it with OFFSET, so a deep page is as fast as the first and
+rows added in between are neither skipped nor shown twice. Pages read with a
+cursor leave out total and pages, counting them would read the whole list.
+"""
+
+import base64
+import binascii
+import datetime
+import enum
+import json
+from typing import Any, Dict, Generic, List, Mapping, Optional, Sequence
+
+from fastapi import HTTPException, Query, status
+from fastapi_pagination import Page, Params, resolve_params
+from fastapi_pagination.bases import AbstractParams, RawParams
+from fastapi_pagination.types import GreaterEqualZero
+from sqlalchemy import String, desc, literal, tuple_
+from typing_extensions import TypeVar
+
+T = TypeVar("T", default=Any)
+
+KEY = ("created_at", "id")
+
+CURSOR_DESCRIPTION = (
+    "next_cursor of the previous page, to read the page after it instead of page"
+)
+
+# How SQLAlchemy stores DateTime columns in SQLite, cursors hold the stored
+# text so they compare the way the column does
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class KeysetParams(Params):
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
+
+    def to_raw_params(self) -> RawParams:
+        if self.cursor is None:
+            return super().to_raw_params()
+
+        # The query starts after the cursor, see after_cursor
+        return RawParams(limit=self.size, offset=0, include_total=False)
+
+
+class KeysetPage(Page[T], Generic[T]):
+    total: Optional[GreaterEqualZero] = None
+    pages: Optional[GreaterEqualZero] = None
+    next_cursor: Optional[str] = None
+
+    __params_type__ = KeysetParams
+
+    @classmethod
+    def create(
+        cls,
+        items: Sequence[T],
+        params: AbstractParams,
+        *,
+        total: Optional[int] = None,
+        **kwargs: Any,
+    ) -> "KeysetPage[T]":
+        # Lists in another order, such as search results, pass next_cursor=None
+        if "next_cursor" not in kwargs:
+            kwargs["next_cursor"] = next_cursor(items, params.size)
+
+        return super().create(items, params, total=total, **kwargs)
+
+
+def _key_value(value: Any) -> Optional[str]:
+    if isinstance(value, datetime.datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, enum.Enum):
+        return value.name
+    return None if value is None else str(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor of the key `values` of a row."""
+    key = json.dumps([_key_value(value) for value in values])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str, length: int = len(KEY)) -> List[str]:
+    """Key values of a cursor from encode_cursor, 400 if it is not one."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != length
+        or not all(isinstance(value, str) for value in values)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    return values
+
+
+def next_cursor(
+    rows: Sequence[Any], size: int, key: Sequence[str] = KEY
+) -> Optional[str]:
+    """Cursor of the last of `rows`, None once a page comes back short."""
+    if not rows or len(rows) < size:
+        return None
+
+    last = rows[-1]
+    if isinstance(last, Mapping):
+        return encode_cursor([last[name] for name in key])
+    return encode_cursor([getattr(last, name) for name in key])
+
+
+def older_than(key: Sequence[Any], values: Sequence[str], or_equal: bool = False):
+    """Condition of rows after `values` of the `key` columns, newest first."""
+    row, bound = tuple_(*key), tuple_(*[literal(value, String) for value in values])
+
+    # A row value comparison is a range of an index on the key columns
+    return row <= bound if or_equal else row < bound
+
+
+def after_cursor(query, *key):
+    """
+    `query` ordered newest first by the `key` columns, starting after the
+    cursor of the request if there is one.
+    """
+    query = query.order_by(*[desc(column) for column in key])
+
+    cursor = resolve_params().cursor
+    if cursor:
+        query = query.where(older_than(key, decode_cursor(cursor, len(key))))
+
+    return query
+
+
+def ensure_no_cursor():
+    """400 if the request pages by cursor, for lists in another order."""
+    if resolve_params().cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search results are paged by page, not by cursor",
+        )
+
+
+def cursor_params(cursor: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parameters of the raw SQL queries for `cursor`, see queries.py."""
+    created_at, id = decode_cursor(cursor) if cursor else (None, None)
+    return {"cursor_created_at": created_at, "cursor_id": id}
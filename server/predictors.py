@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+
+import httpx
+import metrics
+import numpy as np
+import pandas as pd
+from artifacts import ModelArtifacts
+from config import settings
+
+http_requests = metrics.counter(
+    "predictor_http_requests", "Calls made to the remote inference server"
+)
+http_failures = metrics.counter(
+    "predictor_http_failures", "Calls to the remote inference server that failed"
+)
+unversioned_responses = metrics.counter(
+    "predictor_unversioned_responses",
+    "Calls answered without naming the model version that predicted",
+)
+version_mismatches = metrics.counter(
+    "predictor_version_mismatches",
+    "Calls answered by a different model version than the one scoring",
+)
+circuit_rejections = metrics.counter(
+    "predictor_circuit_rejections",
+    "Predictions not sent because the circuit to the inference server was open",
+)
+
+
+MODEL_VERSION_HEADER = "X-Model-Version"
+
+
+class PredictorUnavailable(Exception):
+    """Raised when a predictor cannot answer, so the caller can fall back."""
+
+
+class Predictor:
+    """
+    Where the causality classifier runs. predict takes rows already mapped by
+    the feature transform and returns what the model's predict returns, the
+    ordinal-encoded causality assessment levels.
+    """
+
+    async def predict(
+        self, artifacts: ModelArtifacts, features: np.ndarray
+    ) -> np.ndarray:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InProcessPredictor(Predictor):
+    """The model loaded in this process, run in a thread."""
+
+    async def predict(self, artifacts, features):
+        prediction_input = pd.DataFrame(
+            features, columns=artifacts.feature_transform.prediction_columns
+        )
+        return await asyncio.to_thread(
+            artifacts.runtime_model.predict, prediction_input
+        )
+
+
+class HTTPPredictor(Predictor):
+    """
+    The model served by the MLflow inference server, called on its pyfunc
+    /invocations endpoint over a pool of keep-alive connections.
+
+    A server may name the model version it serves in the MODEL_VERSION_HEADER
+    of its responses, e.g. set by a proxy in front of it. Predictions of any
+    other version than the artifacts being scored with are refused, they
+    would be labeled and cached as that version. mlflow models serve does not
+    send the header, so responses without it are only refused when
+    require_version is set.
+
+    Batches larger than max_batch_rows are split and sent concurrently. After
+    failure_threshold calls fail in a row the circuit opens and predictions
+    are refused for reset_seconds, then a single call is let through to see
+    if the server is back.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout_seconds: float,
+        max_connections: int,
+        max_batch_rows: int,
+        failure_threshold: int,
+        reset_seconds: float,
+        require_version: bool = False,
+    ):
+        self.url = url
+        self.require_version = require_version
+        self.max_batch_rows = max_batch_rows
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    async def predict(self, artifacts, features):
+        self._acquire()
+
+        chunks = [
+            features[start : start + self.max_batch_rows]
+            for start in range(0, len(features), self.max_batch_rows)
+        ]
+
+        try:
+            results = await asyncio.gather(
+                *[self._invoke(artifacts, chunk) for chunk in chunks]
+            )
+        except Exception as e:
+            self._record_failure()
+            raise PredictorUnavailable(f"{self.url}: {e!r}") from e
+        finally:
+            # Also when cancelled, or the circuit would never close again
+            self._probing = False
+
+        self._record_success()
+        return np.concatenate(results)
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def _invoke(self, artifacts: ModelArtifacts, features: np.ndarray):
+        http_requests.inc()
+
+        response = await self._client.post(
+            self.url,
+            json={
+                "dataframe_split": {
+                    "columns": artifacts.feature_transform.prediction_columns,
+                    "data": features.tolist(),
+                }
+            },
+        )
+        response.raise_for_status()
+
+        version = response.headers.get(MODEL_VERSION_HEADER)
+        if version is None and not self.require_version:
+            unversioned_responses.inc()
+        elif version != artifacts.version:
+            version_mismatches.inc()
+            raise ValueError(
+                f"Server has model version {version}, expected {artifacts.version}"
+            )
+
+        predictions = np.asarray(response.json()["predictions"])
+        if len(predictions) != len(features):
+            raise ValueError(
+                f"Got {len(predictions)} predictions for {len(features)} rows"
+            )
+
+        return predictions
+
+    def _acquire(self):
+        """Refuse to call while the circuit is open, let one probe through after."""
+        if self._failures < self.failure_threshold:
+            return
+
+        if time.monotonic() < self._open_until or self._probing:
+            circuit_rejections.inc()
+            raise PredictorUnavailable(f"Circuit to {self.url} is open")
+
+        self._probing = True
+
+    def _record_success(self):
+        if self._failures >= self.failure_threshold:
+            logging.info(f"Inference server at {self.url} is back, closing the circuit")
+
+        self._failures = 0
+
+    def _record_failure(self):
+        http_failures.inc()
+        self._failures += 1
+
+        if self._failures >= self.failure_threshold:
+            self._open_until = time.monotonic() + self.reset_seconds
+            logging.warning(
+                f"Opening the circuit to {self.url} for {self.reset_seconds}s "
+                f"after {self._failures} failed calls"
+            )
+
+
+def build_predictor() -> Predictor | None:
+    """
+    The configured remote predictor, or None when the inference workers
+    predict with the model they loaded.
+    """
+    if settings.inference_predictor == "local":
+        return None
+
+    if settings.inference_predictor == "http":
+        return HTTPPredictor(
+            f"http://{settings.mlflow_inference_server_host}:{settings.mlflow_inference_server_port}/invocations",
+            settings.inference_predictor_timeout_seconds,
+            settings.inference_predictor_max_connections,
+            settings.inference_predictor_max_batch_rows,
+            settings.inference_predictor_failure_threshold,
+            settings.inference_predictor_reset_seconds,
+            settings.inference_predictor_require_version,
+        )
+
+    raise ValueError(
+        f"Unknown inference predictor {settings.inference_predictor!r}, expected local or http"
+    )
@@ -0,0 +1,259 @@
+"""
+Raw SQL of the endpoints, kept together so migrations.py can check each one
+uses the indexes it adds.
+
+An ADR's current causality assessment level is its latest by (created_at,
+id), re-scoring adds newer ones. Every query that shows or counts the level
+of an ADR, or the reviews of it, only looks at the current one, found from
+the (adr_id, created_at, id) index.
+
+The partial indexes on causality_assessment_level only apply to queries that
+compare the level with the same literal, not with a bound parameter, so the
+alert queries are built with the level inlined and name the index, which
+SQLite would pass over for a scan of a small table.
+
+:query searches ADRs with an FTS5 query from search.match_expression, or is
+None to list them all.
+
+Lists start after the (created_at, id) of :cursor_created_at and :cursor_id,
+the last row of the previous page, see pagination.py. Both are None from the
+start of the list.
+"""
+
+from basemodels import CausalityAssessmentLevelEnum
+
+ADRS_WITH_CAUSALITY_AND_REVIEW_COUNT_TOTAL = """
+    SELECT CASE
+        WHEN :query IS NULL THEN (SELECT COUNT(*) FROM adr)
+        ELSE (SELECT COUNT(*) FROM adr_fts WHERE adr_fts MATCH :query)
+    END;
+"""
+
+
+def _after_cursor(table: str) -> str:
+    """
+    Rows of `table` after the cursor. Compared as a row value with the
+    parameters, not skipped when they are None, so SQLite reads it as a range
+    of the (created_at, id) index. The default is text as DATETIME columns
+    would compare a number below every date.
+    """
+    return (
+        f"({table}.created_at, {table}.id) < ("
+        "COALESCE(:cursor_created_at, '9999-12-31'), COALESCE(:cursor_id, ''))"
+    )
+
+
+def _is_current(cal: str) -> str:
+    """Whether the level `cal` is the current one of its ADR."""
+    return f"""NOT EXISTS (
+        SELECT 1 FROM causality_assessment_level newer
+        WHERE newer.adr_id = {cal}.adr_id
+            AND (newer.created_at, newer.id) > ({cal}.created_at, {cal}.id)
+    )"""
+
+
+def adrs_with_causality_and_review_count(search: bool) -> str:
+    """
+    A page of ADRs, newest first, with the current level of each and its
+    review counts. With search the ADRs matching :query are found first,
+    otherwise the page is read from the created_at index.
+    """
+    if search:
+        # CROSS JOIN keeps adr_fts as the outer loop
+        source = "adr_fts CROSS JOIN adr a ON a.rowid = adr_fts.rowid"
+        where = f"WHERE adr_fts MATCH :query AND {_after_cursor('a')}"
+    else:
+        source = "adr a"
+        where = f"WHERE {_after_cursor('a')}"
+
+    return f"""
+    WITH page AS (
+        SELECT
+            a.id,
+            a.patient_name,
+            a.created_at,
+            u.first_name || ' ' || u.last_name AS created_by
+        FROM {source}
+        JOIN "user" u ON a.user_id = u.id
+        {where}
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT
+        p.id AS adr_id,
+        p.patient_name,
+        p.created_by,
+        p.created_at,
+        cal.causality_assessment_level_value,
+        COUNT(CASE WHEN r.approved = 1 THEN 1 END) AS approved_reviews,
+        COUNT(CASE WHEN r.approved = 0 THEN 1 END) AS unapproved_reviews
+    FROM page p
+    LEFT JOIN causality_assessment_level cal ON cal.id = (
+        SELECT id FROM causality_assessment_level
+        WHERE adr_id = p.id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    )
+    LEFT JOIN review r ON r.causality_assessment_level_id = cal.id
+    GROUP BY p.id, p.patient_name, p.created_by, p.created_at, cal.causality_assessment_level_value
+    ORDER BY p.created_at DESC, p.id DESC
+    """
+
+
+APPROVAL_STATUS = f"""
+    SELECT status, COUNT(*) as count FROM (
+        SELECT
+            cal.id AS cal_id,
+            SUM(CASE WHEN r.approved = 1 THEN 1 ELSE 0 END) AS approved_count,
+            SUM(CASE WHEN r.approved = 0 THEN 1 ELSE 0 END) AS unapproved_count,
+            CASE
+                WHEN SUM(CASE WHEN r.approved = 1 THEN 1 ELSE 0 END) >
+                     SUM(CASE WHEN r.approved = 0 THEN 1 ELSE 0 END)
+                THEN 'Approved'
+                ELSE 'Unapproved'
+            END AS status
+        FROM causality_assessment_level cal
+            INDEXED BY ix_causality_assessment_level_adr_id_created_at_id
+        JOIN review r ON cal.id = r.causality_assessment_level_id
+        WHERE {_is_current("cal")}
+        GROUP BY cal.id
+    ) AS sub
+    GROUP BY status
+"""
+
+ADRS_WEEKLY = """
+    SELECT strftime('%Y-W%W', created_at) AS week_label, COUNT(*) AS count
+    FROM adr
+    GROUP BY week_label
+    ORDER BY week_label
+"""
+
+ADRS_MONTHLY = """
+    SELECT
+        strftime('%Y', created_at) AS year,
+        strftime('%m', created_at) AS month,
+        COUNT(*) AS count
+    FROM adr
+    GROUP BY year, month
+    ORDER BY year, month
+"""
+
+SMS_WEEKLY = """
+    SELECT strftime('%Y-W%W', created_at) AS week_label, COUNT(*) AS count
+    FROM sms_message
+    GROUP BY week_label
+    ORDER BY week_label
+"""
+
+SMS_MONTHLY_BY_TYPE = """
+    SELECT
+        strftime('%Y', created_at) AS year,
+        strftime('%m', created_at) AS month,
+        COUNT(*) AS count
+    FROM sms_message
+    WHERE sms_type = :sms_type
+    GROUP BY year, month
+    ORDER BY year, month
+"""
+
+SMS_MONTHLY = """
+    SELECT strftime('%Y-%m', created_at) AS month_label, COUNT(*) AS count
+    FROM sms_message
+    GROUP BY month_label
+    ORDER BY month_label
+"""
+
+# Levels that ADRs are alerted about, each with a partial index
+ALERT_LEVELS = [
+    CausalityAssessmentLevelEnum.certain,
+    CausalityAssessmentLevelEnum.unclassified,
+    CausalityAssessmentLevelEnum.unclassifiable,
+]
+
+
+def alert_adrs(level: CausalityAssessmentLevelEnum, sent: bool, search: bool) -> str:
+    """
+    ADRs currently at a level that most reviewers of that level approved,
+    with (sent) or without an SMS yet, newest first, with their institution
+    and its telephones.
+
+    ADRs are read newest first from the created_at index, from the cursor
+    on, and checked one by one until the page is full, so a page costs the
+    same at any depth. With search SQLite may start from the matching ADRs.
+    """
+    matching = (
+        "adr.rowid IN (SELECT rowid FROM adr_fts WHERE adr_fts MATCH :query) AND"
+        if search
+        else ""
+    )
+
+    return f"""
+    SELECT * FROM (
+        SELECT
+            adr.id AS adr_id,
+            adr.patient_name AS patient_name,
+            mi.name AS medical_institution_name,
+            mi.mfl_code AS medical_institution_mfl_code,
+            adr.created_at AS created_at,
+            (
+                SELECT GROUP_CONCAT(DISTINCT mit.telephone)
+                FROM medical_institution_telephone mit
+                WHERE mit.medical_institution_id = mi.id
+            ) AS telephones,
+            (
+                SELECT COUNT(*) FROM sms_message sms WHERE sms.adr_id = adr.id
+            ) AS sms_count,
+            (
+                SELECT COUNT(*) FROM review
+                WHERE review.causality_assessment_level_id = cal.id
+                    AND review.approved = 1
+            ) AS approved_reviews,
+            (
+                SELECT COUNT(*) FROM review
+                WHERE review.causality_assessment_level_id = cal.id
+                    AND review.approved = 0
+            ) AS unapproved_reviews
+        FROM adr
+        JOIN medical_institution mi ON adr.medical_institution_id = mi.id
+        CROSS JOIN causality_assessment_level cal
+            INDEXED BY ix_causality_assessment_level_{level.name}
+            ON cal.adr_id = adr.id
+        WHERE {matching} cal.causality_assessment_level_value = '{level.name}'
+            AND {_is_current("cal")}
+            AND {_after_cursor("adr")}
+    )
+    WHERE sms_count {"!=" if sent else "="} 0
+        AND approved_reviews > unapproved_reviews
+    ORDER BY created_at DESC, adr_id DESC
+    LIMIT :limit OFFSET :offset
+    """
+
+
+def alert_adrs_total(level: CausalityAssessmentLevelEnum, sent: bool) -> str:
+    """
+    How many ADRs alert_adrs would list over all pages, read from the levels
+    at `level`.
+    """
+    return f"""
+    SELECT COUNT(*)
+    FROM causality_assessment_level cal
+        INDEXED BY ix_causality_assessment_level_{level.name}
+    JOIN adr ON adr.id = cal.adr_id
+    WHERE cal.causality_assessment_level_value = '{level.name}'
+        AND {_is_current("cal")}
+        AND (:query IS NULL OR adr.rowid IN (
+            SELECT rowid FROM adr_fts WHERE adr_fts MATCH :query
+        ))
+        AND (
+            SELECT COUNT(*) FROM sms_message sms WHERE sms.adr_id = cal.adr_id
+        ) {"!=" if sent else "="} 0
+        AND (
+            SELECT COUNT(*) FROM review
+            WHERE review.causality_assessment_level_id = cal.id
+                AND review.approved = 1
+        ) > (
+            SELECT COUNT(*) FROM review
+            WHERE review.causality_assessment_level_id = cal.id
+                AND review.approved = 0
+        )
+    """
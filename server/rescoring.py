@@ -0,0 +1,333 @@
+import asyncio
+import datetime
+import logging
+from typing import Awaitable, Callable, List
+from uuid import uuid4
+
+import metrics
+from basemodels import RescoringJobStatusEnum
+from drivers import save_drivers
+from inference import InferenceQueueFull
+from models import (
+    ADRModel,
+    CausalityAssessmentLevelModel,
+    RescoringJobModel,
+    ReviewModel,
+)
+from scoring import is_unclassified
+from sessions import Session
+from sqlalchemy import and_, or_
+
+# Seconds to wait before retrying when the inference queue is full
+RETRY_DELAY_SECONDS = 1
+
+rescored_adrs = metrics.counter(
+    "rescoring_adrs_rescored", "ADRs given a new causality assessment level by a job"
+)
+
+
+class RescoringRunner:
+    """
+    Re-scores every classifiable ADR with the job's model version, the
+    champion when the job was started, and saves the results as new causality
+    assessment levels tagged with that version.
+
+    ADRs are read in (created_at, id) order, chunk_size at a time, and
+    concurrency chunks are scored at once. Each chunk's CALs are written in
+    the same transaction as the job's cursor, so a job cut short by a crash
+    resumes after the last chunk it wrote and ADRs already scored by the
+    target version are skipped.
+
+    A new level becomes the ADR's current one. When it is at the same level
+    as the one it replaces, the reviews of that one are copied to it, so
+    reviewers only look again at ADRs whose level changed.
+
+    Online requests come first: the job waits while they are being scored,
+    pauses between rounds and backs off when the inference queue is full.
+    """
+
+    def __init__(
+        self,
+        score: Callable[[List[ADRModel], str], Awaitable[List[dict]]],
+        is_busy: Callable[[], bool],
+        chunk_size: int,
+        concurrency: int,
+        pause_ms: float,
+    ):
+        self.score = score
+        self.is_busy = is_busy
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.pause_seconds = pause_ms / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._job_id: str | None = None
+
+    def resume_unfinished(self):
+        """Pick the latest job left running by a previous run back up."""
+        self._loop = asyncio.get_running_loop()
+
+        with Session() as session:
+            jobs = (
+                session.query(RescoringJobModel)
+                .filter(RescoringJobModel.status == RescoringJobStatusEnum.running)
+                .order_by(RescoringJobModel.created_at.desc())
+                .all()
+            )
+
+            # Only the newest target version is worth finishing
+            for job in jobs[1:]:
+                job.status = RescoringJobStatusEnum.cancelled
+                job.finished_at = datetime.datetime.now(datetime.timezone.utc)
+            session.commit()
+
+            job_ids = [job.id for job in jobs]
+
+        if job_ids:
+            logging.info(f"Resuming re-scoring job {job_ids[0]}")
+            self._run_job(job_ids[0])
+
+    async def start(self, ml_model_id: str) -> str:
+        """Start re-scoring with ml_model_id, cancelling any job still running."""
+        self._loop = asyncio.get_running_loop()
+
+        job_id = await asyncio.to_thread(self._create_job, ml_model_id)
+        logging.info(f"Started re-scoring job {job_id} for {ml_model_id}")
+
+        cancelled_job_id = self._run_job(job_id)
+        if cancelled_job_id is not None:
+            await asyncio.to_thread(
+                self._set_status, cancelled_job_id, RescoringJobStatusEnum.cancelled
+            )
+
+        return job_id
+
+    def start_threadsafe(self, ml_model_id: str):
+        """
+        start, for model swap listeners, which run off the event loop. The
+        job is scheduled without waiting for it, the listener must not block
+        the swap.
+        """
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(
+                self.start(ml_model_id), self._loop
+            ).add_done_callback(self._log_start_failure)
+
+    def _log_start_failure(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"Error starting a re-scoring job: {future.exception()}")
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def _run_job(self, job_id: str) -> str | None:
+        """Run job_id in place of the job running, return that job's id."""
+        cancelled_job_id = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            cancelled_job_id = self._job_id
+
+        self._job_id = job_id
+        self._task = asyncio.create_task(self._run(job_id))
+
+        return cancelled_job_id
+
+    def _create_job(self, ml_model_id: str) -> str:
+        with Session() as session:
+            job = RescoringJobModel(
+                ml_model_id=ml_model_id,
+                created_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+            session.add(job)
+            session.commit()
+            return job.id
+
+    async def _run(self, job_id: str):
+        try:
+            job = await asyncio.to_thread(self._load_job, job_id)
+            cursor = (job.cursor_created_at, job.cursor_adr_id)
+
+            while True:
+                chunks = []
+                for _ in range(self.concurrency):
+                    chunk = await asyncio.to_thread(self._read_chunk, cursor)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    cursor = (chunk[-1].created_at, chunk[-1].id)
+
+                if not chunks:
+                    break
+
+                # Let online requests go first
+                while self.is_busy():
+                    await asyncio.sleep(self.pause_seconds)
+
+                results = await asyncio.gather(
+                    *[self._score_chunk(job.ml_model_id, chunk) for chunk in chunks]
+                )
+
+                # Write in order so the cursor never skips an unwritten chunk
+                for chunk, (adrs, assessments) in zip(chunks, results):
+                    await asyncio.to_thread(
+                        self._save_chunk, job_id, chunk, adrs, assessments
+                    )
+
+                await asyncio.sleep(self.pause_seconds)
+
+            await asyncio.to_thread(
+                self._set_status, job_id, RescoringJobStatusEnum.completed
+            )
+            logging.info(f"Re-scoring job {job_id} completed")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error in re-scoring job {job_id}: {e}")
+            await asyncio.to_thread(
+                self._set_status, job_id, RescoringJobStatusEnum.failed, str(e)
+            )
+
+    async def _score_chunk(self, ml_model_id: str, chunk: List[ADRModel]) -> tuple:
+        adrs = await asyncio.to_thread(self._needing_rescore, ml_model_id, chunk)
+        if not adrs:
+            return [], []
+
+        while True:
+            try:
+                return adrs, await self.score(adrs, ml_model_id)
+            except InferenceQueueFull:
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+    def _load_job(self, job_id: str) -> RescoringJobModel:
+        with Session() as session:
+            return session.query(RescoringJobModel).filter_by(id=job_id).one()
+
+    def _read_chunk(self, cursor: tuple) -> List[ADRModel]:
+        created_at, adr_id = cursor
+
+        with Session() as session:
+            query = session.query(ADRModel)
+            if adr_id is not None:
+                query = query.filter(
+                    or_(
+                        ADRModel.created_at > created_at,
+                        and_(ADRModel.created_at == created_at, ADRModel.id > adr_id),
+                    )
+                )
+
+            return (
+                query.order_by(ADRModel.created_at, ADRModel.id)
+                .limit(self.chunk_size)
+                .all()
+            )
+
+    def _needing_rescore(
+        self, ml_model_id: str, chunk: List[ADRModel]
+    ) -> List[ADRModel]:
+        """Classifiable ADRs of the chunk without a CAL from ml_model_id yet."""
+        with Session() as session:
+            done = {
+                adr_id
+                for (adr_id,) in session.query(CausalityAssessmentLevelModel.adr_id)
+                .filter(
+                    CausalityAssessmentLevelModel.adr_id.in_([adr.id for adr in chunk]),
+                    CausalityAssessmentLevelModel.ml_model_id == ml_model_id,
+                )
+            }
+
+        return [adr for adr in chunk if adr.id not in done and not is_unclassified(adr)]
+
+    def _save_chunk(
+        self,
+        job_id: str,
+        chunk: List[ADRModel],
+        adrs: List[ADRModel],
+        assessments: List[dict],
+    ):
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        mappings = [
+            {
+                **assessment,
+                "id": str(uuid4()),
+                "adr_id": adr.id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for adr, assessment in zip(adrs, assessments)
+        ]
+
+        with Session() as session:
+            reviews = self._carried_reviews(session, mappings, now)
+
+            session.bulk_insert_mappings(CausalityAssessmentLevelModel, mappings)
+            session.bulk_insert_mappings(ReviewModel, reviews)
+            save_drivers(session, [(mapping["id"], mapping) for mapping in mappings])
+
+            job = session.query(RescoringJobModel).filter_by(id=job_id).one()
+            job.cursor_created_at = chunk[-1].created_at
+            job.cursor_adr_id = chunk[-1].id
+            job.adrs_seen += len(chunk)
+            job.adrs_rescored += len(adrs)
+            session.commit()
+
+        rescored_adrs.inc(len(adrs))
+
+    def _carried_reviews(
+        self, session, mappings: List[dict], now: datetime.datetime
+    ) -> List[dict]:
+        """Copies of the reviews of current levels the new levels keep."""
+        model = CausalityAssessmentLevelModel
+        current = {}
+        for level_id, adr_id, value in (
+            session.query(model.id, model.adr_id, model.causality_assessment_level_value)
+            .filter(model.adr_id.in_([mapping["adr_id"] for mapping in mappings]))
+            .order_by(model.created_at, model.id)
+        ):
+            current[adr_id] = (level_id, value)
+
+        # The current level each new level replaces at the same level
+        replaced = {}
+        for mapping in mappings:
+            level_id, value = current.get(mapping["adr_id"], (None, None))
+            if value == mapping["causality_assessment_level_value"]:
+                replaced[level_id] = mapping["id"]
+
+        if not replaced:
+            return []
+
+        return [
+            {
+                "id": str(uuid4()),
+                "causality_assessment_level_id": replaced[
+                    review.causality_assessment_level_id
+                ],
+                "user_id": review.user_id,
+                "approved": review.approved,
+                "proposed_causality_level": review.proposed_causality_level,
+                "reason": review.reason,
+                "created_at": review.created_at,
+                "updated_at": now,
+            }
+            for review in session.query(ReviewModel).filter(
+                ReviewModel.causality_assessment_level_id.in_(replaced)
+            )
+        ]
+
+    def _set_status(
+        self, job_id: str, status: RescoringJobStatusEnum, error: str | None = None
+    ):
+        with Session() as session:
+            session.query(RescoringJobModel).filter(
+                RescoringJobModel.id == job_id,
+                RescoringJobModel.status == RescoringJobStatusEnum.running,
+            ).update(
+                {
+                    "status": status,
+                    "error": error,
+                    "finished_at": datetime.datetime.now(datetime.timezone.utc),
+                }
+            )
+            session.commit()
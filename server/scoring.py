@@ -0,0 +1,226 @@
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from artifacts import ModelArtifacts
+from background import load_background
+from basemodels import (
+    CausalityAssessmentLevelEnum,
+    DechallengeEnum,
+    ExplanationStatusEnum,
+    ExplanationTierEnum,
+    RechallengeEnum,
+)
+from config import settings
+from explainers import KMEANS_CLUSTERS, ExplainerEngine, build_engine
+from shap import Explainer
+from shap_storage import SHAP_COLUMNS, storage_columns
+
+
+PREDICTION_COLUMNS = [
+    "ml_model_id",
+    "causality_assessment_level_value",
+    "feature_schema_id",
+    "feature_values",
+]
+
+
+def is_unclassified(adr: Any) -> bool:
+    """
+    Check if ADR has the appropriate fields present.
+    If not, its causality level is unclassified and the model is not run.
+    """
+    return (
+        adr.rifampicin_suspected is None
+        and adr.isoniazid_suspected is None
+        and adr.pyrazinamide_suspected is None
+        and adr.ethambutol_suspected is None
+    ) or (
+        adr.rechallenge is RechallengeEnum.unknown
+        and adr.dechallenge is DechallengeEnum.unknown
+    )
+
+
+def unclassified_assessment() -> dict:
+    """Causality assessment level columns for an ADR the model cannot classify."""
+    return {
+        "causality_assessment_level_value": CausalityAssessmentLevelEnum.unclassified,
+        "explanation_status": ExplanationStatusEnum.not_applicable,
+        "explanation_tier": None,
+        **storage_columns(None),
+        "feature_schema_id": None,
+        "feature_values": None,
+    }
+
+
+def build_explainer(artifacts: ModelArtifacts, csv_path: str) -> ExplainerEngine:
+    """Build the configured SHAP explainer for one model version on the seed data."""
+    background = load_background(
+        artifacts, csv_path, settings.explainer_cache_path, KMEANS_CLUSTERS
+    )
+
+    return build_engine(settings.explainer_engine, artifacts, background)
+
+
+def score_adrs(
+    artifacts: ModelArtifacts,
+    explainer: Explainer,
+    adrs: Sequence[Any],
+    tier: ExplanationTierEnum,
+) -> List[dict]:
+    """
+    Predict and explain a batch of classifiable ADRs with one model call and
+    one explainer call. Returns the causality assessment level columns per ADR.
+    """
+    return score_features(
+        artifacts, explainer, artifacts.feature_transform.transform(adrs), tier
+    )
+
+
+def score_features(
+    artifacts: ModelArtifacts,
+    explainer: Explainer,
+    features: np.ndarray,
+    tier: ExplanationTierEnum,
+    explain: bool = True,
+    prediction: np.ndarray | None = None,
+) -> List[dict]:
+    """Same as score_adrs, for rows already mapped by the feature transform."""
+    predictions, explanations = predict_and_explain(
+        artifacts, explainer, features, tier, explain, prediction
+    )
+
+    return [
+        combine_assessment(prediction, explanation, tier)
+        for prediction, explanation in zip(predictions, explanations)
+    ]
+
+
+def predict_and_explain(
+    artifacts: ModelArtifacts,
+    explainer: Explainer,
+    features: np.ndarray,
+    tier: ExplanationTierEnum,
+    explain: bool = True,
+    prediction: np.ndarray | None = None,
+) -> Tuple[List[dict], List[dict | None]]:
+    """
+    The PREDICTION_COLUMNS and SHAP_COLUMNS of each row, kept apart for
+    caching. With explain=False the SHAP columns are None for
+    explain_features to fill in later. Pass the model's output as prediction
+    when it was already made elsewhere, e.g. by a remote predictor.
+    """
+    prediction_input = pd.DataFrame(
+        features, columns=artifacts.feature_transform.prediction_columns
+    )
+
+    # Predict using the ML model
+    if prediction is None:
+        prediction = artifacts.runtime_model.predict(prediction_input)
+
+    decoded_predictions = artifacts.ordinal_encoder.inverse_transform(
+        prediction.reshape(-1, 1)
+    )[:, 0]
+
+    if explain:
+        explanations = explain_features(artifacts, explainer, features, tier)
+    else:
+        explanations = [None] * len(decoded_predictions)
+
+    feature_values = format_feature_values(features, artifacts)
+
+    predictions = [
+        {
+            "ml_model_id": artifacts.ml_model_id,
+            "causality_assessment_level_value": decoded_prediction,
+            "feature_schema_id": artifacts.feature_schema["id"],
+            "feature_values": feature_values[i],
+        }
+        for i, decoded_prediction in enumerate(decoded_predictions)
+    ]
+
+    return predictions, explanations
+
+
+def classify_adrs(artifacts: ModelArtifacts, adrs: Sequence[Any]) -> List[str]:
+    """The causality assessment level values the model predicts, without SHAP."""
+    prediction_input = pd.DataFrame(
+        artifacts.feature_transform.transform(adrs),
+        columns=artifacts.feature_transform.prediction_columns,
+    )
+
+    return list(
+        artifacts.ordinal_encoder.inverse_transform(
+            artifacts.runtime_model.predict(prediction_input).reshape(-1, 1)
+        )[:, 0]
+    )
+
+
+def combine_assessment(
+    prediction: dict, explanation: dict | None, tier: ExplanationTierEnum
+) -> dict:
+    """
+    Causality assessment level columns from a prediction and its SHAP
+    columns, which are left empty and pending when there is no explanation.
+    """
+    return {
+        **prediction,
+        "causality_assessment_level_value": CausalityAssessmentLevelEnum(
+            prediction["causality_assessment_level_value"]
+        ),
+        "explanation_status": ExplanationStatusEnum.pending
+        if explanation is None
+        else ExplanationStatusEnum.ready,
+        "explanation_tier": tier,
+        **storage_columns(explanation),
+    }
+
+
+def explain_features(
+    artifacts: ModelArtifacts,
+    explainer: Explainer,
+    features: np.ndarray,
+    tier: ExplanationTierEnum,
+) -> List[dict]:
+    """Run the explainer once over the rows and return the SHAP columns per row."""
+    prediction_input = pd.DataFrame(
+        features, columns=artifacts.feature_transform.prediction_columns
+    )
+
+    shap_values = explainer(prediction_input, tier)
+
+    return explanation_rows(explanation_arrays(shap_values))
+
+
+def explanation_arrays(shap_values: Explainer) -> dict:
+    """
+    The SHAP columns of a batch as arrays with one entry per row, so they
+    cost the same per row whatever the batch size.
+    """
+    values = np.asarray(shap_values.values, dtype=np.float64)
+    base_values = np.asarray(shap_values.base_values, dtype=np.float64)
+    sum_per_class = values.sum(axis=1)
+
+    return {
+        "base_values": base_values,
+        "shap_values_matrix": values,
+        "shap_values_sum_per_class": sum_per_class,
+        "shap_values_and_base_values_sum_per_class": sum_per_class + base_values,
+    }
+
+
+def explanation_rows(arrays: dict) -> List[dict]:
+    """Split explanation_arrays into the SHAP columns of each row."""
+    columns = {column: arrays[column].tolist() for column in SHAP_COLUMNS}
+
+    return [
+        {column: columns[column][i] for column in SHAP_COLUMNS}
+        for i in range(len(arrays["base_values"]))
+    ]
+
+
+def format_feature_values(
+    features: np.ndarray, artifacts: ModelArtifacts
+) -> List[list]:
+    """Readable feature values of each row of model input."""
+    return artifacts.feature_transform.inverse_transform(features)
@@ -0,0 +1,58 @@
+"""
+Full-text search of ADRs through adr_fts, an FTS5 index over the text
+columns of adr kept in sync by triggers, see migrations.py.
+
+adr_fts reads its content from adr by rowid. A VACUUM may renumber the rowids
+of adr, so rebuild the index after one:
+
+    INSERT INTO adr_fts(adr_fts) VALUES ('rebuild');
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import Float, Integer, text
+
+ADR_SEARCH_COLUMNS = [
+    "patient_name",
+    "patient_address",
+    "inpatient_or_outpatient_number",
+    "ward_or_clinic",
+    "description_of_reaction",
+    "comments",
+]
+
+# bm25 weights of the columns above, names and numbers rank over free text
+ADR_SEARCH_WEIGHTS = [10.0, 2.0, 10.0, 2.0, 1.0, 1.0]
+
+
+def match_expression(query: str, columns: Optional[List[str]] = None) -> Optional[str]:
+    """
+    FTS5 query for rows with every word of `query` as a word or the start of
+    one, in `columns` if given. None when `query` has no words.
+    """
+    # Split like the unicode61 tokenizer, which keeps only letters and digits
+    words = re.findall(r"[^\W_]+", query.lower())
+    if not words:
+        return None
+
+    expression = " AND ".join(f'"{word}"*' for word in words)
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+
+    return expression
+
+
+def ranked_adr_matches(match: str):
+    """Subquery of the rowid and bm25 rank, lower is better, of matching ADRs."""
+    weights = ", ".join(str(weight) for weight in ADR_SEARCH_WEIGHTS)
+
+    return (
+        text(
+            f"SELECT rowid, bm25(adr_fts, {weights}) AS rank"
+            " FROM adr_fts WHERE adr_fts MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(rowid=Integer, rank=Float)
+        .subquery("adr_matches")
+    )
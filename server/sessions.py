@@ -1,4 +1,7 @@
-from engines import engine
+from engines import async_engine, engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 Session = sessionmaker(bind=engine)
+# Attributes cannot be loaded lazily once awaited, so they are kept on commit
+AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
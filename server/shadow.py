@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Callable, List
+
+import metrics
+from artifacts import ArtifactRegistry
+from basemodels import (
+    CausalityAssessmentLevelEnum,
+    ShadowClassAgreementResponse,
+    ShadowSummaryGetResponse,
+)
+from inference import InferenceExecutor
+from models import ShadowPredictionModel
+from sessions import Session
+from sqlalchemy import func
+
+shadow_enqueued = metrics.counter(
+    "shadow_enqueued", "ADRs queued for scoring by the challenger model"
+)
+shadow_dropped = metrics.counter(
+    "shadow_dropped",
+    "ADRs not shadow scored because the shadow queue was full or inference was busy",
+)
+shadow_scored = metrics.counter(
+    "shadow_scored", "ADRs scored by the challenger model"
+)
+shadow_failures = metrics.counter(
+    "shadow_failures", "ADRs the challenger model failed to score"
+)
+
+
+class ShadowScorer:
+    """
+    Scores ADRs with a challenger model after the champion has answered, and
+    stores both predictions side by side.
+
+    submit never waits: when queue_depth ADRs are already waiting the new
+    ones are dropped, so shadow scoring cannot slow down the requests that
+    feed it. The challenger predicts on the executor's inference thread, and
+    a batch is dropped rather than scored while is_busy says online requests
+    are waiting for inference.
+    """
+
+    def __init__(
+        self,
+        registry: ArtifactRegistry,
+        executor: InferenceExecutor,
+        is_busy: Callable[[], bool],
+        queue_depth: int,
+        batch_size: int,
+    ):
+        self.registry = registry
+        self.executor = executor
+        self.is_busy = is_busy
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+
+    def submit(
+        self,
+        adr: Any,
+        adr_id: str,
+        causality_assessment_level_id: str,
+        champion_model_id: str,
+        champion_value: CausalityAssessmentLevelEnum,
+    ):
+        try:
+            self._queue.put_nowait(
+                (
+                    adr,
+                    adr_id,
+                    causality_assessment_level_id,
+                    champion_model_id,
+                    champion_value,
+                )
+            )
+            shadow_enqueued.inc()
+        except asyncio.QueueFull:
+            shadow_dropped.inc()
+
+    async def run(self):
+        while True:
+            entries = [await self._queue.get()]
+            while len(entries) < self.batch_size and not self._queue.empty():
+                entries.append(self._queue.get_nowait())
+
+            if self.is_busy():
+                shadow_dropped.inc(len(entries))
+                continue
+
+            try:
+                await self._score(entries)
+                shadow_scored.inc(len(entries))
+            except Exception as e:
+                shadow_failures.inc(len(entries))
+                logging.error(f"Error shadow scoring ADRs: {e}")
+
+    async def _score(self, entries: List[tuple]):
+        artifacts = self.registry.current()
+
+        # The challenger may preprocess differently, so it maps the ADRs itself
+        challenger_values = await self.executor.classify(
+            artifacts, [entry[0] for entry in entries]
+        )
+
+        rows = []
+        for entry, challenger_value in zip(entries, challenger_values):
+            _, adr_id, cal_id, champion_model_id, champion_value = entry
+            challenger_value = CausalityAssessmentLevelEnum(challenger_value)
+
+            rows.append(
+                ShadowPredictionModel(
+                    adr_id=adr_id,
+                    causality_assessment_level_id=cal_id,
+                    champion_model_id=champion_model_id,
+                    challenger_model_id=artifacts.ml_model_id,
+                    champion_value=champion_value,
+                    challenger_value=challenger_value,
+                    agrees=challenger_value is champion_value,
+                )
+            )
+
+        await asyncio.to_thread(self._save, rows)
+
+    def _save(self, rows: List[ShadowPredictionModel]):
+        with Session() as session:
+            session.add_all(rows)
+            session.commit()
+
+
+def summarize_shadow_predictions(
+    db, challenger_model_id: str | None
+) -> ShadowSummaryGetResponse:
+    """Agreement between champion and challenger, by the champion's level."""
+    query = db.query(
+        ShadowPredictionModel.champion_value,
+        ShadowPredictionModel.challenger_value,
+        func.count(ShadowPredictionModel.id),
+    )
+    if challenger_model_id is not None:
+        query = query.filter(
+            ShadowPredictionModel.challenger_model_id == challenger_model_id
+        )
+
+    counts = defaultdict(dict)
+    for champion_value, challenger_value, count in query.group_by(
+        ShadowPredictionModel.champion_value, ShadowPredictionModel.challenger_value
+    ):
+        counts[champion_value][challenger_value] = count
+
+    classes = []
+    for champion_value, challenger_values in counts.items():
+        total = sum(challenger_values.values())
+        agreed = challenger_values.get(champion_value, 0)
+        classes.append(
+            ShadowClassAgreementResponse(
+                champion_value=champion_value,
+                total=total,
+                agreed=agreed,
+                agreement=agreed / total,
+                challenger_values=challenger_values,
+            )
+        )
+
+    total = sum(item.total for item in classes)
+    agreed = sum(item.agreed for item in classes)
+
+    return ShadowSummaryGetResponse(
+        challenger_model_id=challenger_model_id,
+        total=total,
+        agreed=agreed,
+        agreement=agreed / total if total else None,
+        classes=sorted(classes, key=lambda item: item.champion_value.value),
+    )
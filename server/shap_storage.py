@@ -0,0 +1,93 @@
+import struct
+from typing import Any
+
+import numpy as np
+from config import settings
+
+# SHAP columns of a causality assessment level as computed and served
+SHAP_COLUMNS = [
+    "base_values",
+    "shap_values_matrix",
+    "shap_values_sum_per_class",
+    "shap_values_and_base_values_sum_per_class",
+]
+# Where SHAP_STORAGE_FORMAT=binary keeps them, the sums are recomputed on read
+SHAP_BLOB_COLUMNS = ["base_values_blob", "shap_values_matrix_blob"]
+
+# Magic, dtype code and number of dimensions, then one uint32 per dimension
+HEADER = struct.Struct("<2sBB")
+MAGIC = b"SA"
+DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f8")}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+
+def pack_array(values: Any, dtype: str = "<f4") -> bytes:
+    """Array as a small shape and dtype header followed by its raw values."""
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype))
+
+    return (
+        HEADER.pack(MAGIC, DTYPE_CODES[array.dtype], array.ndim)
+        + struct.pack(f"<{array.ndim}I", *array.shape)
+        + array.tobytes()
+    )
+
+
+def unpack_array(blob: bytes) -> np.ndarray:
+    magic, dtype_code, ndim = HEADER.unpack_from(blob)
+    if magic != MAGIC or dtype_code not in DTYPES:
+        raise ValueError("Not a packed array")
+
+    shape = struct.unpack_from(f"<{ndim}I", blob, HEADER.size)
+
+    return np.frombuffer(
+        blob, dtype=DTYPES[dtype_code], offset=HEADER.size + 4 * ndim
+    ).reshape(shape)
+
+
+def storage_columns(explanation: dict | None) -> dict:
+    """
+    Causality assessment level columns for the SHAP columns of an
+    explanation, in the storage format from the settings. All of them are
+    set, so the columns of the other format are cleared.
+    """
+    columns = dict.fromkeys(SHAP_COLUMNS + SHAP_BLOB_COLUMNS)
+
+    if explanation is None:
+        return columns
+
+    if settings.shap_storage_format == "binary":
+        columns["base_values_blob"] = explanation["base_values"]
+        columns["shap_values_matrix_blob"] = explanation["shap_values_matrix"]
+    else:
+        columns.update({column: explanation[column] for column in SHAP_COLUMNS})
+
+    return columns
+
+
+def explanation_content(causality_assessment_level) -> dict:
+    """The SHAP and feature columns of a level, whichever format they are in."""
+    matrix = causality_assessment_level.shap_values_matrix_blob
+
+    if matrix is None:
+        content = {
+            column: getattr(causality_assessment_level, column)
+            for column in SHAP_COLUMNS
+        }
+    else:
+        matrix = matrix.astype(np.float64)
+        base_values = causality_assessment_level.base_values_blob.astype(np.float64)
+        sum_per_class = matrix.sum(axis=0)
+
+        content = {
+            "base_values": base_values.tolist(),
+            "shap_values_matrix": matrix.tolist(),
+            "shap_values_sum_per_class": sum_per_class.tolist(),
+            "shap_values_and_base_values_sum_per_class": (
+                sum_per_class + base_values
+            ).tolist(),
+        }
+
+    content["feature_names"] = causality_assessment_level.feature_names
+    content["feature_values"] = causality_assessment_level.feature_values
+
+    return content
@@ -0,0 +1,90 @@
+"""
+Local stand-in for the MLflow inference server.
+
+Serves /ping and the pyfunc /invocations endpoint with the artifacts in
+ARTIFACTS_DIR, naming their version in the X-Model-Version header, so INFERENCE_PREDICTOR=http can be tried without building the
+model image. --delay-ms and --failure-rate make it slow or flaky, to see the
+predictor's timeouts and circuit breaker at work.
+
+Run from the server directory, with the model artifacts downloaded:
+
+    python stand_in_inference_server.py --port 5002
+"""
+
+import argparse
+import asyncio
+import random
+
+import numpy as np
+import uvicorn
+from artifacts import ARTIFACTS_DIR, load_artifacts
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from predictors import MODEL_VERSION_HEADER, InProcessPredictor
+
+app = FastAPI()
+
+artifacts = None
+predictor = InProcessPredictor()
+delay_seconds = 0.0
+failure_rate = 0.0
+
+
+@app.get("/ping")
+def ping():
+    return {}
+
+
+@app.post("/invocations")
+async def invocations(request: Request, response: Response):
+    if delay_seconds:
+        await asyncio.sleep(delay_seconds)
+
+    if random.random() < failure_rate:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Injected failure"
+        )
+
+    body = await request.json()
+    columns = artifacts.feature_transform.prediction_columns
+
+    # The two pandas input formats MLflow accepts
+    if "dataframe_split" in body:
+        split = body["dataframe_split"]
+        order = [split["columns"].index(column) for column in columns]
+        features = np.asarray(split["data"], dtype=np.float64)[:, order]
+    elif "dataframe_records" in body:
+        features = np.asarray(
+            [[record[column] for column in columns] for record in body["dataframe_records"]],
+            dtype=np.float64,
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected dataframe_split or dataframe_records",
+        )
+
+    predictions = await predictor.predict(artifacts, features.reshape(-1, len(columns)))
+
+    response.headers[MODEL_VERSION_HEADER] = artifacts.version
+    return {"predictions": predictions.tolist()}
+
+
+def main():
+    global artifacts, delay_seconds, failure_rate
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=5002)
+    parser.add_argument("--artifacts-dir", default=ARTIFACTS_DIR)
+    parser.add_argument("--delay-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(args.artifacts_dir)
+    delay_seconds = args.delay_ms / 1000
+    failure_rate = args.failure_rate
+
+    uvicorn.run(app, host="0.0.0.0", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
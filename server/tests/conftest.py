@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings without defaults, and a database of the test run's own, before
+# config is imported by the modules under test
+_directory = tempfile.mkdtemp(prefix="server-tests-")
+
+for name, value in {
+    "ML_MODEL_PATH": "ml_model_artifacts/model",
+    "ENCODERS_PATH": "ml_model_artifacts/encoders",
+    "SERVER_ACCESS_SECRET_KEY": "test-access-secret",
+    "SERVER_REFRESH_SECRET_KEY": "test-refresh-secret",
+    "SERVER_ACCESS_ALGORITHM": "HS256",
+    "SERVER_REFRESH_ALGORITHM": "HS256",
+    "SERVER_ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "SERVER_REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "MLFLOW_TRACKING_SERVER_HOST": "127.0.0.1",
+    "MLFLOW_TRACKING_SERVER_PORT": "5000",
+    "MLFLOW_INFERENCE_SERVER_HOST": "127.0.0.1",
+    "MLFLOW_INFERENCE_SERVER_PORT": "5002",
+    "MLFLOW_MODEL_NAME": "final_ml_model",
+    "MLFLOW_MODEL_ALIAS": "champion",
+    "MLFLOW_MODEL_ARTIFACTS_PATH": "ml_model_artifacts",
+    "MINIO_HOST": "127.0.0.1",
+    "MINIO_API_PORT": "9000",
+    "MINIO_ACCESS_KEY": "minio",
+    "MINIO_SECRET_ACCESS_KEY": "minio-secret",
+    "AWS_REGION": "us-east-1",
+    "AFRICAS_TALKING_USERNAME": "sandbox",
+    "AFRICAS_TALKING_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+# Never a database the environment points at
+os.environ["DATABASE_URL"] = f"sqlite:///{_directory}/db.sqlite"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_directory}/db.sqlite"
+
+
+@pytest.fixture
+def database():
+    """The tables of models.py, emptied again after the test."""
+    # Imported here, once the settings above are in place
+    from engines import engine
+    from models import Base
+
+    Base.metadata.create_all(engine)
+    yield engine
+
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
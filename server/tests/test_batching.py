@@ -0,0 +1,86 @@
+import asyncio
+import contextlib
+
+import pytest
+from batching import MicroBatcher
+
+
+def batcher(max_size: int, max_wait_ms: float, queued=contextlib.nullcontext):
+    batches = []
+
+    async def run_batch(items):
+        batches.append(items)
+        return [item * 10 for item in items]
+
+    micro_batcher = MicroBatcher(run_batch, max_size, max_wait_ms, queued)
+    micro_batcher.batches = batches
+    return micro_batcher
+
+
+def test_full_batch_is_sent_without_waiting():
+    micro_batcher = batcher(max_size=3, max_wait_ms=60_000)
+
+    async def submit():
+        return await asyncio.wait_for(
+            asyncio.gather(micro_batcher.submit([1, 2]), micro_batcher.submit([3])),
+            timeout=1,
+        )
+
+    assert asyncio.run(submit()) == [[10, 20], [30]]
+    assert micro_batcher.batches == [[1, 2, 3]]
+
+
+def test_partial_batch_is_sent_after_max_wait():
+    micro_batcher = batcher(max_size=100, max_wait_ms=10)
+
+    async def submit():
+        first = asyncio.create_task(micro_batcher.submit([1]))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(micro_batcher.submit([2]))
+        return await first, await second
+
+    assert asyncio.run(submit()) == ([10], [20])
+    assert micro_batcher.batches == [[1, 2]]
+    assert not micro_batcher.busy
+
+
+def test_batch_error_reaches_every_request():
+    async def run_batch(items):
+        raise ValueError("model failed")
+
+    micro_batcher = MicroBatcher(run_batch, 2, 60_000, contextlib.nullcontext)
+
+    async def submit():
+        return await asyncio.gather(
+            micro_batcher.submit([1]), micro_batcher.submit([2]), return_exceptions=True
+        )
+
+    errors = asyncio.run(submit())
+    assert [str(error) for error in errors] == ["model failed", "model failed"]
+
+
+def test_cancelled_request_leaves_the_others_their_results():
+    micro_batcher = batcher(max_size=100, max_wait_ms=10)
+
+    async def submit():
+        cancelled = asyncio.create_task(micro_batcher.submit([1]))
+        kept = asyncio.create_task(micro_batcher.submit([2, 3]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(submit()) == [20, 30]
+    assert micro_batcher.batches == [[1, 2, 3]]
+
+
+def test_full_queue_turns_requests_away():
+    @contextlib.contextmanager
+    def full():
+        raise RuntimeError("queue full")
+        yield
+
+    micro_batcher = batcher(max_size=1, max_wait_ms=0, queued=full)
+
+    with pytest.raises(RuntimeError, match="queue full"):
+        asyncio.run(micro_batcher.submit([1]))
+    assert micro_batcher.batches == []
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+
+from explanation_cache import SCHEMA_VERSION, ExplanationCache
+
+
+def entry(name: str) -> dict:
+    return {"value": name.ljust(40, "x")}
+
+
+# Bytes of JSON in every entry
+ENTRY_BYTES = len(json.dumps(entry("a")))
+
+
+def test_memory_evicts_the_least_recently_used():
+    cache = ExplanationCache(3 * ENTRY_BYTES, "", 0)
+    cache.put_many({"a": entry("a"), "b": entry("b"), "c": entry("c")})
+
+    # Reading a makes b the least recently used
+    assert cache.get_many(["a"]) == [entry("a")]
+    cache.put_many({"d": entry("d")})
+
+    assert cache.get_many(["a", "b", "c", "d"]) == [
+        entry("a"),
+        None,
+        entry("c"),
+        entry("d"),
+    ]
+
+
+def test_memory_skips_entries_over_budget():
+    cache = ExplanationCache(ENTRY_BYTES - 1, "", 0)
+    cache.put_many({"a": entry("a")})
+
+    assert cache.get_many(["a"]) == [None]
+
+
+def test_disk_evicts_the_oldest_written(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    # Nothing stays in memory, every hit comes from the file
+    cache = ExplanationCache(0, path, 2 * ENTRY_BYTES)
+    for name in ["a", "b", "c"]:
+        cache.put_many({name: entry(name)})
+    # Replacing an entry does not count it twice
+    cache.put_many({"c": entry("c")})
+
+    assert cache.get_many(["a", "b", "c"]) == [None, entry("b"), entry("c")]
+
+    reopened = ExplanationCache(0, path, 2 * ENTRY_BYTES)
+    assert reopened._disk_bytes == 2 * ENTRY_BYTES
+    assert reopened.get_many(["b", "c"]) == [entry("b"), entry("c")]
+
+
+def test_not_persistent_entries_stay_off_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ExplanationCache(0, path, 10 * ENTRY_BYTES).put_many(
+        {"a": entry("a")}, persistent=False
+    )
+
+    assert ExplanationCache(0, path, 10 * ENTRY_BYTES).get_many(["a"]) == [None]
+
+
+def test_other_schema_version_empties_the_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ExplanationCache(0, path, 10 * ENTRY_BYTES).put_many({"a": entry("a")})
+
+    connection = sqlite3.connect(path)
+    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    connection.close()
+
+    cache = ExplanationCache(0, path, 10 * ENTRY_BYTES)
+    assert cache.get_many(["a"]) == [None]
+    assert cache._disk_bytes == 0
+    assert cache._db.execute("PRAGMA user_version").fetchone() == (SCHEMA_VERSION,)
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import pytest
+from features import DRUG_NAMES, CompiledFeatureTransform, input_to_prediction_format
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+COLUMN_METADATA = {
+    "categorical_columns": ["severity", "num_suspected_drugs"],
+    "numerical_columns": [
+        "patient_age",
+        "patient_bmi",
+        "rifampicin_start_to_onset_days",
+        "rifampicin_start_stop_difference",
+    ],
+    "date_columns": [
+        "patient_date_of_birth",
+        "date_of_onset_of_reaction",
+        *[f"{drug}_{end}_date" for drug in DRUG_NAMES for end in ["start", "stop"]],
+        "created_at",
+    ],
+    "boolean_columns": [f"{drug}_suspected" for drug in DRUG_NAMES],
+    "prediction_columns": [
+        "rifampicin_start_to_onset_days",
+        "severity_mild",
+        "severity_severe",
+        "num_suspected_drugs_1",
+        "rifampicin_suspected",
+        "patient_age",
+        "patient_bmi",
+        "rifampicin_start_stop_difference",
+    ],
+    "columns_to_drop": ["patient_name"],
+    "patient_age_median": 41.0,
+}
+
+
+def adr(**fields) -> dict:
+    row = {
+        "patient_name": "Amina",
+        "patient_age": 34.0,
+        "patient_date_of_birth": None,
+        "patient_weight_kg": 61.5,
+        "patient_height_cm": 164.0,
+        "date_of_onset_of_reaction": "2024-03-20",
+        "severity": "mild",
+        "created_at": "2024-03-25",
+        **{f"{drug}_suspected": False for drug in DRUG_NAMES},
+        **{f"{drug}_{end}_date": None for drug in DRUG_NAMES for end in ["start", "stop"]},
+        "rifampicin_suspected": True,
+        "rifampicin_start_date": "2024-01-02",
+        "rifampicin_stop_date": "2024-03-01",
+    }
+    row.update(fields)
+    return row
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    one_hot_encoder = OneHotEncoder(handle_unknown="ignore", sparse_output=False).fit(
+        pd.DataFrame(
+            {
+                "severity": ["mild", "moderate", "severe", "mild"],
+                "num_suspected_drugs": [0, 1, 2, 1],
+            }
+        )
+    )
+    minmax_scaler = MinMaxScaler().fit(
+        pd.DataFrame(
+            {
+                "patient_age": [1.0, 80.0],
+                "patient_bmi": [-1.0, 0.01],
+                "rifampicin_start_to_onset_days": [-1.0, 200.0],
+                "rifampicin_start_stop_difference": [-1.0, 180.0],
+            }
+        )
+    )
+
+    class Artifacts:
+        column_metadata = COLUMN_METADATA
+
+    Artifacts.one_hot_encoder = one_hot_encoder
+    Artifacts.minmax_scaler = minmax_scaler
+    Artifacts.feature_transform = CompiledFeatureTransform(
+        COLUMN_METADATA, one_hot_encoder, minmax_scaler
+    )
+    return Artifacts
+
+
+def assert_matches_pandas(artifacts, rows):
+    expected = input_to_prediction_format(pd.DataFrame(rows), artifacts)
+    actual = artifacts.feature_transform.transform(rows)
+
+    np.testing.assert_array_equal(actual, expected.to_numpy(dtype=np.float64))
+
+
+def test_matches_pandas(artifacts):
+    assert_matches_pandas(
+        artifacts,
+        [
+            adr(),
+            adr(severity="severe", isoniazid_suspected=True),
+            adr(patient_age=62.0, patient_weight_kg=80.2),
+        ],
+    )
+
+
+def test_unknown_categories(artifacts):
+    rows = [adr(severity="fatal"), adr(severity=None)]
+    assert_matches_pandas(artifacts, rows)
+
+    features = artifacts.feature_transform.transform_frame(rows)
+    assert (features[["severity_mild", "severity_severe"]] == 0).all().all()
+
+
+def test_missing_values(artifacts):
+    assert_matches_pandas(
+        artifacts,
+        [
+            adr(patient_age=None, patient_date_of_birth="1990-02-03"),
+            adr(patient_weight_kg=None, rifampicin_stop_date=None),
+            adr(rifampicin_start_date=None),
+        ],
+    )
+
+
+def test_batch_of_one(artifacts):
+    rows = [
+        adr(patient_age=None, patient_date_of_birth="1990-02-03"),
+        adr(patient_age=20.0),
+        adr(patient_age=70.0),
+    ]
+    batch = artifacts.feature_transform.transform(rows)
+
+    for i, row in enumerate(rows):
+        assert_matches_pandas(artifacts, [row])
+        np.testing.assert_array_equal(
+            artifacts.feature_transform.transform([row])[0], batch[i]
+        )
+
+
+# The pandas version takes the median of a batch without any known age
+@pytest.mark.filterwarnings("ignore:Mean of empty slice")
+def test_missing_age_is_the_training_median(artifacts):
+    rows = [adr(patient_age=None), adr(patient_age=20.0), adr(patient_age=70.0)]
+    age = COLUMN_METADATA["prediction_columns"].index("patient_age")
+
+    def scaled(patient_age):
+        return (patient_age - 1.0) / 79.0
+
+    def pandas(rows):
+        return input_to_prediction_format(pd.DataFrame(rows), artifacts).to_numpy(
+            dtype=np.float64
+        )
+
+    batch = artifacts.feature_transform.transform(rows)
+    alone = artifacts.feature_transform.transform(rows[:1])
+
+    # The pandas version fills with the median of the batch, -1 when alone
+    np.testing.assert_allclose(pandas(rows)[0, age], scaled(45.0))
+    np.testing.assert_allclose(pandas(rows[:1])[0, age], scaled(-1.0))
+    # The compiled transform with the training median, whatever the batch
+    np.testing.assert_allclose(batch[0, age], scaled(41.0))
+    np.testing.assert_array_equal(alone[0], batch[0])
+
+    # No other column differs
+    np.testing.assert_array_equal(
+        np.delete(batch, age, axis=1), np.delete(pandas(rows), age, axis=1)
+    )
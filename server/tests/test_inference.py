@@ -0,0 +1,102 @@
+import asyncio
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import inference
+import numpy as np
+from basemodels import ExplanationTierEnum
+from inference import InferenceExecutor
+
+TIER = ExplanationTierEnum.fast
+
+
+def artifacts(version: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        version=version,
+        artifacts_dir=f"versions/{version}",
+        feature_schema={"id": f"schema-{version}"},
+        feature_transform=SimpleNamespace(
+            transform=lambda adrs: np.zeros((len(adrs), 2))
+        ),
+    )
+
+
+def explainer(version: str) -> SimpleNamespace:
+    return SimpleNamespace(version=version, cache_id=lambda tier: version)
+
+
+class Pool:
+    """Stands in for a worker pool, leaving scored batches for the test to finish."""
+
+    def __init__(self):
+        self.batches = []
+        self.shut_down = False
+
+    def submit(self, function, *args):
+        future = Future()
+        if function is inference._run_in_worker:
+            self.batches.append(future)
+        else:
+            future.set_result(None)
+        return future
+
+    def shutdown(self, **options):
+        self.shut_down = True
+
+
+def scored(prediction, explanation, tier):
+    return prediction, explanation
+
+
+def test_swapped_out_workers_finish_their_requests(monkeypatch):
+    pools = []
+
+    def start_pool(**options):
+        pools.append(Pool())
+        return pools[-1]
+
+    monkeypatch.setattr(inference, "ProcessPoolExecutor", start_pool)
+    monkeypatch.setattr(inference, "combine_assessment", scored)
+    executor = InferenceExecutor(pool_size=1, queue_depth=4, csv_path="data.csv")
+
+    async def swap_while_scoring():
+        executor.start(artifacts("1"), explainer("1"))
+        request = asyncio.create_task(executor.score([{}], TIER))
+        while not pools[0].batches:
+            await asyncio.sleep(0)
+
+        executor.start(artifacts("2"), explainer("2"))
+        assert executor.artifacts.version == "2"
+        assert not pools[0].shut_down
+
+        pools[0].batches[0].set_result(([{"version": "1"}], [{}]))
+        assert await request == [({"version": "1"}, {})]
+        assert pools[0].shut_down
+        assert not pools[1].shut_down
+
+    asyncio.run(swap_while_scoring())
+
+
+def test_requests_keep_the_explainer_of_their_version(monkeypatch):
+    used = []
+
+    def predict_and_explain(artifacts, explainer, features, tier, explain, predictions):
+        used.append((artifacts.version, explainer.version))
+        return [{}] * len(features), [{}] * len(features)
+
+    monkeypatch.setattr(inference, "predict_and_explain", predict_and_explain)
+    monkeypatch.setattr(inference, "combine_assessment", scored)
+    executor = InferenceExecutor(pool_size=0, queue_depth=4, csv_path="data.csv")
+
+    async def swap_while_scoring():
+        executor.start(artifacts("1"), explainer("1"))
+        request = asyncio.create_task(executor.score([{}], TIER))
+        await asyncio.sleep(0)
+
+        executor.start(artifacts("2"), explainer("2"))
+        await request
+        await executor.score([{}], TIER)
+
+    asyncio.run(swap_while_scoring())
+
+    assert used == [("1", "1"), ("2", "2")]
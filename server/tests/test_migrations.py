@@ -0,0 +1,80 @@
+import logging
+
+import migrations
+import pytest
+from engines import build_engine
+from migrations import MIGRATIONS, run_migrations
+from models import Base
+from sqlalchemy import inspect, text
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """A database of its own, made by create_all like at startup."""
+    engine = build_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(migrations, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def schema(engine) -> list:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT type, name FROM sqlite_master ORDER BY type, name")
+        ).all()
+
+
+def test_applies_each_migration_once(engine):
+    assert run_migrations() == [version for version, _, _ in MIGRATIONS]
+    applied = schema(engine)
+
+    assert run_migrations() == []
+    assert schema(engine) == applied
+
+
+def test_statements_run_again_change_nothing(engine):
+    run_migrations()
+    applied = schema(engine)
+
+    # As if a migration was recorded as not applied after it ran
+    with engine.begin() as connection:
+        for _, _, statements in MIGRATIONS:
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(text(statement))
+
+    assert schema(engine) == applied
+    columns = inspect(engine).get_columns("causality_assessment_level")
+    assert {column["name"] for column in columns} >= {
+        name for name, _ in migrations.EXPLANATION_COLUMNS
+    }
+
+
+def test_keeps_the_latest_review_of_a_reviewer(engine, caplog):
+    reviews = [
+        ("older", "reviewer-1", "level-1"),
+        ("other reviewer", "reviewer-2", "level-1"),
+        ("latest", "reviewer-1", "level-1"),
+        ("other level", "reviewer-1", "level-2"),
+    ]
+    with engine.begin() as connection:
+        for id, user_id, level_id in reviews:
+            connection.execute(
+                text(
+                    "INSERT INTO review"
+                    " (id, user_id, causality_assessment_level_id, approved, created_at)"
+                    " VALUES (:id, :user_id, :level_id, 1, '2024-01-01')"
+                ),
+                {"id": id, "user_id": user_id, "level_id": level_id},
+            )
+
+    with caplog.at_level(logging.WARNING):
+        run_migrations()
+
+    with engine.connect() as connection:
+        kept = connection.execute(text("SELECT id FROM review ORDER BY id")).scalars()
+        assert list(kept) == ["latest", "other level", "other reviewer"]
+    assert "Removing duplicate review {'id': 'older'" in caplog.text
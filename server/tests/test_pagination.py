@@ -0,0 +1,121 @@
+import datetime
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi_pagination import add_pagination
+from fastapi_pagination.ext.sqlalchemy import paginate
+from models import MedicalInstitutionModel
+from pagination import (
+    KeysetPage,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    ensure_no_cursor,
+)
+from pydantic import BaseModel, ConfigDict
+from sessions import Session
+
+
+class Institution(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    name: str
+
+
+app = FastAPI()
+add_pagination(app)
+
+
+@app.get("/institutions", response_model=KeysetPage[Institution])
+def get_institutions(search: bool = False):
+    model = MedicalInstitutionModel
+
+    with Session() as db:
+        if search:
+            ensure_no_cursor()
+            return paginate(
+                db.query(model).order_by(model.name),
+                additional_data={"next_cursor": None},
+            )
+
+        return paginate(after_cursor(db.query(model), model.created_at, model.id))
+
+
+@pytest.fixture
+def client(database):
+    # add_pagination sets the routes up at startup
+    with TestClient(app) as client:
+        yield client
+
+
+def add_institutions(*days: int) -> list:
+    institutions = [
+        MedicalInstitutionModel(
+            id=str(uuid.uuid4()),
+            name=f"Clinic {i}",
+            created_at=datetime.datetime(2024, 1, day, 8, 30),
+        )
+        for i, day in enumerate(days)
+    ]
+
+    with Session() as session:
+        session.add_all(institutions)
+        session.commit()
+        return [(institution.created_at, institution.id) for institution in institutions]
+
+
+def test_cursor_round_trip():
+    created_at = datetime.datetime(2024, 5, 17, 9, 3, 1, 250)
+    cursor = encode_cursor([created_at, "adr-1"])
+
+    assert decode_cursor(cursor) == ["2024-05-17 09:03:01.000250", "adr-1"]
+
+
+def test_cursors_page_through_every_row_once(client):
+    # Ties on created_at are broken by id
+    keys = add_institutions(1, 2, 2, 2, 3, 4, 5)
+    newest_first = [id for _, id in sorted(keys, reverse=True)]
+
+    first = client.get("/institutions", params={"size": 3}).json()
+    assert first["total"] == 7
+    # Added after the first page was read, it is not shown again further on
+    add_institutions(6)
+
+    ids, page = [item["id"] for item in first["items"]], first
+    while page["next_cursor"] is not None:
+        page = client.get(
+            "/institutions", params={"size": 3, "cursor": page["next_cursor"]}
+        ).json()
+        assert page["total"] is None
+        ids += [item["id"] for item in page["items"]]
+
+    assert ids == newest_first
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor(["2024-01-01 00:00:00.000000"]),
+        # Another list's cursor, with a third key
+        encode_cursor(["2024-01-01 00:00:00.000000", "adr-1", "reminder"]),
+    ],
+)
+def test_invalid_cursor(client, cursor):
+    response = client.get("/institutions", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_cursor_with_search(client):
+    add_institutions(1)
+    cursor = encode_cursor([datetime.datetime(2024, 1, 1), "institution-1"])
+
+    response = client.get("/institutions", params={"search": True, "cursor": cursor})
+
+    assert response.status_code == 400
+    assert client.get("/institutions", params={"search": True}).status_code == 200
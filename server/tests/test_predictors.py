@@ -0,0 +1,144 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import predictors
+import pytest
+from predictors import MODEL_VERSION_HEADER, HTTPPredictor, PredictorUnavailable
+
+ARTIFACTS = SimpleNamespace(
+    version="3",
+    feature_transform=SimpleNamespace(prediction_columns=["a", "b"]),
+)
+FEATURES = np.array([[0.0, 1.0], [1.0, 0.0], [0.5, 0.5]])
+
+
+def predictor(handler, **options) -> HTTPPredictor:
+    predictor = HTTPPredictor(
+        "http://inference/invocations",
+        timeout_seconds=1,
+        max_connections=4,
+        max_batch_rows=options.pop("max_batch_rows", 256),
+        failure_threshold=2,
+        reset_seconds=30,
+        **options,
+    )
+    predictor._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return predictor
+
+
+def mlflow_server(headers=None):
+    """Answers like mlflow models serve, one prediction per row."""
+
+    def handler(request):
+        rows = len(json.loads(request.content)["dataframe_split"]["data"])
+        return httpx.Response(
+            200, json={"predictions": list(range(rows))}, headers=headers or {}
+        )
+
+    return handler
+
+
+def failing_server(request):
+    return httpx.Response(503)
+
+
+def test_server_without_version_header():
+    # What mlflow models serve answers with
+    remote = predictor(mlflow_server())
+
+    predictions = asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+
+    np.testing.assert_array_equal(predictions, [0, 1, 2])
+
+
+def test_splits_large_batches():
+    remote = predictor(mlflow_server(), max_batch_rows=2)
+
+    predictions = asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+
+    np.testing.assert_array_equal(predictions, [0, 1, 0])
+
+
+def test_rejects_another_model_version():
+    remote = predictor(mlflow_server({MODEL_VERSION_HEADER: "2"}))
+
+    with pytest.raises(PredictorUnavailable):
+        asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+
+
+def test_accepts_the_same_model_version():
+    remote = predictor(mlflow_server({MODEL_VERSION_HEADER: "3"}))
+
+    assert len(asyncio.run(remote.predict(ARTIFACTS, FEATURES))) == 3
+
+
+def test_required_version_header():
+    remote = predictor(mlflow_server(), require_version=True)
+
+    with pytest.raises(PredictorUnavailable):
+        asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+
+
+def test_circuit_opens_probes_and_closes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(predictors.time, "monotonic", lambda: now[0])
+    handler = {"current": failing_server}
+    remote = predictor(lambda request: handler["current"](request))
+
+    async def predict():
+        return await remote.predict(ARTIFACTS, FEATURES)
+
+    # Two failures in a row open the circuit
+    for _ in range(2):
+        with pytest.raises(PredictorUnavailable):
+            asyncio.run(predict())
+    handler["current"] = mlflow_server()
+    with pytest.raises(PredictorUnavailable, match="open"):
+        asyncio.run(predict())
+
+    # After reset_seconds one probe goes through, and closes it on success
+    now[0] += 31
+    assert len(asyncio.run(predict())) == 3
+    assert len(asyncio.run(predict())) == 3
+
+
+def test_failed_probe_opens_the_circuit_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(predictors.time, "monotonic", lambda: now[0])
+    remote = predictor(failing_server)
+
+    for _ in range(2):
+        with pytest.raises(PredictorUnavailable):
+            asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+
+    now[0] += 31
+    with pytest.raises(PredictorUnavailable, match="503"):
+        asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+    with pytest.raises(PredictorUnavailable, match="open"):
+        asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+
+
+def test_cancelled_probe_lets_the_next_one_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(predictors.time, "monotonic", lambda: now[0])
+    remote = predictor(failing_server)
+
+    for _ in range(2):
+        with pytest.raises(PredictorUnavailable):
+            asyncio.run(remote.predict(ARTIFACTS, FEATURES))
+    now[0] += 31
+
+    async def cancel_probe():
+        probe = asyncio.create_task(remote.predict(ARTIFACTS, FEATURES))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+
+    with pytest.raises(PredictorUnavailable, match="503"):
+        asyncio.run(remote.predict(ARTIFACTS, FEATURES))
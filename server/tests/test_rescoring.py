@@ -0,0 +1,96 @@
+import asyncio
+import datetime
+import uuid
+
+from basemodels import (
+    CausalityAssessmentLevelEnum,
+    ExplanationStatusEnum,
+    RechallengeEnum,
+    RescoringJobStatusEnum,
+)
+from models import ADRModel, CausalityAssessmentLevelModel, RescoringJobModel
+from rescoring import RescoringRunner
+from sessions import Session
+from sqlalchemy import Enum
+
+# Required columns the tests have no values of their own for
+PLACEHOLDERS = {
+    column.name: column.type.enums[0] if isinstance(column.type, Enum) else "x"
+    for column in ADRModel.__table__.columns
+    if not column.nullable
+}
+
+
+def add_adrs(count: int) -> list:
+    adrs = [
+        ADRModel(
+            **{
+                **PLACEHOLDERS,
+                "id": str(uuid.uuid4()),
+                "created_at": datetime.datetime(2024, 1, day + 1),
+                "rifampicin_suspected": True,
+                "rechallenge": RechallengeEnum.yes,
+            }
+        )
+        for day in range(count)
+    ]
+
+    with Session() as session:
+        session.add_all(adrs)
+        session.commit()
+        return [(adr.id, adr.created_at) for adr in adrs]
+
+
+def level(adr_id: str, ml_model_id: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "adr_id": adr_id,
+        "ml_model_id": ml_model_id,
+        "causality_assessment_level_value": CausalityAssessmentLevelEnum.likely,
+        "explanation_status": ExplanationStatusEnum.pending,
+    }
+
+
+def test_resumes_after_the_last_written_chunk(database):
+    adrs = add_adrs(5)
+    scored = []
+
+    async def score(chunk, ml_model_id):
+        scored.extend(adr.id for adr in chunk)
+        return [level(adr.id, ml_model_id) for adr in chunk]
+
+    with Session() as session:
+        # Cut short after writing the chunk of the first two ADRs
+        job = RescoringJobModel(
+            ml_model_id="model@2",
+            cursor_created_at=adrs[1][1],
+            cursor_adr_id=adrs[1][0],
+            adrs_seen=2,
+            adrs_rescored=2,
+        )
+        session.add(job)
+        # And the fourth already scored by the job's version
+        session.add(CausalityAssessmentLevelModel(**level(adrs[3][0], "model@2")))
+        session.commit()
+        job_id = job.id
+
+    runner = RescoringRunner(score, lambda: False, 2, 1, 0)
+
+    async def resume():
+        runner.resume_unfinished()
+        await runner._task
+
+    asyncio.run(resume())
+
+    assert scored == [adrs[2][0], adrs[4][0]]
+    with Session() as session:
+        job = session.get(RescoringJobModel, job_id)
+        assert job.status is RescoringJobStatusEnum.completed
+        assert (job.adrs_seen, job.adrs_rescored) == (5, 4)
+        assert job.cursor_adr_id == adrs[4][0]
+        assert (
+            session.query(CausalityAssessmentLevelModel)
+            .filter_by(ml_model_id="model@2")
+            .count()
+            == 3
+        )
@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from migrations import run_migrations
+from models import ADRModel
+from search import match_expression, ranked_adr_matches
+from sessions import Session
+from sqlalchemy import Enum, literal_column
+
+# Required columns the tests have no values of their own for
+PLACEHOLDERS = {
+    column.name: column.type.enums[0] if isinstance(column.type, Enum) else "x"
+    for column in ADRModel.__table__.columns
+    if not column.nullable
+}
+
+
+@pytest.mark.parametrize(
+    "query, expression",
+    [
+        ("Wanjiku", '"wanjiku"*'),
+        ("  wanjiku   KAMAU ", '"wanjiku"* AND "kamau"*'),
+        # Split where the tokenizer splits, so no FTS5 syntax gets through
+        ("O'Brien-Smith", '"o"* AND "brien"* AND "smith"*'),
+        ('kamau" OR "x', '"kamau"* AND "or"* AND "x"*'),
+        ("NEAR(a b) AND c*", '"near"* AND "a"* AND "b"* AND "and"* AND "c"*'),
+        ("patient_name:Otieno", '"patient"* AND "name"* AND "otieno"*'),
+        ("Nyámbura 42", '"nyámbura"* AND "42"*'),
+        ("", None),
+        (" -*\"' ", None),
+    ],
+)
+def test_match_expression(query, expression):
+    assert match_expression(query) == expression
+
+
+def test_match_expression_in_columns():
+    assert (
+        match_expression("otieno", ["patient_name", "comments"])
+        == '{patient_name comments} : ("otieno"*)'
+    )
+
+
+@pytest.fixture
+def adrs(database):
+    run_migrations()
+
+    with Session() as session:
+        for name, comments in [
+            ("Wanjiku Kamau", None),
+            ("Otieno Kamaulu", None),
+            ("Achieng O'Brien", "Seen by Dr Kamau"),
+            ("Nyambura Wairimu", None),
+        ]:
+            session.add(
+                ADRModel(
+                    **{
+                        **PLACEHOLDERS,
+                        "id": str(uuid.uuid4()),
+                        "patient_name": name,
+                        "comments": comments,
+                    }
+                )
+            )
+        session.commit()
+
+
+def search(query: str, columns=None) -> list:
+    matches = ranked_adr_matches(match_expression(query, columns))
+
+    with Session() as session:
+        return [
+            name
+            for (name,) in session.query(ADRModel.patient_name)
+            .join(matches, matches.c.rowid == literal_column("adr.rowid"))
+            .order_by(matches.c.rank, ADRModel.patient_name)
+        ]
+
+
+def test_prefixes_of_every_word_match(adrs):
+    assert search("wanj kam") == ["Wanjiku Kamau"]
+    assert search("obrien") == []
+    assert search("o'bri") == ["Achieng O'Brien"]
+
+
+def test_names_rank_over_comments(adrs):
+    names = search("kamau")
+
+    assert sorted(names[:2]) == ["Otieno Kamaulu", "Wanjiku Kamau"]
+    assert names[2:] == ["Achieng O'Brien"]
+    assert search("seen kamau") == ["Achieng O'Brien"]
+    assert search("kamau", ["patient_name"]) == names[:2]
+
+
+def test_accents_and_syntax_are_plain_text(adrs):
+    assert search("Nyámbura") == ["Nyambura Wairimu"]
+    assert search('"Otieno" OR NEAR(') == []
+    assert search("otieno*") == ["Otieno Kamaulu"]
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+import shadow
+from basemodels import CausalityAssessmentLevelEnum
+from shadow import ShadowScorer
+
+CHALLENGER = SimpleNamespace(ml_model_id="challenger")
+
+
+class Executor:
+    def __init__(self):
+        self.batches = []
+
+    async def classify(self, artifacts, adrs):
+        self.batches.append(adrs)
+        return ["likely"] * len(adrs)
+
+
+def scorer(busy: list) -> ShadowScorer:
+    scorer = ShadowScorer(
+        SimpleNamespace(current=lambda: CHALLENGER),
+        Executor(),
+        lambda: busy[0],
+        queue_depth=8,
+        batch_size=4,
+    )
+    scorer.saved = []
+    scorer._save = scorer.saved.extend
+    return scorer
+
+
+async def run(scorer: ShadowScorer, adrs: list):
+    for i, adr in enumerate(adrs):
+        scorer.submit(
+            adr, f"adr-{i}", f"cal-{i}", "champion", CausalityAssessmentLevelEnum.likely
+        )
+
+    task = asyncio.create_task(scorer.run())
+    while not scorer._queue.empty():
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+
+def test_scores_with_the_challenger():
+    shadow_scorer = scorer([False])
+
+    asyncio.run(run(shadow_scorer, ["a", "b", "c"]))
+
+    assert shadow_scorer.executor.batches == [["a", "b", "c"]]
+    assert [row.adr_id for row in shadow_scorer.saved] == ["adr-0", "adr-1", "adr-2"]
+    assert all(row.agrees for row in shadow_scorer.saved)
+
+
+def test_drops_batches_while_inference_is_busy():
+    shadow_scorer = scorer([True])
+    dropped = shadow.shadow_dropped.value
+
+    asyncio.run(run(shadow_scorer, ["a", "b"]))
+
+    assert shadow_scorer.executor.batches == []
+    assert shadow.shadow_dropped.value == dropped + 2
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+from typeahead import InstitutionTypeahead
+
+INSTITUTIONS = [
+    {
+        "id": "knh",
+        "name": "Kenyatta National Hospital",
+        "mfl_code": "13023",
+        "dhis_code": "0",
+        "county": "Nairobi",
+        "sub_county": "Dagoretti North",
+    },
+    {
+        "id": "mama-kenyatta",
+        "name": "Mama Kenyatta Clinic",
+        "mfl_code": "20145",
+        "dhis_code": "aBc123",
+        "county": "Kiambu",
+        "sub_county": "Thika Town",
+    },
+    {
+        "id": "kenyatta-health",
+        "name": "Kenyatta Health Centre",
+        "mfl_code": None,
+        "dhis_code": None,
+        "county": "Nairobi",
+        "sub_county": "Kasarani",
+    },
+    {
+        "id": "thika",
+        "name": "Thika Level 5 Hospital",
+        "mfl_code": "11094",
+        "dhis_code": None,
+        "county": "Kiambu",
+        "sub_county": "Thika Town",
+    },
+]
+
+
+@pytest.fixture
+def typeahead() -> InstitutionTypeahead:
+    typeahead = InstitutionTypeahead()
+    typeahead.rebuild(dict(institution) for institution in INSTITUTIONS)
+    return typeahead
+
+
+def ids(institutions) -> list:
+    return [institution["id"] for institution in institutions]
+
+
+def test_names_starting_with_the_query_rank_first(typeahead):
+    # Shorter names first among equally good matches
+    assert ids(typeahead.search("kenyatta")) == [
+        "kenyatta-health",
+        "knh",
+        "mama-kenyatta",
+    ]
+
+
+def test_every_word_has_to_match(typeahead):
+    assert ids(typeahead.search("kenyatta nairobi")) == ["kenyatta-health", "knh"]
+    assert ids(typeahead.search("thika hosp")) == ["thika"]
+    assert typeahead.search("kenyatta mombasa") == []
+
+
+def test_typos_in_longer_words(typeahead):
+    assert ids(typeahead.search("kenyata nat")) == ["knh"]
+    # Too short to tell a typo from another word, only prefixes match
+    assert typeahead.search("tika") == []
+    assert ids(typeahead.search("thi")) == ["thika", "mama-kenyatta"]
+
+
+def test_codes_rank_over_names(typeahead):
+    assert ids(typeahead.search("13023")) == ["knh"]
+    assert ids(typeahead.search(" ABC123 ")) == ["mama-kenyatta"]
+    # A DHIS code of 0 stands for none
+    assert typeahead.search("0") == []
+
+
+def test_changes_are_indexed(typeahead):
+    typeahead.add(SimpleNamespace(**{**INSTITUTIONS[3], "name": "Thika Referral"}))
+    typeahead.remove("knh")
+
+    assert ids(typeahead.search("referral")) == ["thika"]
+    assert typeahead.search("hospital") == []
+    assert typeahead.search("national") == []
@@ -0,0 +1,212 @@
+"""
+In-memory typeahead index of medical institutions, for the search box of the
+institution form.
+
+Every word of a query has to match a word of the name, county or sub county,
+by its start or, for longer words, with a typo or two judged by shared
+trigrams. Exact MFL and DHIS codes match too and rank first. Loaded from the
+database at startup and kept up to date by the endpoints that change
+institutions.
+"""
+
+import bisect
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set
+
+from models import MedicalInstitutionModel
+from sessions import Session
+
+INSTITUTION_FIELDS = ["id", "name", "mfl_code", "dhis_code", "county", "sub_county"]
+TEXT_FIELDS = ["name", "county", "sub_county"]
+CODE_FIELDS = ["mfl_code", "dhis_code"]
+
+# Trigram similarity of a query word and a word it matches with typos
+MIN_TRIGRAM_SIMILARITY = 0.5
+# Shorter words have too few trigrams to tell typos from other words
+MIN_TYPO_WORD_LENGTH = 4
+
+CODE_SCORE = 3.0
+NAME_PREFIX_BONUS = 0.5
+
+
+def words(text: str | None) -> List[str]:
+    return re.findall(r"[^\W_]+", (text or "").lower())
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of a word padded like pg_trgm, so word starts weigh more."""
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def institution_record(institution) -> dict:
+    return {field: getattr(institution, field) for field in INSTITUTION_FIELDS}
+
+
+class InstitutionTypeahead:
+    """Institutions by id, with their words and codes indexed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._institutions: Dict[str, dict] = {}
+        self._words: Dict[str, Set[str]] = defaultdict(set)
+        self._codes: Dict[str, Set[str]] = defaultdict(set)
+        # Words by trigram for typos, and in order for prefixes
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._sorted_words: List[str] | None = None
+
+    def load(self):
+        """Index every institution in the database, replacing the index."""
+        with Session() as session:
+            institutions = session.query(
+                *[getattr(MedicalInstitutionModel, field) for field in INSTITUTION_FIELDS]
+            ).all()
+
+        self.rebuild(institution_record(institution) for institution in institutions)
+
+    def rebuild(self, institutions: Iterable[dict]):
+        with self._lock:
+            self._clear()
+            for institution in institutions:
+                self._add(institution)
+
+    def add(self, institution):
+        """Index a new institution, or the new values of a changed one."""
+        record = institution_record(institution)
+        with self._lock:
+            self._remove(record["id"])
+            self._add(record)
+
+    def remove(self, institution_id: str):
+        with self._lock:
+            self._remove(institution_id)
+
+    def _keys(self, institution: dict) -> tuple:
+        institution_words = {
+            word for field in TEXT_FIELDS for word in words(institution[field])
+        }
+        # DHIS code 0 stands for none in the facility list
+        codes = {
+            str(institution[field]).strip().lower()
+            for field in CODE_FIELDS
+            if institution[field] not in (None, "", "0", 0)
+        }
+        return institution_words, codes
+
+    def _add(self, institution: dict):
+        institution_id = institution["id"]
+        self._institutions[institution_id] = institution
+
+        institution_words, codes = self._keys(institution)
+        for word in institution_words:
+            if word not in self._words:
+                for trigram in trigrams(word):
+                    self._trigrams[trigram].add(word)
+                self._sorted_words = None
+            self._words[word].add(institution_id)
+        for code in codes:
+            self._codes[code].add(institution_id)
+
+    def _remove(self, institution_id: str):
+        institution = self._institutions.pop(institution_id, None)
+        if institution is None:
+            return
+
+        institution_words, codes = self._keys(institution)
+        for word in institution_words:
+            self._words[word].discard(institution_id)
+            if not self._words[word]:
+                del self._words[word]
+                for trigram in trigrams(word):
+                    self._trigrams[trigram].discard(word)
+                self._sorted_words = None
+        for code in codes:
+            self._codes[code].discard(institution_id)
+            if not self._codes[code]:
+                del self._codes[code]
+
+    def _similar_words(self, query_word: str) -> Dict[str, float]:
+        """Indexed words matching `query_word`, with how closely."""
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._words)
+
+        similar = {}
+
+        if len(query_word) >= MIN_TYPO_WORD_LENGTH:
+            query_trigrams = trigrams(query_word)
+            shared = Counter()
+            for trigram in query_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+            for word, count in shared.items():
+                similarity = count / (len(query_trigrams) + len(trigrams(word)) - count)
+                if similarity >= MIN_TRIGRAM_SIMILARITY:
+                    similar[word] = similarity
+
+        # Words the query word starts, as the user is still typing
+        start = bisect.bisect_left(self._sorted_words, query_word)
+        for word in self._sorted_words[start:]:
+            if not word.startswith(query_word):
+                break
+            similar[word] = 1.0
+
+        return similar
+
+    def search(self, query: str) -> List[dict]:
+        """Institutions matching `query`, best first."""
+        query_words = words(query)
+        if not query_words:
+            return []
+
+        with self._lock:
+            # Mean over the query words of how closely each one matched
+            scores: Dict[str, float] = {}
+            for position, query_word in enumerate(query_words):
+                best: Dict[str, float] = {}
+                for word, similarity in self._similar_words(query_word).items():
+                    for institution_id in self._words[word]:
+                        if similarity > best.get(institution_id, 0):
+                            best[institution_id] = similarity
+
+                if position == 0:
+                    scores = best
+                else:
+                    scores = {
+                        institution_id: score + best[institution_id]
+                        for institution_id, score in scores.items()
+                        if institution_id in best
+                    }
+            scores = {
+                institution_id: score / len(query_words)
+                for institution_id, score in scores.items()
+            }
+
+            phrase = " ".join(query_words)
+            for institution_id in scores:
+                name = " ".join(words(self._institutions[institution_id]["name"]))
+                if name.startswith(phrase):
+                    scores[institution_id] += NAME_PREFIX_BONUS
+
+            for institution_id in self._codes.get(query.strip().lower(), ()):
+                scores[institution_id] = CODE_SCORE
+
+            institutions = [
+                self._institutions[institution_id] for institution_id in scores
+            ]
+
+        # Best score first, then shorter and alphabetically first names
+        institutions.sort(
+            key=lambda institution: (
+                -scores[institution["id"]],
+                len(institution["name"]),
+                institution["name"],
+            )
+        )
+        return institutions
+
+
+institution_typeahead = InstitutionTypeahead()